@@ -11,6 +11,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+import firebase_utils
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Initialize Firebase and fetch its signing certs before the first request
+firebase_utils.warm_up()
@@ -0,0 +1,96 @@
+"""
+Streaming CSV and JSON Lines exports.
+
+Rows come from `values_list(...).iterator(chunk_size=...)`, fetched and
+encoded one chunk at a time, so at most one chunk of tuples is held in
+memory however many rows are exported. The response body is an async
+iterator: under ASGI Django would otherwise read a synchronous iterator
+to the end before sending anything.
+"""
+import csv
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class _LineBuffer:
+    """File-like target for csv.writer that keeps what was written"""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, value):
+        self.lines.append(value)
+
+    def flush(self):
+        data = ''.join(self.lines)
+        self.lines = []
+        return data
+
+
+def get_export_format(request):
+    """The requested ?format=, or None if it is not supported"""
+    export_format = request.GET.get('format', 'csv').lower()
+    return export_format if export_format in EXPORT_FORMATS else None
+
+
+async def _iter_chunks(queryset, chunk_size):
+    """
+    Yield lists of up to chunk_size rows from queryset.iterator().
+
+    Like QuerySet.aiterator(), each chunk is fetched with sync_to_async on
+    the same thread, so a server-side cursor stays on one connection;
+    aiterator() itself cannot be used because values_list() executes its
+    query before the first chunk is requested.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    fetch = sync_to_async(lambda: list(islice(rows, chunk_size)))
+    while True:
+        chunk = await fetch()
+        if not chunk:
+            return
+        yield chunk
+
+
+async def _encode_rows(chunks, fields, export_format):
+    buffer = _LineBuffer()
+    if export_format == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield buffer.flush().encode('utf-8')
+        async for chunk in chunks:
+            writer.writerows(chunk)
+            yield buffer.flush().encode('utf-8')
+    else:
+        encoder = DjangoJSONEncoder(separators=(',', ':'), ensure_ascii=False)
+        async for chunk in chunks:
+            for row in chunk:
+                buffer.write(encoder.encode(dict(zip(fields, row))) + '\n')
+            yield buffer.flush().encode('utf-8')
+
+
+def stream_export(queryset, columns, export_format, filename, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream every row of `queryset` as a CSV or JSONL download.
+
+    `columns` maps output names (the CSV header and the JSONL keys) to
+    values_list() lookups, e.g. {'symbol': 'stock__symbol'}.
+    """
+    chunks = _iter_chunks(queryset.values_list(*columns.values()), chunk_size)
+    response = StreamingHttpResponse(
+        _encode_rows(chunks, list(columns), export_format),
+        content_type=EXPORT_FORMATS[export_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
@@ -0,0 +1,188 @@
+"""
+Optional per-request profiling.
+
+When PROFILING_ENABLED is set, ProfilingMiddleware measures every request:
+time and number of SQL queries, time spent authenticating and time spent
+serializing. Each response gets a Server-Timing header. A sample of
+requests (PROFILING_SAMPLE_RATE) also keeps the SQL it ran and is logged
+as one JSON line, listing statements repeated PROFILING_DUPLICATE_THRESHOLD
+or more times as probable N+1 queries.
+
+Outside a profiled request every hook is a single context variable read.
+"""
+import json
+import logging
+import random
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Timings collected for one request"""
+
+    def __init__(self, sampled):
+        self.sampled = sampled
+        self.started = perf_counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.statements = Counter()
+        self.sections = defaultdict(float)
+        self.open_sections = set()
+
+    def duplicates(self, threshold):
+        """Statements run at least `threshold` times, most repeated first"""
+        return [
+            {'sql': sql[:300], 'count': count}
+            for sql, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+    def server_timing(self, total):
+        metrics = [f'db;dur={self.query_time * 1000:.1f};desc="{self.query_count} queries"']
+        metrics.extend(f'{name};dur={duration * 1000:.1f}' for name, duration in sorted(self.sections.items()))
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+class timed:
+    """
+    Add the duration of the block to a named section of the current profile.
+
+    A no-op outside profiled requests; nested blocks of the same name are
+    only counted once.
+    """
+
+    __slots__ = ('name', 'profile', 'started')
+
+    def __init__(self, name):
+        self.name = name
+        self.profile = None
+
+    def __enter__(self):
+        profile = _current.get()
+        if profile is not None and self.name not in profile.open_sections:
+            profile.open_sections.add(self.name)
+            self.profile = profile
+            self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profile is not None:
+            self.profile.sections[self.name] += perf_counter() - self.started
+            self.profile.open_sections.discard(self.name)
+            self.profile = None
+        return False
+
+
+class ProfiledSerializerMixin:
+    """Count a serializer's to_representation towards the 'serialize' section"""
+
+    def to_representation(self, instance):
+        if _current.get() is None:
+            return super().to_representation(instance)
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.query_count += 1
+        profile.query_time += perf_counter() - started
+        if profile.sampled:
+            # Parameters are passed separately, so the same statement
+            # with different values has the same text
+            profile.statements[sql] += 1
+
+
+def _install_on(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install_on(connection)
+
+
+def install_query_recorder():
+    """
+    Record queries on every database connection, in every thread.
+
+    Async views run their queries on a worker thread's connection, so a
+    wrapper installed only around the middleware call would miss them.
+    """
+    connection_created.connect(_on_connection_created, dispatch_uid='backend.profiling')
+    for connection in connections.all(initialized_only=True):
+        _install_on(connection)
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.duplicate_threshold = settings.PROFILING_DUPLICATE_THRESHOLD
+        install_query_recorder()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        profile = RequestProfile(sampled=random.random() < self.sample_rate)
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile = RequestProfile(sampled=random.random() < self.sample_rate)
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile)
+
+    def finish(self, request, response, profile):
+        total = perf_counter() - profile.started
+        response['Server-Timing'] = profile.server_timing(total)
+
+        if profile.sampled:
+            duplicates = profile.duplicates(self.duplicate_threshold)
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 2),
+                'db_ms': round(profile.query_time * 1000, 2),
+                'queries': profile.query_count,
+                **{f'{name}_ms': round(duration * 1000, 2) for name, duration in profile.sections.items()},
+                'probable_n_plus_one': duplicates,
+            }
+            log = logger.warning if duplicates else logger.info
+            log(json.dumps(record))
+
+        return response
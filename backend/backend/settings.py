@@ -44,6 +44,10 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cursor pagination for GET /api/stocks/ (see stocks.pagination)
+STOCK_LIST_PAGE_SIZE = int(os.getenv('STOCK_LIST_PAGE_SIZE', '100'))
+STOCK_LIST_MAX_PAGE_SIZE = int(os.getenv('STOCK_LIST_MAX_PAGE_SIZE', '500'))
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -98,6 +102,56 @@ DATABASES = {
     'default': dj_database_url.config()
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory is per process; with several workers point CACHE_BACKEND at a
+# shared backend (e.g. django.core.cache.backends.filebased.FileBasedCache or
+# django.core.cache.backends.db.DatabaseCache) so invalidations reach all of them.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'stocksense'),
+    }
+}
+
+# Seconds a process trusts its cached stock universe version before
+# re-reading it from the database (see stocks.universe); bounds how long
+# other workers serve a stale search index after load_stocks runs
+UNIVERSE_VERSION_TTL = int(os.getenv('UNIVERSE_VERSION_TTL', '5'))
+
+# Seconds a user's serialized watchlist is served from cache (see watchlists.cache)
+WATCHLIST_CACHE_TTL = int(os.getenv('WATCHLIST_CACHE_TTL', '300'))
+
+# Verified Firebase ID tokens are cached in-process (see users.authentication);
+# the TTL bounds how long a revoked token keeps working
+FIREBASE_TOKEN_CACHE_SIZE = int(os.getenv('FIREBASE_TOKEN_CACHE_SIZE', '10000'))
+FIREBASE_TOKEN_CACHE_TTL = int(os.getenv('FIREBASE_TOKEN_CACHE_TTL', '300'))
+
+# Latest quotes come from the AI service's batched /quotes endpoint and are
+# cached per symbol, shared by every user watching it (see stocks.quotes)
+AI_SERVICE_URL = os.getenv('AI_SERVICE_URL', 'http://localhost:8080')
+QUOTE_CACHE_TTL = int(os.getenv('QUOTE_CACHE_TTL', '60'))
+QUOTE_FETCH_TIMEOUT = int(os.getenv('QUOTE_FETCH_TIMEOUT', '10'))
+# Snapshots written by refresh_quotes are served on a cache miss until
+# they are this old; older ones are refetched from the AI service
+QUOTE_SNAPSHOT_MAX_AGE = int(os.getenv('QUOTE_SNAPSHOT_MAX_AGE', '900'))
+
+# Watchlist headlines come from the AI service's combined /news endpoint,
+# cached per symbol the same way (see stocks.news)
+NEWS_CACHE_TTL = int(os.getenv('NEWS_CACHE_TTL', '900'))
+NEWS_FETCH_TIMEOUT = int(os.getenv('NEWS_FETCH_TIMEOUT', '30'))
+
+# Optional request profiling (see backend.profiling): Server-Timing headers
+# on every response, plus a JSON log line with probable N+1 queries for a
+# sample of requests
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0.01'))
+PROFILING_DUPLICATE_THRESHOLD = int(os.getenv('PROFILING_DUPLICATE_THRESHOLD', '3'))
+
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(0, 'backend.profiling.ProfilingMiddleware')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,530 @@
+"""
+Project-level tests: request profiling, and the query-count and latency
+regression suite for the API.
+
+The regression suite seeds a realistic data set once per class, pins the number of queries
+every endpoint runs and times each one. Volumes are configurable:
+
+    PERF_STOCKS      stocks in the universe          (default 12000)
+    PERF_USERS       users, each with a watchlist    (default 2000)
+    PERF_WATCHLIST   entries per watchlist           (default 50)
+    PERF_RUNS        timed requests per endpoint     (default 5)
+    PERF_REPORT      write a JSON latency report to this path
+
+Run only this suite with `python manage.py test --tag performance`,
+or skip it with `--exclude-tag performance`.
+"""
+import json
+from io import StringIO
+import os
+import statistics
+import subprocess
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from backend.profiling import ProfilingMiddleware
+from stocks.models import Stock
+from stocks.resolver import stock_resolver
+from stocks.search import get_search_index
+from stocks.snapshot import get_universe_snapshot
+from stocks.universe import bump_universe_version, get_universe_version
+from watchlists.models import Watchlist, WatchlistStock
+
+User = get_user_model()
+
+STOCK_COUNT = int(os.getenv('PERF_STOCKS', '12000'))
+USER_COUNT = int(os.getenv('PERF_USERS', '2000'))
+WATCHLIST_SIZE = int(os.getenv('PERF_WATCHLIST', '50'))
+RUNS = int(os.getenv('PERF_RUNS', '5'))
+REPORT_PATH = os.getenv('PERF_REPORT')
+
+PERF_SECTORS = [
+    'Technology', 'Health Care', 'Finance', 'Energy', 'Industrials',
+    'Consumer Discretionary', 'Utilities', 'Real Estate', 'Telecommunications'
+]
+
+# Filled by every test in the run, written once by tearDownModule
+results = {}
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, cwd=settings.BASE_DIR, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def tearDownModule():
+    if not REPORT_PATH or not results:
+        return
+
+    report = {
+        'commit': current_commit(),
+        'created_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'volumes': {
+            'stocks': STOCK_COUNT,
+            'users': USER_COUNT,
+            'watchlist_size': WATCHLIST_SIZE,
+            'runs': RUNS,
+        },
+        'endpoints': dict(sorted(results.items())),
+    }
+    with open(REPORT_PATH, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+
+
+PROFILED_MIDDLEWARE = ['backend.profiling.ProfilingMiddleware', *settings.MIDDLEWARE]
+
+
+@override_settings(MIDDLEWARE=PROFILED_MIDDLEWARE, PROFILING_SAMPLE_RATE=1.0)
+class ProfilingMiddlewareTests(TestCase):
+    """Test cases for the request profiling middleware"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        Stock.objects.create(symbol='AAPL', name='Apple Inc.')
+        Watchlist.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def repeated_queries(self, request):
+        for _ in range(3):
+            list(Stock.objects.filter(symbol='AAPL'))
+        return HttpResponse('ok')
+
+    def test_server_timing_header(self):
+        """Test responses report SQL, auth, serialization and total time"""
+        response = self.client.get('/api/stocks/')
+
+        timing = response['Server-Timing']
+        self.assertIn('desc="1 queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_authentication_is_timed(self):
+        """Test the Firebase authentication step gets its own metric"""
+        # force_authenticate bypasses the authentication classes
+        response = APIClient().get('/api/stocks/')
+        self.assertIn('auth;dur=', response['Server-Timing'])
+
+    def test_async_view_queries_are_counted(self):
+        """Test queries an async view runs on a worker thread are counted"""
+        response = self.client.get('/api/watchlists/')
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+    def test_duplicate_queries_flagged(self):
+        """Test repeated statements are logged as probable N+1 queries"""
+        middleware = ProfilingMiddleware(self.repeated_queries)
+
+        with self.assertLogs('backend.profiling', 'WARNING') as logs:
+            middleware(RequestFactory().get('/n-plus-one'))
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['queries'], 3)
+        self.assertEqual(record['probable_n_plus_one'][0]['count'], 3)
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_logged(self):
+        """Test only sampled requests are logged, all get the header"""
+        middleware = ProfilingMiddleware(self.repeated_queries)
+
+        with self.assertNoLogs('backend.profiling'):
+            response = middleware(RequestFactory().get('/n-plus-one'))
+        self.assertIn('desc="3 queries"', response['Server-Timing'])
+
+
+@tag('performance')
+class APIPerformanceTests(TestCase):
+    """Query counts and latency for every API endpoint at realistic volumes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data"""
+        Stock.objects.bulk_create(
+            [
+                Stock(
+                    symbol=f'S{i:05d}',
+                    name=f'Company {i} Holdings Inc.',
+                    sector=PERF_SECTORS[i % len(PERF_SECTORS)],
+                    industry=f'Industry {i % 60}',
+                    country='United States' if i % 5 else f'Country {i % 30}',
+                    market_cap=(i * 7919 % 100000) * 1000000 or None,
+                    ipo_year=1980 + i % 45
+                )
+                for i in range(STOCK_COUNT)
+            ],
+            batch_size=2000
+        )
+        User.objects.bulk_create(
+            [
+                User(username=f'user{i}@example.com', email=f'user{i}@example.com', firebase_uid=f'uid_{i}')
+                for i in range(USER_COUNT)
+            ],
+            batch_size=2000
+        )
+        Watchlist.objects.bulk_create(
+            [Watchlist(user_id=user_id) for user_id in User.objects.values_list('id', flat=True)],
+            batch_size=2000
+        )
+
+        stock_ids = list(Stock.objects.order_by('id').values_list('id', flat=True))
+        entries = []
+        for position, watchlist_id in enumerate(Watchlist.objects.order_by('id').values_list('id', flat=True)):
+            # Overlapping windows, so popular stocks are shared across users
+            start = (position * 7) % max(1, len(stock_ids) - WATCHLIST_SIZE)
+            entries.extend(
+                WatchlistStock(watchlist_id=watchlist_id, stock_id=stock_id)
+                for stock_id in stock_ids[start:start + WATCHLIST_SIZE]
+            )
+        WatchlistStock.objects.bulk_create(entries, batch_size=5000)
+        call_command('reconcile_watcher_counts', stdout=StringIO())
+        # bulk_create bypasses the Stock signals; the bump runs on commit,
+        # which TestCase never reaches
+        with cls.captureOnCommitCallbacks(execute=True):
+            bump_universe_version()
+
+        cls.user = User.objects.order_by('id').first()
+        cls.watchlist = Watchlist.objects.get(user=cls.user)
+        cls.outside_ids = list(
+            Stock.objects.exclude(watchliststock__watchlist=cls.watchlist)
+            .order_by('id').values_list('id', flat=True)[:RUNS * 4]
+        )
+        cls.outside_symbols = list(
+            Stock.objects.filter(id__in=cls.outside_ids).order_by('id').values_list('symbol', flat=True)
+        )
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        # The resolver is process-local; start every test with it cold
+        stock_resolver.version = None
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def measure(self, name, request, queries, before=None, runs=RUNS):
+        """
+        Issue `request` `runs` times, asserting the query count of every run.
+
+        `before(run)` prepares state for each run outside the timed section.
+        """
+        timings = []
+        for run in range(runs):
+            if before is not None:
+                before(run)
+
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = request(run)
+                elapsed = time.perf_counter() - started
+
+            self.assertLess(response.status_code, 400, f'{name}: {response.status_code}')
+            self.assertEqual(
+                len(context.captured_queries), queries,
+                f'{name} ran {len(context.captured_queries)} queries, expected {queries}:\n' +
+                '\n'.join(query['sql'] for query in context.captured_queries)
+            )
+            timings.append(elapsed * 1000)
+
+        timings.sort()
+        results[name] = {
+            'queries': queries,
+            'runs': runs,
+            'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            'max_ms': round(timings[-1], 3),
+        }
+        return response
+
+    def download(self, path, params=None):
+        """GET a streamed export and read the whole body, as a client would"""
+        response = self.client.get(path, params)
+
+        async def read_body():
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        response.body = async_to_sync(read_body)()
+        return response
+
+    # stocks/urls.py
+
+    def test_stock_list_page(self):
+        """Test a stock list page is one query at any table size"""
+        self.measure('GET /api/stocks/', lambda run: self.client.get('/api/stocks/'), queries=1)
+
+    def test_stock_list_next_page(self):
+        """Test following the cursor stays one query"""
+        next_url = self.client.get('/api/stocks/').json()['next']
+        self.measure('GET /api/stocks/?cursor=', lambda run: self.client.get(next_url), queries=1)
+
+    def test_stock_list_all(self):
+        """Test the unpaginated universe is one query"""
+        self.measure('GET /api/stocks/?all=true', lambda run: self.client.get('/api/stocks/', {'all': 'true'}), queries=1, runs=1)
+
+    def test_stock_list_filtered(self):
+        """Test a filtered, market-cap ordered page is one query"""
+        params = {'sector': 'Technology', 'country': 'United States', 'ordering': '-market_cap'}
+        response = self.measure(
+            'GET /api/stocks/?sector=&ordering=',
+            lambda run: self.client.get('/api/stocks/', params),
+            queries=1
+        )
+        caps = [stock['market_cap'] for stock in response.json()['results']]
+        self.assertEqual(caps, sorted(caps, reverse=True))
+
+    def test_stock_facets(self):
+        """Test facet counts are one query per facet"""
+        self.measure(
+            'GET /api/stocks/facets/',
+            lambda run: self.client.get('/api/stocks/facets/', {'sector': 'Technology'}),
+            queries=3
+        )
+
+    def test_facet_counts_are_index_only(self):
+        """Test facet counts are answered from an index without reading the table"""
+        queries = [
+            Stock.objects.order_by().values_list('sector').annotate(count=Count('*')),
+            Stock.objects.order_by().values_list('country').annotate(count=Count('*')),
+            Stock.objects.filter(sector='Technology').order_by().values_list('industry').annotate(count=Count('*')),
+            Stock.objects.filter(country='United States').order_by().values_list('sector').annotate(count=Count('*')),
+        ]
+        for queryset in queries:
+            plan = queryset.explain()
+            # SQLite and PostgreSQL wording for an index-only scan
+            self.assertTrue('COVERING INDEX' in plan or 'Index Only Scan' in plan, plan)
+
+    def test_stock_search(self):
+        """Test search on a warm index never queries the database"""
+        get_search_index()
+        self.measure(
+            'GET /api/stocks/?search=',
+            lambda run: self.client.get('/api/stocks/', {'search': 'holdings'}),
+            queries=0
+        )
+
+    def test_async_stock_search(self):
+        """Test the async search endpoint on a warm index never queries the database"""
+        get_search_index()
+        self.measure(
+            'GET /api/stocks/search/',
+            lambda run: self.client.get('/api/stocks/search/', {'q': 'company 11'}),
+            queries=0
+        )
+
+    def test_stock_lookup_cold(self):
+        """Test resolving a portfolio of symbols on a cold resolver is one query"""
+        symbols = ','.join(f'S{i:05d}' for i in range(0, min(STOCK_COUNT, 400), 2))
+
+        def reset_resolver(run):
+            get_universe_version()
+            stock_resolver.version = None
+
+        self.measure(
+            'GET /api/stocks/lookup/ (cold)',
+            lambda run: self.client.get('/api/stocks/lookup/', {'symbols': symbols}),
+            queries=1,
+            before=reset_resolver
+        )
+
+    def test_stock_lookup_warm(self):
+        """Test resolving known symbols on a warm resolver never queries the database"""
+        symbols = ','.join(f'S{i:05d}' for i in range(0, min(STOCK_COUNT, 400), 2))
+        self.client.get('/api/stocks/lookup/', {'symbols': symbols})
+        response = self.measure(
+            'GET /api/stocks/lookup/ (warm)',
+            lambda run: self.client.get('/api/stocks/lookup/', {'symbols': symbols}),
+            queries=0
+        )
+        self.assertEqual(response.json()['unknown'], [])
+
+    def test_stock_export(self):
+        """Test exporting the whole universe is one query however many rows it streams"""
+        response = self.measure(
+            'GET /api/stocks/export/',
+            lambda run: self.download('/api/stocks/export/'),
+            queries=1,
+            runs=1
+        )
+        # Header plus one line per stock
+        self.assertEqual(response.body.count(b'\n'), STOCK_COUNT + 1)
+
+    def test_stock_export_jsonl(self):
+        """Test the JSONL export is one query however many rows it streams"""
+        response = self.measure(
+            'GET /api/stocks/export/?format=jsonl',
+            lambda run: self.download('/api/stocks/export/', {'format': 'jsonl'}),
+            queries=1,
+            runs=1
+        )
+        self.assertEqual(response.body.count(b'\n'), STOCK_COUNT)
+
+    def test_stock_create(self):
+        """Test creating a stock is a uniqueness check, an insert and the universe version bump"""
+        def create(run):
+            # The bump runs on commit, which TestCase never reaches
+            with self.captureOnCommitCallbacks(execute=True):
+                return self.client.post('/api/stocks/', {'symbol': f'NEW{run}', 'name': 'New Co'}, format='json')
+
+        self.measure('POST /api/stocks/', create, queries=3)
+
+    def test_universe_snapshot(self):
+        """Test a warm universe snapshot is served without queries"""
+        get_universe_snapshot()
+        self.measure(
+            'GET /api/stocks/snapshot/',
+            lambda run: self.client.get('/api/stocks/snapshot/', HTTP_ACCEPT_ENCODING='gzip'),
+            queries=0
+        )
+
+    def test_popular_stocks(self):
+        """Test the most-watched list is one indexed query"""
+        response = self.measure(
+            'GET /api/stocks/popular/',
+            lambda run: self.client.get('/api/stocks/popular/', {'limit': 50}),
+            queries=1
+        )
+        counts = [stock['watcher_count'] for stock in response.json()]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+
+    # watchlists/urls.py
+    # Write counts include the SAVEPOINT and RELEASE that TestCase adds
+    # around each atomic block
+
+    def test_watchlist_cold(self):
+        """Test a cold watchlist read is two queries at any watchlist size"""
+        self.measure(
+            'GET /api/watchlists/ (cold)',
+            lambda run: self.client.get('/api/watchlists/'),
+            queries=2,
+            before=lambda run: cache.clear()
+        )
+
+    def test_watchlist_warm(self):
+        """Test a warm watchlist read is served from cache"""
+        self.client.get('/api/watchlists/')
+        self.measure('GET /api/watchlists/ (warm)', lambda run: self.client.get('/api/watchlists/'), queries=0)
+
+    @mock.patch('stocks.quotes.fetch_quotes', return_value={})
+    def test_watchlist_quotes(self, fetch):
+        """Test the quotes join adds no queries to the watchlist read"""
+        self.measure(
+            'GET /api/watchlists/quotes/ (cold)',
+            lambda run: self.client.get('/api/watchlists/quotes/'),
+            queries=2,
+            before=lambda run: cache.clear()
+        )
+
+    @mock.patch('stocks.news.fetch_news', return_value=({}, []))
+    def test_watchlist_news_cold(self, fetch):
+        """Test the news join adds no queries to the watchlist read"""
+        self.measure(
+            'GET /api/watchlists/news/ (cold)',
+            lambda run: self.client.get('/api/watchlists/news/'),
+            queries=2,
+            before=lambda run: cache.clear()
+        )
+
+    @mock.patch('stocks.news.fetch_news', return_value=({}, []))
+    def test_watchlist_news_warm(self, fetch):
+        """Test warm watchlist news is served from cache without queries"""
+        self.client.get('/api/watchlists/news/')
+        self.measure(
+            'GET /api/watchlists/news/ (warm)',
+            lambda run: self.client.get('/api/watchlists/news/'),
+            queries=0
+        )
+
+    def test_watchlist_export(self):
+        """Test exporting a watchlist is one query at any watchlist size"""
+        response = self.measure(
+            'GET /api/watchlists/export/',
+            lambda run: self.download('/api/watchlists/export/'),
+            queries=1
+        )
+        self.assertEqual(response.body.count(b'\n'), WATCHLIST_SIZE + 1)
+
+    def test_watchlist_add_stock(self):
+        """Test adding a stock is a resolver miss, an insert, a read and the counter update"""
+        self.client.get('/api/watchlists/')
+        self.client.post('/api/watchlists/stocks/', {'stock_id': self.outside_ids[-1]}, format='json')
+
+        self.measure(
+            'POST /api/watchlists/stocks/',
+            lambda run: self.client.post('/api/watchlists/stocks/', {'stock_id': self.outside_ids[run]}, format='json'),
+            queries=6,
+        )
+
+    def test_watchlist_remove_stock(self):
+        """Test removing a stock is a fixed number of queries"""
+        stock_ids = list(
+            WatchlistStock.objects.filter(watchlist=self.watchlist).values_list('stock_id', flat=True)[:RUNS]
+        )
+        self.measure(
+            'DELETE /api/watchlists/stocks/<id>/',
+            lambda run: self.client.delete(f'/api/watchlists/stocks/{stock_ids[run]}/'),
+            queries=6
+        )
+
+    def test_watchlist_bulk_add(self):
+        """Test bulk add is a fixed number of queries for any list size"""
+        symbols = self.outside_symbols
+        chunk = len(symbols) // RUNS
+        self.measure(
+            'POST /api/watchlists/stocks/bulk/',
+            lambda run: self.client.post(
+                '/api/watchlists/stocks/bulk/',
+                {'symbols': symbols[run * chunk:(run + 1) * chunk]},
+                format='json'
+            ),
+            queries=8
+        )
+
+    def test_watchlist_bulk_remove(self):
+        """Test bulk remove is a fixed number of queries for any list size"""
+        stock_ids = list(
+            WatchlistStock.objects.filter(watchlist=self.watchlist).values_list('stock_id', flat=True)
+        )
+        chunk = max(1, len(stock_ids) // RUNS)
+        self.measure(
+            'DELETE /api/watchlists/stocks/bulk/',
+            lambda run: self.client.delete(
+                '/api/watchlists/stocks/bulk/',
+                {'stock_ids': stock_ids[run * chunk:(run + 1) * chunk]},
+                format='json'
+            ),
+            queries=6
+        )
+
+    # users/urls.py
+
+    @mock.patch('users.views.auth.verify_id_token')
+    def test_login_existing_user(self, verify):
+        """Test logging in an existing user is a single lookup"""
+        verify.return_value = {'uid': self.user.firebase_uid, 'email': self.user.email}
+        client = APIClient()
+        self.measure(
+            'POST /api/users/login/',
+            lambda run: client.post('/api/users/login/', {'idToken': 'token'}, format='json'),
+            queries=1
+        )
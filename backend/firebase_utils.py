@@ -1,41 +1,55 @@
 import firebase_admin
 from firebase_admin import credentials, auth
+import logging
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Required Firebase environment variables
 required_env_vars = [
     'FIREBASE_PROJECT_ID',
-    'FIREBASE_PRIVATE_KEY_ID', 
+    'FIREBASE_PRIVATE_KEY_ID',
     'FIREBASE_PRIVATE_KEY',
     'FIREBASE_CLIENT_EMAIL',
     'FIREBASE_CLIENT_ID',
     'FIREBASE_CLIENT_X509_CERT_URL'
 ]
 
-# Check if all required environment variables are present
-missing_vars = [var for var in required_env_vars if not os.getenv(var)]
-
-# Allow tests to run without Firebase if we're in a test environment
-is_testing = (
-    os.getenv('DJANGO_SETTINGS_MODULE', '').endswith('test') or
-    'test' in os.getenv('DATABASE_URL', '') or
-    os.getenv('TESTING', '').lower() == 'true'
-)
-
-if missing_vars and not is_testing:
-    raise EnvironmentError(f"Missing required Firebase environment variables: {', '.join(missing_vars)}")
-
-# Skip Firebase initialization if we're in testing mode and variables are missing
-if missing_vars and is_testing:
-    print("Skipping Firebase initialization in test environment - Firebase variables not set")
-    firebase_config = None
-    FIREBASE_STORAGE_BUCKET = None
-else:
+# Set once the Firebase app is initialized; None until then, and in test
+# environments without Firebase variables
+firebase_config = None
+FIREBASE_STORAGE_BUCKET = None
+
+_init_lock = threading.Lock()
+_init_attempted = False
+_init_error = None
+
+
+def is_testing():
+    return (
+        os.getenv('DJANGO_SETTINGS_MODULE', '').endswith('test') or
+        'test' in os.getenv('DATABASE_URL', '') or
+        os.getenv('TESTING', '').lower() == 'true'
+    )
+
+
+def load_config():
+    """Build the service account config from the environment, or None in tests without it"""
+    # Check if all required environment variables are present
+    missing_vars = [var for var in required_env_vars if not os.getenv(var)]
+
+    if missing_vars:
+        # Allow tests to run without Firebase if we're in a test environment
+        if is_testing():
+            return None
+        raise EnvironmentError(f"Missing required Firebase environment variables: {', '.join(missing_vars)}")
+
     # Get Firebase configuration from environment variables ONLY
-    firebase_config = {
+    return {
         "type": os.getenv('FIREBASE_TYPE', 'service_account'),
         "project_id": os.getenv('FIREBASE_PROJECT_ID'),
         "private_key_id": os.getenv('FIREBASE_PRIVATE_KEY_ID'),
@@ -49,23 +63,75 @@ else:
         "universe_domain": os.getenv('FIREBASE_UNIVERSE_DOMAIN', 'googleapis.com')
     }
 
-    FIREBASE_STORAGE_BUCKET = os.getenv('FIREBASE_STORAGE_BUCKET', 'stocksense-e7226.appspot.com')
 
-# Initialize Firebase app only once using ONLY environment variables
-if not firebase_admin._apps and firebase_config is not None:
+def initialize_firebase():
+    """
+    Initialize the Firebase app on first use; return whether it is configured.
+
+    Safe to call from many threads: one caller initializes, the rest wait.
+    A failed initialization is not retried and re-raises its error, so a
+    misconfigured worker fails every verification the same way.
+    """
+    global firebase_config, FIREBASE_STORAGE_BUCKET, _init_attempted, _init_error
+
+    if firebase_config is not None:
+        return True
+
+    with _init_lock:
+        if not _init_attempted:
+            _init_attempted = True
+            try:
+                config = load_config()
+                if config is None:
+                    logger.warning("Firebase not initialized - running in test mode")
+                else:
+                    bucket = os.getenv('FIREBASE_STORAGE_BUCKET', 'stocksense-e7226.appspot.com')
+                    if not firebase_admin._apps:
+                        firebase_admin.initialize_app(credentials.Certificate(config), {
+                            'projectId': config['project_id'],
+                            'storageBucket': bucket
+                        })
+                    FIREBASE_STORAGE_BUCKET = bucket
+                    # Published last: other threads treat it as "ready"
+                    firebase_config = config
+                    logger.info("Firebase initialized using environment variables")
+            except Exception as e:
+                _init_error = Exception(f"Failed to initialize Firebase using environment variables: {str(e)}")
+
+        if _init_error is not None:
+            raise _init_error
+        return firebase_config is not None
+
+
+def prefetch_signing_certs():
+    """Fetch Google's ID token signing certs into the verifier's HTTP cache"""
+    from firebase_admin import _token_gen
+
+    # verify_id_token reuses this client's cached session, so the first
+    # real verification finds the certs already cached
+    client = auth._get_client(firebase_admin.get_app())
+    client._token_verifier.request(_token_gen.ID_TOKEN_CERT_URI)
+
+
+def _warm_up():
     try:
-        cred = credentials.Certificate(firebase_config)
-        firebase_admin.initialize_app(cred, {
-            'projectId': firebase_config['project_id'],
-            'storageBucket': FIREBASE_STORAGE_BUCKET
-        })
-        print("✅ Firebase initialized successfully using environment variables")
-    except Exception as e:
-        if not is_testing:
-            raise Exception(f"Failed to initialize Firebase using environment variables: {str(e)}")
-        else:
-            print(f"⚠️  Firebase initialization failed in test environment: {str(e)}")
-elif firebase_config is None:
-    print("⚠️  Firebase not initialized - running in test mode")
+        if initialize_firebase():
+            prefetch_signing_certs()
+            logger.info("Firebase signing certs prefetched")
+    except Exception:
+        logger.exception("Firebase warm-up failed")
+
 
+def warm_up():
+    """
+    Initialize Firebase and prefetch signing certs in a background thread.
 
+    Called by the WSGI/ASGI entry points so a server worker is ready
+    before its first authenticated request; management commands and
+    tests never pay for it. Disable with FIREBASE_WARMUP=false.
+    """
+    if os.getenv('FIREBASE_WARMUP', 'true').lower() != 'true':
+        return None
+    thread = threading.Thread(target=_warm_up, name='firebase-warm-up', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,84 @@
+from rest_framework.exceptions import ValidationError
+
+
+# Exact-match facets; each accepts repeated values (?sector=A&sector=B)
+FACET_FIELDS = ['sector', 'industry', 'country']
+
+RANGE_FILTERS = {
+    'market_cap_min': 'market_cap__gte',
+    'market_cap_max': 'market_cap__lte',
+    'ipo_year_min': 'ipo_year__gte',
+    'ipo_year_max': 'ipo_year__lte',
+}
+
+# Each ordering ends in symbol, so it is total and cursor-paginates, and
+# matches the column order of one of the Stock indexes
+STOCK_ORDERINGS = {
+    'symbol': ('symbol',),
+    'market_cap': ('market_cap', 'symbol'),
+    '-market_cap': ('-market_cap', 'symbol'),
+    'ipo_year': ('ipo_year', 'symbol'),
+    '-ipo_year': ('-ipo_year', 'symbol'),
+}
+DEFAULT_ORDERING = 'symbol'
+
+
+def parse_stock_filters(params, exclude=None):
+    """
+    Turn screener query parameters into queryset filter kwargs.
+
+    `exclude` leaves one facet out, so its counts can be computed under
+    every other filter. Raises ValidationError for malformed ranges.
+    """
+    filters = {}
+    for field in FACET_FIELDS:
+        if field == exclude:
+            continue
+        values = [value.strip() for value in params.getlist(field) if value.strip()]
+        if len(values) == 1:
+            filters[field] = values[0]
+        elif values:
+            filters[f'{field}__in'] = values
+
+    for param, lookup in RANGE_FILTERS.items():
+        value = params.get(param, '').strip()
+        if not value:
+            continue
+        try:
+            filters[lookup] = int(value)
+        except ValueError:
+            raise ValidationError({param: 'A whole number is required.'})
+
+    return filters
+
+
+def get_stock_ordering(params):
+    ordering = params.get('ordering', DEFAULT_ORDERING)
+    if ordering not in STOCK_ORDERINGS:
+        raise ValidationError({
+            'ordering': f"Must be one of: {', '.join(STOCK_ORDERINGS)}."
+        })
+    return STOCK_ORDERINGS[ordering]
+
+
+class StockFilterBackend:
+    """
+    Filter and order the stock list from screener query parameters.
+
+    Ordering by a nullable column leaves out stocks where it is unknown:
+    they cannot be positioned by a cursor, and the database would
+    otherwise sort them first in descending order.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        queryset = queryset.filter(**parse_stock_filters(request.query_params))
+
+        column = ordering[0].lstrip('-')
+        if column != 'symbol':
+            queryset = queryset.filter(**{f'{column}__isnull': False})
+        return queryset.order_by(*ordering)
+
+    def get_ordering(self, request, queryset, view):
+        # Also read by CursorPagination, so pages follow the same order
+        return get_stock_ordering(request.query_params)
@@ -1,8 +1,39 @@
 import csv
 import os
+from itertools import islice
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import transaction
 from stocks.models import Stock
+from stocks.universe import bump_universe_version, suppress_universe_bumps
+
+
+SYMBOL_MAX_LENGTH = Stock._meta.get_field('symbol').max_length
+
+# Stock fields loaded from each screener row, by CSV column
+TEXT_COLUMNS = {
+    'name': 'Name',
+    'sector': 'Sector',
+    'industry': 'Industry',
+    'country': 'Country',
+}
+LOADED_FIELDS = list(TEXT_COLUMNS) + ['market_cap', 'ipo_year']
+
+
+def parse_market_cap(value):
+    """Whole dollars from the screener's "123456.78" market cap; 0 means unknown"""
+    try:
+        market_cap = int(float((value or '').replace(',', '').lstrip('$')))
+    except ValueError:
+        return None
+    return market_cap if market_cap > 0 else None
+
+
+def parse_ipo_year(value):
+    try:
+        return int((value or '').strip()) or None
+    except ValueError:
+        return None
 
 
 class Command(BaseCommand):
@@ -20,88 +51,191 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing stocks before loading new ones'
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of CSV rows upserted per transaction'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show which stocks would be created or updated without writing'
+        )
+
+    def parse_row(self, row):
+        """Return (symbol, {field: value}) for a CSV row, or None to skip it"""
+        symbol = (row.get('Symbol') or '').strip().upper()
+        values = {
+            field: (row.get(column) or '').strip()
+            for field, column in TEXT_COLUMNS.items()
+        }
+
+        # Skip empty rows
+        if not symbol or not values['name']:
+            return None
+
+        too_long = len(symbol) > SYMBOL_MAX_LENGTH or any(
+            len(value) > Stock._meta.get_field(field).max_length
+            for field, value in values.items()
+        )
+        if too_long:
+            self.error_count += 1
+            self.stdout.write(
+                self.style.ERROR(f'Error processing {symbol}: value too long')
+            )
+            return None
+
+        values['market_cap'] = parse_market_cap(row.get('Market Cap'))
+        values['ipo_year'] = parse_ipo_year(row.get('IPO Year'))
+        return symbol, values
+
+    def read_chunks(self, file, chunk_size):
+        """Yield chunks of {symbol: {field: value}} from the CSV, skipping invalid rows"""
+        reader = csv.DictReader(file)
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+
+            chunk = {}
+            for row in rows:
+                parsed = self.parse_row(row)
+                if parsed is not None:
+                    # Later rows win if a symbol repeats within the chunk
+                    symbol, values = parsed
+                    chunk[symbol] = values
+
+            yield len(rows), chunk
+
+    def describe_changes(self, old, new):
+        """Renames as "old -> new", other changed fields as "field: old -> new" """
+        changes = [] if old['name'] == new['name'] else [f"{old['name']} -> {new['name']}"]
+        changes.extend(
+            f'{field}: {old[field] or "-"} -> {new[field] or "-"}'
+            for field in LOADED_FIELDS
+            if field != 'name' and old[field] != new[field]
+        )
+        return ', '.join(changes)
+
+    def upsert_chunk(self, chunk, dry_run):
+        """Create new and update changed stocks in one statement; return (created, updated)"""
+        existing = {
+            symbol: dict(zip(LOADED_FIELDS, values))
+            for symbol, *values in Stock.objects.filter(
+                symbol__in=list(chunk)
+            ).values_list('symbol', *LOADED_FIELDS)
+        }
+
+        created = [symbol for symbol in chunk if symbol not in existing]
+        updated = [
+            symbol for symbol in chunk
+            if symbol in existing and existing[symbol] != chunk[symbol]
+        ]
+
+        if dry_run:
+            for symbol in created:
+                self.stdout.write(f'+ {symbol} - {chunk[symbol]["name"]}')
+            for symbol in updated:
+                self.stdout.write(f'~ {symbol} - {self.describe_changes(existing[symbol], chunk[symbol])}')
+            return len(created), len(updated)
+
+        changed = created + updated
+        if changed:
+            with transaction.atomic():
+                Stock.objects.bulk_create(
+                    [Stock(symbol=symbol, **chunk[symbol]) for symbol in changed],
+                    update_conflicts=True,
+                    unique_fields=['symbol'],
+                    update_fields=LOADED_FIELDS
+                )
+
+        return len(created), len(updated)
 
     def handle(self, *args, **options):
         csv_file = options['csv_file']
-        
+        dry_run = options['dry_run']
+        chunk_size = max(1, options['chunk_size'])
+
         # If it's not an absolute path, assume it's in the project root
         if not os.path.isabs(csv_file):
             project_root = settings.BASE_DIR.parent  # Go up from backend/ to project root
             csv_file = os.path.join(project_root, csv_file)
-        
+
         if not os.path.exists(csv_file):
             self.stdout.write(
                 self.style.ERROR(f'CSV file not found: {csv_file}')
             )
             return
-        
+
         # Clear existing stocks if requested
         if options['clear']:
             count = Stock.objects.count()
-            Stock.objects.all().delete()
-            self.stdout.write(
-                self.style.WARNING(f'Cleared {count} existing stocks')
-            )
-        
+            if dry_run:
+                self.stdout.write(
+                    self.style.WARNING(f'Would clear {count} existing stocks')
+                )
+            else:
+                # One bump after the load instead of one per deleted row
+                with suppress_universe_bumps():
+                    Stock.objects.all().delete()
+                self.stdout.write(
+                    self.style.WARNING(f'Cleared {count} existing stocks')
+                )
+
         # Load stocks from CSV
         created_count = 0
         updated_count = 0
-        error_count = 0
-        
+        processed_count = 0
+        self.error_count = 0
+
         try:
             with open(csv_file, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                
-                for row in reader:
-                    symbol = row['Symbol'].strip().upper()
-                    name = row['Name'].strip()
-                    
-                    # Skip empty rows
-                    if not symbol or not name:
-                        continue
-                    
+                for row_count, chunk in self.read_chunks(file, chunk_size):
                     try:
-                        # Use get_or_create to avoid duplicates
-                        stock, created = Stock.objects.get_or_create(
-                            symbol=symbol,
-                            defaults={'name': name}
-                        )
-                        
-                        if created:
-                            created_count += 1
-                            self.stdout.write(f'Created: {symbol} - {name}')
-                        else:
-                            # Update name if stock exists but name is different
-                            if stock.name != name:
-                                stock.name = name
-                                stock.save()
-                                updated_count += 1
-                                self.stdout.write(f'Updated: {symbol} - {name}')
-                    
+                        created, updated = self.upsert_chunk(chunk, dry_run)
+                        created_count += created
+                        updated_count += updated
                     except Exception as e:
-                        error_count += 1
+                        self.error_count += len(chunk)
                         self.stdout.write(
-                            self.style.ERROR(f'Error processing {symbol}: {str(e)}')
+                            self.style.ERROR(f'Error processing chunk: {str(e)}')
                         )
-        
+
+                    processed_count += row_count
+                    if options['verbosity'] >= 1 and not dry_run:
+                        self.stdout.write(f'Processed {processed_count} rows...')
+
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'Error reading CSV file: {str(e)}')
             )
             return
-        
+
+        finally:
+            # bulk_create bypasses model signals, so invalidate explicitly
+            if not dry_run and (created_count or updated_count or options['clear']):
+                bump_universe_version()
+
         # Summary
         self.stdout.write('\n' + '='*50)
-        self.stdout.write(
-            self.style.SUCCESS(f'Successfully processed CSV file: {csv_file}')
-        )
-        self.stdout.write(f'Stocks created: {created_count}')
-        self.stdout.write(f'Stocks updated: {updated_count}')
-        if error_count > 0:
+        if dry_run:
             self.stdout.write(
-                self.style.WARNING(f'Errors encountered: {error_count}')
+                self.style.SUCCESS(f'Dry run, no changes written: {csv_file}')
             )
-        
+            self.stdout.write(f'Stocks to create: {created_count}')
+            self.stdout.write(f'Stocks to update: {updated_count}')
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f'Successfully processed CSV file: {csv_file}')
+            )
+            self.stdout.write(f'Stocks created: {created_count}')
+            self.stdout.write(f'Stocks updated: {updated_count}')
+        if self.error_count > 0:
+            self.stdout.write(
+                self.style.WARNING(f'Errors encountered: {self.error_count}')
+            )
+
         total_stocks = Stock.objects.count()
         self.stdout.write(f'Total stocks in database: {total_stocks}')
         self.stdout.write('='*50)
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from stocks.models import Stock
+from watchlists.models import WatchlistStock
+
+
+class Command(BaseCommand):
+    help = 'Recompute Stock.watcher_count from watchlist entries and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Width of each stock id range recounted per transaction'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report stocks with a wrong count without fixing them'
+        )
+
+    def reconcile_range(self, low, high, dry_run):
+        """Fix counts for stock ids in [low, high); return the stocks that drifted"""
+        actual = dict(
+            WatchlistStock.objects.filter(stock_id__gte=low, stock_id__lt=high)
+            .order_by().values('stock_id').annotate(total=Count('id'))
+            .values_list('stock_id', 'total')
+        )
+        drifted = [
+            Stock(id=stock_id, watcher_count=actual.get(stock_id, 0))
+            for stock_id, stored in Stock.objects.filter(id__gte=low, id__lt=high)
+            .values_list('id', 'watcher_count')
+            if stored != actual.get(stock_id, 0)
+        ]
+
+        if drifted and not dry_run:
+            with transaction.atomic():
+                Stock.objects.bulk_update(drifted, ['watcher_count'])
+        return drifted
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        dry_run = options['dry_run']
+
+        bounds = Stock.objects.aggregate(low=Min('id'), high=Max('id'))
+        drift_count = 0
+
+        if bounds['low'] is not None:
+            for low in range(bounds['low'], bounds['high'] + 1, chunk_size):
+                drifted = self.reconcile_range(low, low + chunk_size, dry_run)
+                drift_count += len(drifted)
+                if options['verbosity'] >= 2:
+                    for stock in drifted:
+                        self.stdout.write(f'~ {stock.id} -> {stock.watcher_count}')
+
+        # Summary
+        self.stdout.write('\n' + '='*50)
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS('Dry run, no counts changed'))
+            self.stdout.write(f'Stocks with a wrong watcher count: {drift_count}')
+        else:
+            self.stdout.write(self.style.SUCCESS('Watcher counts reconciled'))
+            self.stdout.write(f'Stocks corrected: {drift_count}')
+        self.stdout.write('='*50)
@@ -0,0 +1,138 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from stocks.models import Stock, QuoteSnapshot
+from stocks.quotes import (
+    QUOTABLE_SYMBOL_RE,
+    QUOTE_BATCH_SIZE,
+    QuoteServiceError,
+    cache_quotes,
+    fetch_quotes
+)
+
+
+SNAPSHOT_FIELDS = [
+    'last_price', 'previous_close', 'change', 'change_percent',
+    'volume', 'as_of', 'updated_at'
+]
+
+
+def parse_as_of(value):
+    """Parse the AI service's ISO timestamp, which may be a bare date"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.get_default_timezone())
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Refresh quote snapshots for watched stocks from the AI service in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=QUOTE_BATCH_SIZE,
+            help=f'Symbols fetched and written per batch (at most {QUOTE_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Refresh every stock, not only stocks on a watchlist'
+        )
+
+    def get_symbols(self, refresh_all):
+        """Return [(stock_id, symbol)] for the stocks to refresh"""
+        stocks = Stock.objects.all()
+        if not refresh_all:
+            stocks = stocks.filter(watchliststock__isnull=False).distinct()
+
+        return [
+            (stock_id, symbol)
+            for stock_id, symbol in stocks.order_by('symbol').values_list('id', 'symbol')
+            if QUOTABLE_SYMBOL_RE.match(symbol)
+        ]
+
+    def write_batch(self, batch, quotes):
+        """Update existing snapshots and create missing ones; return (updated, created)"""
+        now = timezone.now()
+        snapshots = [
+            QuoteSnapshot(
+                stock_id=stock_id,
+                last_price=quotes[symbol]['price'],
+                previous_close=quotes[symbol].get('previous_close'),
+                change=quotes[symbol].get('change'),
+                change_percent=quotes[symbol].get('change_percent'),
+                volume=quotes[symbol].get('volume'),
+                as_of=parse_as_of(quotes[symbol].get('as_of')),
+                updated_at=now
+            )
+            for stock_id, symbol in batch if symbol in quotes
+        ]
+
+        existing = set(
+            QuoteSnapshot.objects.filter(
+                stock_id__in=[snapshot.stock_id for snapshot in snapshots]
+            ).values_list('stock_id', flat=True)
+        )
+        to_update = [snapshot for snapshot in snapshots if snapshot.stock_id in existing]
+        to_create = [snapshot for snapshot in snapshots if snapshot.stock_id not in existing]
+
+        with transaction.atomic():
+            QuoteSnapshot.objects.bulk_update(to_update, SNAPSHOT_FIELDS)
+            QuoteSnapshot.objects.bulk_create(to_create)
+
+        return len(to_update), len(to_create)
+
+    def handle(self, *args, **options):
+        batch_size = max(1, min(options['batch_size'], QUOTE_BATCH_SIZE))
+        symbols = self.get_symbols(options['all'])
+
+        updated_count = 0
+        created_count = 0
+        unpriced_count = 0
+        error_count = 0
+
+        for start in range(0, len(symbols), batch_size):
+            batch = symbols[start:start + batch_size]
+            batch_symbols = [symbol for _, symbol in batch]
+
+            try:
+                quotes = fetch_quotes(batch_symbols)
+            except QuoteServiceError as e:
+                error_count += len(batch)
+                self.stdout.write(self.style.ERROR(f'Error fetching batch: {str(e)}'))
+                continue
+
+            # The request path reads the shared cache, so warm it too
+            cache_quotes(batch_symbols, quotes)
+
+            updated, created = self.write_batch(batch, quotes)
+            updated_count += updated
+            created_count += created
+            unpriced_count += len(batch) - updated - created
+
+            if options['verbosity'] >= 1:
+                self.stdout.write(f'Processed {start + len(batch)} of {len(symbols)} symbols...')
+
+        # Summary
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(self.style.SUCCESS('Quote snapshots refreshed'))
+        self.stdout.write(f'Snapshots updated: {updated_count}')
+        self.stdout.write(f'Snapshots created: {created_count}')
+        self.stdout.write(f'Symbols without a quote: {unpriced_count}')
+        if error_count > 0:
+            self.stdout.write(
+                self.style.WARNING(f'Symbols not refreshed due to errors: {error_count}')
+            )
+        self.stdout.write('='*50)
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:28
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuoteSnapshot',
+            fields=[
+                ('stock', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='quote', serialize=False, to='stocks.stock')),
+                ('last_price', models.FloatField()),
+                ('previous_close', models.FloatField(blank=True, null=True)),
+                ('change', models.FloatField(blank=True, null=True)),
+                ('change_percent', models.FloatField(blank=True, null=True)),
+                ('volume', models.BigIntegerField(blank=True, null=True)),
+                ('as_of', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
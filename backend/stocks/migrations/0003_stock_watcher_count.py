@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:33
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_watcher_counts(apps, schema_editor):
+    Stock = apps.get_model('stocks', 'Stock')
+    WatchlistStock = apps.get_model('watchlists', 'WatchlistStock')
+
+    counts = WatchlistStock.objects.filter(
+        stock_id=OuterRef('pk')
+    ).order_by().values('stock_id').annotate(total=Count('id')).values('total')
+    Stock.objects.update(
+        watcher_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0002_quotesnapshot'),
+        ('watchlists', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='watcher_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['-watcher_count', 'symbol'], name='stock_popularity_idx'),
+        ),
+        migrations.RunPython(backfill_watcher_counts, migrations.RunPython.noop),
+    ]
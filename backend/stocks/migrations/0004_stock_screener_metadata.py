@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0003_stock_watcher_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='country',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='industry',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='ipo_year',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='market_cap',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='sector',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['sector', 'industry', 'symbol'], name='stock_sector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['country', 'sector', 'symbol'], name='stock_country_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['sector', '-market_cap', 'symbol'], name='stock_sector_cap_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['-market_cap', 'symbol'], name='stock_market_cap_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['ipo_year', 'symbol'], name='stock_ipo_year_idx'),
+        ),
+    ]
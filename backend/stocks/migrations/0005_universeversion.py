@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 08:49
+
+import uuid
+
+from django.db import migrations, models
+
+
+def create_universe_version(apps, schema_editor):
+    UniverseVersion = apps.get_model('stocks', 'UniverseVersion')
+    UniverseVersion.objects.get_or_create(pk=1, defaults={'token': uuid.uuid4().hex})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0004_stock_screener_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UniverseVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32)),
+            ],
+        ),
+        migrations.RunPython(create_universe_version, migrations.RunPython.noop),
+    ]
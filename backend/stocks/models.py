@@ -1,10 +1,75 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+
+class StockQuerySet(models.QuerySet):
+    def adjust_watcher_count(self, delta):
+        """Atomically add delta to each stock's watcher count, never going below zero"""
+        return self.update(watcher_count=Greatest(F('watcher_count') + delta, 0))
+
+    def popular(self):
+        """Watched stocks, most watched first (served by stock_popularity_idx)"""
+        return self.filter(watcher_count__gt=0).order_by('-watcher_count', 'symbol')
+
 
 # Create your models here.
 class Stock(models.Model):
     symbol = models.CharField(max_length=10, unique=True, db_index=True)
     name = models.CharField(max_length=200)
-    
-        
+    # Number of watchlists containing the stock, maintained by the watchlist
+    # add/remove paths; reconcile_watcher_counts repairs any drift
+    watcher_count = models.PositiveIntegerField(default=0)
+    # Screener metadata populated by load_stocks; blank or null when unknown
+    sector = models.CharField(max_length=100, blank=True, default='')
+    industry = models.CharField(max_length=100, blank=True, default='')
+    country = models.CharField(max_length=100, blank=True, default='')
+    market_cap = models.BigIntegerField(null=True, blank=True)
+    ipo_year = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    objects = StockQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-watcher_count', 'symbol'], name='stock_popularity_idx'),
+            # Screener filters and orderings (see stocks.filters); facet
+            # counts group on the leading columns without reading the table
+            models.Index(fields=['sector', 'industry', 'symbol'], name='stock_sector_idx'),
+            models.Index(fields=['country', 'sector', 'symbol'], name='stock_country_idx'),
+            models.Index(fields=['sector', '-market_cap', 'symbol'], name='stock_sector_cap_idx'),
+            models.Index(fields=['-market_cap', 'symbol'], name='stock_market_cap_idx'),
+            models.Index(fields=['ipo_year', 'symbol'], name='stock_ipo_year_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.symbol} - {self.name}"
+
+
+class QuoteSnapshot(models.Model):
+    """Latest quote for a stock, refreshed in bulk by the refresh_quotes command"""
+    # Keyed by the stock, so joining prices onto a stock listing is a primary-key lookup
+    stock = models.OneToOneField(Stock, on_delete=models.CASCADE, primary_key=True, related_name='quote')
+    last_price = models.FloatField()
+    previous_close = models.FloatField(null=True, blank=True)
+    change = models.FloatField(null=True, blank=True)
+    change_percent = models.FloatField(null=True, blank=True)
+    volume = models.BigIntegerField(null=True, blank=True)
+    as_of = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.stock_id} @ {self.last_price}"
+
+
+class UniverseVersion(models.Model):
+    """
+    Single row whose token changes whenever Stock rows change (see stocks.universe).
+
+    Kept in the database so a bump from any process, including management
+    commands, reaches every worker.
+    """
+    token = models.CharField(max_length=32)
+
     def __str__(self):
-        return f"{self.symbol} - {self.name}"
\ No newline at end of file
+        return self.token
@@ -0,0 +1,94 @@
+import json
+import logging
+from urllib.error import URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .quotes import QUOTABLE_SYMBOL_RE
+
+
+logger = logging.getLogger(__name__)
+
+# The AI service rejects larger batches
+NEWS_BATCH_SIZE = 100
+
+
+class NewsServiceError(Exception):
+    """The AI service could not be reached or returned an error"""
+
+
+def _news_key(symbol):
+    return f'news:{symbol}'
+
+
+def fetch_news(stocks):
+    """
+    Fetch recent headlines from the AI service, one request per batch.
+
+    `stocks` is a list of (symbol, company name); names let the service
+    match articles that never mention the ticker. Returns
+    ({symbol: [headline, ...]}, failed symbols).
+    """
+    news = {}
+    failed = []
+    for start in range(0, len(stocks), NEWS_BATCH_SIZE):
+        batch = stocks[start:start + NEWS_BATCH_SIZE]
+        query = urlencode({
+            'tickers': ','.join(symbol for symbol, _ in batch),
+            'name': [f'{symbol}:{name}' for symbol, name in batch if name]
+        }, doseq=True)
+        url = f"{settings.AI_SERVICE_URL.rstrip('/')}/news?{query}"
+        try:
+            with urlopen(url, timeout=settings.NEWS_FETCH_TIMEOUT) as response:
+                payload = json.load(response)
+        except (URLError, OSError, ValueError) as e:
+            raise NewsServiceError(f"News request failed: {e}") from e
+
+        news.update(payload.get('news') or {})
+        failed.extend(payload.get('failed') or [])
+    return news, failed
+
+
+def get_latest_news(stocks):
+    """
+    Return ({symbol: [headline, ...]}, degraded) for (symbol, name) pairs.
+
+    Headlines are cached per symbol for NEWS_CACHE_TTL seconds and shared
+    by every user watching the stock; only the misses are fetched, in one
+    call. Symbols the service failed to search are not cached, and
+    `degraded` is True if there were any or the service was down.
+    """
+    stocks = list({symbol.upper(): name for symbol, name in stocks}.items())
+    cached = cache.get_many([_news_key(symbol) for symbol, _ in stocks])
+
+    news = {}
+    missing = []
+    for symbol, name in stocks:
+        headlines = cached.get(_news_key(symbol))
+        if headlines is not None:
+            news[symbol] = headlines
+        elif QUOTABLE_SYMBOL_RE.match(symbol):
+            missing.append((symbol, name))
+
+    if not missing:
+        return news, False
+
+    try:
+        fetched, failed = fetch_news(missing)
+    except NewsServiceError as e:
+        logger.warning("Serving cached news only: %s", e)
+        return news, True
+
+    failed = set(failed)
+    cache.set_many(
+        {
+            _news_key(symbol): fetched.get(symbol, [])
+            for symbol, _ in missing if symbol not in failed
+        },
+        timeout=settings.NEWS_CACHE_TTL
+    )
+    news.update((symbol, fetched.get(symbol, [])) for symbol, _ in missing)
+    return news, bool(failed)
@@ -0,0 +1,15 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class StockCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the stock universe ordered by symbol.
+
+    Symbols are unique, so cursors stay stable while stocks are inserted
+    or removed between page requests.
+    """
+    ordering = 'symbol'
+    page_size = settings.STOCK_LIST_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.STOCK_LIST_MAX_PAGE_SIZE
@@ -0,0 +1,155 @@
+import json
+import logging
+import re
+from datetime import timedelta
+from urllib.error import URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+# The AI service rejects larger batches
+QUOTE_BATCH_SIZE = 200
+
+# Same format check as the AI service; other symbols are never sent upstream
+QUOTABLE_SYMBOL_RE = re.compile(r'^[A-Z][A-Z.\-]{0,9}$')
+
+# Cached for symbols the upstream could not price, so they are not refetched
+NO_QUOTE = {}
+
+
+class QuoteServiceError(Exception):
+    """The AI service could not be reached or returned an error"""
+
+
+def _quote_key(symbol):
+    return f'quote:{symbol}'
+
+
+def fetch_quotes(symbols):
+    """
+    Fetch latest quotes from the AI service, one request per batch.
+
+    Returns {symbol: quote} for the symbols the service could price.
+    """
+    quotes = {}
+    for start in range(0, len(symbols), QUOTE_BATCH_SIZE):
+        batch = symbols[start:start + QUOTE_BATCH_SIZE]
+        url = f"{settings.AI_SERVICE_URL.rstrip('/')}/quotes?{urlencode({'tickers': ','.join(batch)})}"
+        try:
+            with urlopen(url, timeout=settings.QUOTE_FETCH_TIMEOUT) as response:
+                payload = json.load(response)
+        except (URLError, OSError, ValueError) as e:
+            raise QuoteServiceError(f"Quote request failed: {e}") from e
+
+        quotes.update(payload.get('quotes') or {})
+    return quotes
+
+
+def cache_quotes(symbols, fetched):
+    """Share freshly fetched quotes; symbols without one are cached as unpriced"""
+    cache.set_many(
+        {_quote_key(symbol): fetched.get(symbol, NO_QUOTE) for symbol in symbols},
+        timeout=settings.QUOTE_CACHE_TTL
+    )
+
+
+def snapshot_quotes(stocks):
+    """
+    Return {symbol: quote} from the QuoteSnapshot of each stock.
+
+    `stocks` should be loaded with select_related('quote'). Stocks without
+    a snapshot, or whose snapshot is older than QUOTE_SNAPSHOT_MAX_AGE,
+    are left out. Quotes have the same shape as the AI service's.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.QUOTE_SNAPSHOT_MAX_AGE)
+    quotes = {}
+    for stock in stocks:
+        snapshot = getattr(stock, 'quote', None)
+        if snapshot is None or snapshot.updated_at < cutoff:
+            continue
+        quotes[stock.symbol] = {
+            'price': snapshot.last_price,
+            'previous_close': snapshot.previous_close,
+            'change': snapshot.change,
+            'change_percent': snapshot.change_percent,
+            'volume': snapshot.volume,
+            'as_of': snapshot.as_of.isoformat() if snapshot.as_of else None,
+        }
+    return quotes
+
+
+def get_cached_quotes(symbols):
+    """
+    Return ({symbol: quote}, missing) from the shared cache.
+
+    `missing` lists the cache misses worth fetching; symbols the AI
+    service would reject are never in it.
+    """
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+    cached = cache.get_many([_quote_key(symbol) for symbol in symbols])
+
+    quotes = {}
+    missing = []
+    for symbol in symbols:
+        quote = cached.get(_quote_key(symbol))
+        if quote is None:
+            if QUOTABLE_SYMBOL_RE.match(symbol):
+                missing.append(symbol)
+        elif quote:
+            quotes[symbol] = quote
+    return quotes, missing
+
+
+def load_missing_quotes(missing, snapshots=None):
+    """
+    Return ({symbol: quote}, degraded) for cache misses.
+
+    Fresh `snapshots` (from snapshot_quotes) are used as they are; only
+    the rest are fetched, in a single batched call. Both are cached. If
+    the AI service is down `degraded` is True.
+    """
+    snapshots = {symbol: snapshots[symbol] for symbol in missing if symbol in (snapshots or {})}
+    if snapshots:
+        cache.set_many(
+            {_quote_key(symbol): quote for symbol, quote in snapshots.items()},
+            timeout=settings.QUOTE_CACHE_TTL
+        )
+
+    to_fetch = [symbol for symbol in missing if symbol not in snapshots]
+    if not to_fetch:
+        return snapshots, False
+
+    try:
+        fetched = fetch_quotes(to_fetch)
+    except QuoteServiceError as e:
+        logger.warning("Serving cached quotes only: %s", e)
+        return snapshots, True
+
+    cache_quotes(to_fetch, fetched)
+    quotes = dict(snapshots)
+    quotes.update((symbol, fetched[symbol]) for symbol in to_fetch if symbol in fetched)
+    return quotes, False
+
+
+def get_latest_quotes(symbols):
+    """
+    Return ({symbol: quote}, degraded) for the given symbols.
+
+    Quotes are cached per symbol for QUOTE_CACHE_TTL seconds, so users
+    watching the same stocks share one upstream fetch. Only the cache
+    misses are fetched, in a single batched call. If the AI service is
+    down the cached quotes are returned and `degraded` is True.
+    """
+    quotes, missing = get_cached_quotes(symbols)
+    if not missing:
+        return quotes, False
+
+    fetched, degraded = load_missing_quotes(missing)
+    quotes.update(fetched)
+    return quotes, degraded
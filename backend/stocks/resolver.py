@@ -0,0 +1,68 @@
+import threading
+
+from .models import Stock
+from .universe import get_universe_version
+
+
+RESOLVER_FIELDS = ('id', 'symbol', 'name')
+
+
+class StockResolver:
+    """
+    Process-local cache of stock rows keyed by symbol and by id.
+
+    Rows are loaded on demand, all misses of a call in one query, and the
+    whole cache is dropped when the stock universe version changes.
+    Unknown symbols are not remembered, so newly created stocks resolve
+    on the next call.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.by_symbol = {}
+        self.by_id = {}
+        self._lock = threading.Lock()
+
+    def _check_version(self):
+        version = get_universe_version()
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self.by_symbol = {}
+                    self.by_id = {}
+                    self.version = version
+
+    def _remember(self, rows):
+        for row in rows:
+            self.by_symbol[row['symbol']] = row
+            self.by_id[row['id']] = row
+
+    def get_by_symbols(self, symbols):
+        """Return {symbol: row} for the known symbols among `symbols`"""
+        self._check_version()
+        symbols = {symbol.strip().upper() for symbol in symbols if symbol and symbol.strip()}
+
+        missing = [symbol for symbol in symbols if symbol not in self.by_symbol]
+        if missing:
+            self._remember(Stock.objects.filter(symbol__in=missing).values(*RESOLVER_FIELDS))
+
+        return {symbol: self.by_symbol[symbol] for symbol in symbols if symbol in self.by_symbol}
+
+    def get_by_ids(self, stock_ids):
+        """Return {id: row} for the known ids among `stock_ids`"""
+        self._check_version()
+        stock_ids = set(stock_ids)
+
+        missing = [stock_id for stock_id in stock_ids if stock_id not in self.by_id]
+        if missing:
+            self._remember(Stock.objects.filter(id__in=missing).values(*RESOLVER_FIELDS))
+
+        return {stock_id: self.by_id[stock_id] for stock_id in stock_ids if stock_id in self.by_id}
+
+    def resolve_symbol(self, symbol):
+        """Return the stock id for a symbol, or None if it does not exist"""
+        row = self.get_by_symbols([symbol]).get(symbol.strip().upper())
+        return row['id'] if row else None
+
+
+stock_resolver = StockResolver()
@@ -0,0 +1,181 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+
+from .models import Stock
+from .universe import get_universe_version, aget_universe_version
+
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class StockSearchIndex:
+    """
+    Immutable in-memory index over the stock universe.
+
+    Holds sorted symbol and name-word lists for prefix lookups via bisect,
+    and a trigram posting list for substring matches.
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.stocks = {}
+        self.symbol_ids = {}
+        self.symbols = []
+        self.name_words = []
+        self.trigrams = defaultdict(set)
+
+        for stock_id, symbol, name in rows:
+            symbol_key = symbol.upper()
+            name_key = name.lower()
+
+            self.stocks[stock_id] = (symbol, name, symbol_key.lower(), name_key)
+            self.symbol_ids[symbol_key] = stock_id
+            self.symbols.append((symbol_key, stock_id))
+
+            for word in set(WORD_RE.findall(name_key)):
+                self.name_words.append((word, stock_id))
+
+            for trigram in _trigrams(symbol_key.lower()) | _trigrams(name_key):
+                self.trigrams[trigram].add(stock_id)
+
+        self.symbols.sort()
+        self.name_words.sort()
+
+        # Tie-break within a rank: shorter symbols first, then alphabetical
+        self.by_order = sorted(self.stocks, key=lambda i: (len(self.stocks[i][0]), self.stocks[i][0]))
+        self.order = {stock_id: position for position, stock_id in enumerate(self.by_order)}
+
+    @classmethod
+    def build(cls):
+        version = get_universe_version()
+        rows = Stock.objects.values_list('id', 'symbol', 'name').iterator(chunk_size=2000)
+        return cls(rows, version=version)
+
+    @staticmethod
+    def _prefix_range(entries, prefix):
+        start = bisect.bisect_left(entries, (prefix,))
+        end = bisect.bisect_left(entries, (prefix + '\uffff',))
+        return entries[start:end]
+
+    def _substring_matches(self, needle):
+        """Yield ids whose symbol or name contains needle, in tie-break order"""
+        if len(needle) < 3:
+            candidates = None
+        else:
+            postings = sorted((self.trigrams.get(t, set()) for t in _trigrams(needle)), key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    return
+
+        # Walking the global order lets the caller stop after `limit` hits
+        if candidates is None or len(candidates) * 8 > len(self.by_order):
+            ordered = self.by_order
+        else:
+            ordered = sorted(candidates, key=self.order.__getitem__)
+
+        for stock_id in ordered:
+            if candidates is not None and stock_id not in candidates:
+                continue
+            _, _, symbol_key, name_key = self.stocks[stock_id]
+            if needle in symbol_key or needle in name_key:
+                yield stock_id
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Return up to limit (id, symbol, name) tuples ranked by relevance:
+        exact symbol, symbol prefix, name-word prefix, then substring.
+        """
+        query = query.strip()
+        if not query or limit < 1:
+            return []
+
+        symbol_query = query.upper()
+        text_query = query.lower()
+        found = []
+        seen = set()
+
+        def take(stock_ids):
+            fresh = set(stock_ids) - seen
+            for stock_id in heapq.nsmallest(limit - len(found), fresh, key=self.order.__getitem__):
+                seen.add(stock_id)
+                found.append(stock_id)
+            return len(found) >= limit
+
+        query_words = WORD_RE.findall(text_query)
+
+        # Lower tiers are only evaluated while there is room left
+        if symbol_query in self.symbol_ids and take([self.symbol_ids[symbol_query]]):
+            return self._rows(found)
+
+        if take(stock_id for _, stock_id in self._prefix_range(self.symbols, symbol_query)):
+            return self._rows(found)
+
+        if len(query_words) == 1:
+            if take(stock_id for _, stock_id in self._prefix_range(self.name_words, query_words[0])):
+                return self._rows(found)
+
+        for stock_id in self._substring_matches(text_query):
+            if stock_id not in seen:
+                seen.add(stock_id)
+                found.append(stock_id)
+                if len(found) >= limit:
+                    break
+
+        return self._rows(found)
+
+    def _rows(self, stock_ids):
+        return [(stock_id, self.stocks[stock_id][0], self.stocks[stock_id][1]) for stock_id in stock_ids]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """Return the process-wide index, rebuilding it if the stock table changed."""
+    global _index
+
+    version = get_universe_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = StockSearchIndex.build()
+        return _index
+
+
+def search_stocks(query, limit=DEFAULT_SEARCH_LIMIT):
+    """Ranked stock search as unsaved Stock instances, without touching the database"""
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+    return [
+        Stock(id=stock_id, symbol=symbol, name=name)
+        for stock_id, symbol, name in get_search_index().search(query, limit)
+    ]
+
+
+async def asearch_stocks(query, limit=DEFAULT_SEARCH_LIMIT):
+    """Async search_stocks; only an index rebuild leaves the event loop"""
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+    index = _index
+    if index is None or index.version != await aget_universe_version():
+        index = await sync_to_async(get_search_index)()
+    return [
+        Stock(id=stock_id, symbol=symbol, name=name)
+        for stock_id, symbol, name in index.search(query, limit)
+    ]
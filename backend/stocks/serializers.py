@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from backend.profiling import ProfiledSerializerMixin
 from .models import Stock
 
 
-class StockSerializer(serializers.ModelSerializer):
+class StockSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Stock
         fields = ['id', 'symbol', 'name']
@@ -11,3 +12,16 @@ class StockSerializer(serializers.ModelSerializer):
         # Ensure symbol is uppercase
         validated_data['symbol'] = validated_data['symbol'].upper()
         return super().create(validated_data)
+
+
+class PopularStockSerializer(StockSerializer):
+    class Meta(StockSerializer.Meta):
+        fields = StockSerializer.Meta.fields + ['watcher_count']
+        read_only_fields = ['watcher_count']
+
+
+class ScreenerStockSerializer(StockSerializer):
+    class Meta(StockSerializer.Meta):
+        fields = StockSerializer.Meta.fields + [
+            'sector', 'industry', 'country', 'market_cap', 'ipo_year'
+        ]
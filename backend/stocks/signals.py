@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Stock
+from .universe import bump_universe_version, universe_bumps_suppressed
+
+
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+def stock_changed(sender, **kwargs):
+    """Invalidate structures built from the stock table on any row change"""
+    if not universe_bumps_suppressed():
+        bump_universe_version()
@@ -0,0 +1,70 @@
+import gzip
+import hashlib
+import json
+import threading
+
+from .models import Stock
+from .universe import get_universe_version
+
+
+SNAPSHOT_FIELDS = ['id', 'symbol', 'name']
+
+
+class UniverseSnapshot:
+    """
+    The whole stock universe as a compact JSON array, precompressed.
+
+    The payload is {"version", "fields", "stocks": [[id, symbol, name], ...]}
+    ordered by symbol. `version` is a hash of the rows, so every worker
+    that builds the same universe serves the same ETag.
+    """
+
+    def __init__(self, rows, universe_version=None):
+        self.universe_version = universe_version
+        rows = [list(row) for row in rows]
+        self.version = hashlib.sha256(
+            json.dumps(rows, separators=(',', ':')).encode('utf-8')
+        ).hexdigest()[:16]
+        self.etag = f'"{self.version}"'
+        self.count = len(rows)
+
+        self.body = json.dumps(
+            {'version': self.version, 'fields': SNAPSHOT_FIELDS, 'stocks': rows},
+            separators=(',', ':'),
+            ensure_ascii=False
+        ).encode('utf-8')
+        # mtime=0 keeps the compressed bytes identical across rebuilds
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+
+    @classmethod
+    def build(cls):
+        universe_version = get_universe_version()
+        rows = Stock.objects.order_by('symbol').values_list(*SNAPSHOT_FIELDS).iterator(chunk_size=2000)
+        return cls(rows, universe_version=universe_version)
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_universe_snapshot():
+    """Return the process-wide snapshot, rebuilding it if the stock table changed."""
+    global _snapshot
+
+    version = get_universe_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.universe_version == version:
+        return snapshot
+
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.universe_version != version:
+            _snapshot = UniverseSnapshot.build()
+        return _snapshot
+
+
+def current_snapshot(universe_version):
+    """The snapshot if it is still current for universe_version, else None"""
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.universe_version == universe_version:
+        return snapshot
+    return None
@@ -1,7 +1,29 @@
+import gzip
+import json
+import os
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
 from django.test import TestCase
-from django.db import IntegrityError
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
 from django.core.exceptions import ValidationError
-from .models import Stock
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from backend.exports import stream_export
+from .models import Stock, QuoteSnapshot
+from .search import StockSearchIndex, get_search_index
+from .news import NewsServiceError, get_latest_news
+from .quotes import QuoteServiceError, get_latest_quotes
+from .snapshot import get_universe_snapshot
+from .resolver import stock_resolver
+from .universe import bump_universe_version, get_universe_version
+from .views import MAX_LOOKUP_SYMBOLS
+
+User = get_user_model()
 
 
 class StockModelTests(TestCase):
@@ -145,3 +167,935 @@ class StockValidationTests(TestCase):
         self.assertEqual(self.stock.symbol, 'AAPL')
         self.assertEqual(self.stock.name, 'Apple Inc.')
         self.assertIsNotNone(self.stock.id)
+
+
+class StockSearchIndexTests(TestCase):
+    """Test cases for the in-memory stock search index"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.index = StockSearchIndex([
+            (1, 'AAPL', 'Apple Inc. Common Stock'),
+            (2, 'APLE', 'Apple Hospitality REIT Inc. Common Shares'),
+            (3, 'A', 'Agilent Technologies Inc. Common Stock'),
+            (4, 'MSFT', 'Microsoft Corporation Common Stock'),
+            (5, 'PINE', 'Alpine Income Property Trust Inc. Common Stock'),
+            (6, 'AP', 'Ampco-Pittsburgh Corporation Common Stock'),
+        ])
+
+    def symbols(self, query, limit=20):
+        return [symbol for _, symbol, _ in self.index.search(query, limit)]
+
+    def test_exact_symbol_ranks_first(self):
+        """Test exact symbol match beats symbol prefix matches"""
+        self.assertEqual(self.symbols('ap')[:2], ['AP', 'APLE'])
+
+    def test_symbol_prefix_beats_name_prefix(self):
+        """Test symbol prefix matches come before name-word prefix matches"""
+        symbols = self.symbols('apl')
+        self.assertEqual(symbols[0], 'APLE')
+        self.assertIn('AAPL', symbols)
+        self.assertLess(symbols.index('APLE'), symbols.index('AAPL'))
+
+    def test_name_prefix_beats_substring(self):
+        """Test name-word prefix matches come before substring matches"""
+        symbols = self.symbols('alp')
+        self.assertEqual(symbols, ['PINE'])
+
+        symbols = self.symbols('pine')
+        self.assertEqual(symbols[0], 'PINE')
+
+        symbols = self.symbols('soft')
+        self.assertEqual(symbols, ['MSFT'])
+
+    def test_multi_word_query_matches_substring(self):
+        """Test multi-word queries match names containing the phrase"""
+        self.assertEqual(self.symbols('apple hosp'), ['APLE'])
+
+    def test_search_limit(self):
+        """Test result limit is applied"""
+        self.assertEqual(len(self.symbols('common', limit=2)), 2)
+
+    def test_empty_and_unknown_queries(self):
+        """Test empty and unmatched queries return no results"""
+        self.assertEqual(self.symbols(''), [])
+        self.assertEqual(self.symbols('zzzz'), [])
+
+
+class StockSearchViewTests(TestCase):
+    """Test cases for ranked search on the stock list endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        # Universe version bumps run on commit, which TestCase never reaches
+        with self.captureOnCommitCallbacks(execute=True):
+            Stock.objects.create(symbol='AAPL', name='Apple Inc.')
+            Stock.objects.create(symbol='APLE', name='Apple Hospitality REIT Inc.')
+            Stock.objects.create(symbol='MSFT', name='Microsoft Corporation')
+
+    def test_search_returns_ranked_results(self):
+        """Test search results are ordered by relevance"""
+        response = self.client.get('/api/stocks/', {'search': 'aapl'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['symbol'], 'AAPL')
+
+    def test_search_limit_parameter(self):
+        """Test search honours the limit query parameter"""
+        response = self.client.get('/api/stocks/', {'search': 'apple', 'limit': 1})
+
+        self.assertEqual(len(response.json()), 1)
+
+    def test_search_runs_without_queries_when_index_warm(self):
+        """Test a warm index serves searches without database queries"""
+        get_search_index()
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/stocks/', {'search': 'micro'})
+
+    def test_index_rebuilt_after_stock_change(self):
+        """Test newly created stocks become searchable"""
+        self.client.get('/api/stocks/', {'search': 'nvda'})
+        with self.captureOnCommitCallbacks(execute=True):
+            Stock.objects.create(symbol='NVDA', name='NVIDIA Corporation')
+
+        response = self.client.get('/api/stocks/', {'search': 'nvda'})
+        self.assertEqual([s['symbol'] for s in response.json()], ['NVDA'])
+
+    def test_async_search_endpoint(self):
+        """Test the async search endpoint ranks like the list endpoint"""
+        response = self.client.get('/api/stocks/search/', {'q': 'apple', 'limit': 5})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s['symbol'] for s in response.json()], ['AAPL', 'APLE'])
+
+    def test_async_search_runs_without_queries_when_index_warm(self):
+        """Test the async endpoint serves a warm index without database queries"""
+        get_search_index()
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/stocks/search/', {'q': 'micro'})
+        self.assertEqual(response.json()[0]['symbol'], 'MSFT')
+
+    def test_async_search_requires_authentication(self):
+        """Test the async search endpoint rejects anonymous requests"""
+        response = APIClient().get('/api/stocks/search/', {'q': 'apple'})
+        self.assertEqual(response.status_code, 403)
+
+
+
+class StockLookupViewTests(TestCase):
+    """Test cases for bulk symbol lookup"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.apple = Stock.objects.create(symbol='AAPL', name='Apple Inc.')
+            self.microsoft = Stock.objects.create(symbol='MSFT', name='Microsoft Corporation')
+
+    def test_resolves_known_and_reports_unknown(self):
+        """Test known symbols resolve in request order and unknown ones are listed"""
+        response = self.client.get('/api/stocks/lookup/', {'symbols': 'msft, XXXX,AAPL,msft'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'stocks': [
+                {'id': self.microsoft.id, 'symbol': 'MSFT', 'name': 'Microsoft Corporation'},
+                {'id': self.apple.id, 'symbol': 'AAPL', 'name': 'Apple Inc.'}
+            ],
+            'unknown': ['XXXX']
+        })
+
+    def test_misses_resolved_in_one_query(self):
+        """Test all uncached symbols are fetched with a single query"""
+        symbols = ','.join(['AAPL', 'MSFT'] + [f'UNK{i}' for i in range(50)])
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/stocks/lookup/', {'symbols': symbols})
+        self.assertEqual(len(response.json()['unknown']), 50)
+
+    def test_warm_lookup_runs_without_queries(self):
+        """Test known symbols are served from the process-local cache when warm"""
+        stock_resolver.get_by_symbols(['AAPL', 'MSFT'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/stocks/lookup/', {'symbols': 'AAPL,MSFT'})
+        self.assertEqual(len(response.json()['stocks']), 2)
+
+    def test_new_stock_resolves_after_miss(self):
+        """Test a symbol reported unknown resolves once the stock exists"""
+        self.client.get('/api/stocks/lookup/', {'symbols': 'NVDA'})
+        with self.captureOnCommitCallbacks(execute=True):
+            Stock.objects.create(symbol='NVDA', name='NVIDIA Corporation')
+
+        response = self.client.get('/api/stocks/lookup/', {'symbols': 'NVDA'})
+        self.assertEqual(response.json()['unknown'], [])
+
+    def test_invalid_requests(self):
+        """Test missing and oversized symbol lists are rejected"""
+        self.assertEqual(self.client.get('/api/stocks/lookup/').status_code, 400)
+
+        symbols = ','.join(f'S{i}' for i in range(MAX_LOOKUP_SYMBOLS + 1))
+        response = self.client.get('/api/stocks/lookup/', {'symbols': symbols})
+        self.assertEqual(response.status_code, 400)
+
+    def test_requires_authentication(self):
+        """Test anonymous lookups are rejected"""
+        response = APIClient().get('/api/stocks/lookup/', {'symbols': 'AAPL'})
+        self.assertEqual(response.status_code, 403)
+
+
+class UniverseVersionTests(TestCase):
+    """Test cases for the stock universe version shared across processes"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Stock.objects.create(symbol='AAPL', name='Apple Inc.')
+
+    def change_in_other_process(self):
+        """Add a stock the way load_stocks does, with that process's own cache"""
+        with mock.patch('stocks.universe.cache', LocMemCache('other-process', {})):
+            with self.captureOnCommitCallbacks(execute=True):
+                Stock.objects.bulk_create([Stock(symbol='NVDA', name='NVIDIA Corporation')])
+                bump_universe_version()
+
+    def test_bump_from_other_process_is_seen(self):
+        """Test a bump made with another cache reaches this process once its TTL lapses"""
+        before = get_universe_version()
+        self.change_in_other_process()
+
+        # Still within this process's TTL
+        self.assertEqual(get_universe_version(), before)
+        cache.clear()
+        self.assertNotEqual(get_universe_version(), before)
+
+    def test_structures_rebuilt_after_other_process_change(self):
+        """Test search, lookup and snapshot pick up stocks loaded by another process"""
+        self.client.get('/api/stocks/search/', {'q': 'nvda'})
+        self.client.get('/api/stocks/lookup/', {'symbols': 'AAPL'})
+        get_universe_snapshot()
+
+        self.change_in_other_process()
+        # This process's cached version expires
+        cache.clear()
+
+        search = self.client.get('/api/stocks/search/', {'q': 'nvda'}).json()
+        self.assertEqual([s['symbol'] for s in search], ['NVDA'])
+        lookup = self.client.get('/api/stocks/lookup/', {'symbols': 'NVDA'}).json()
+        self.assertEqual(lookup['unknown'], [])
+        self.assertEqual(get_universe_snapshot().count, 2)
+
+    def test_bump_runs_once_after_commit(self):
+        """Test row changes in one transaction bump the version once, on commit"""
+        before = get_universe_version()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                for symbol in ['NVDA', 'AMD', 'INTC']:
+                    Stock.objects.create(symbol=symbol, name=symbol)
+                Stock.objects.filter(symbol__in=['AMD', 'INTC']).delete()
+            # Rebuilt structures must not be stored under a token for
+            # rows that are not committed yet
+            self.assertEqual(get_universe_version(), before)
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertNotEqual(get_universe_version(), before)
+
+
+class StockPaginationTests(TestCase):
+    """Test cases for cursor pagination on the stock list endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        for symbol in ['AAPL', 'GOOGL', 'MSFT', 'NVDA', 'TSLA']:
+            Stock.objects.create(symbol=symbol, name=f'{symbol} Inc.')
+
+    def test_list_is_paginated_by_symbol(self):
+        """Test list returns the first page ordered by symbol"""
+        response = self.client.get('/api/stocks/', {'page_size': 2})
+        data = response.json()
+
+        self.assertEqual([s['symbol'] for s in data['results']], ['AAPL', 'GOOGL'])
+        self.assertIsNotNone(data['next'])
+        self.assertIsNone(data['previous'])
+
+    def test_cursor_stable_under_inserts(self):
+        """Test following a cursor neither skips nor repeats rows after inserts"""
+        first = self.client.get('/api/stocks/', {'page_size': 2}).json()
+
+        Stock.objects.create(symbol='AMZN', name='Amazon.com Inc.')
+        Stock.objects.create(symbol='META', name='Meta Platforms Inc.')
+
+        second = self.client.get(first['next']).json()
+        self.assertEqual([s['symbol'] for s in second['results']], ['META', 'MSFT'])
+
+    def test_unpaginated_list_requires_flag(self):
+        """Test the full list is only returned with ?all=true"""
+        response = self.client.get('/api/stocks/', {'all': 'true'})
+
+        self.assertEqual(len(response.json()), 5)
+
+
+class StockScreenerTests(TestCase):
+    """Test cases for screener filters, ordering and facets on the stock list"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        for symbol, sector, industry, country, market_cap, ipo_year in [
+            ('AAPL', 'Technology', 'Computer Manufacturing', 'United States', 3000, 1980),
+            ('MSFT', 'Technology', 'Computer Software', 'United States', 2800, 1986),
+            ('NVDA', 'Technology', 'Semiconductors', 'United States', 2500, 1999),
+            ('TSM', 'Technology', 'Semiconductors', 'Taiwan', 900, 1997),
+            ('JPM', 'Finance', 'Major Banks', 'United States', 500, None),
+            ('XYZ', '', '', '', None, None),
+        ]:
+            Stock.objects.create(
+                symbol=symbol, name=f'{symbol} Inc.', sector=sector, industry=industry,
+                country=country, market_cap=market_cap, ipo_year=ipo_year
+            )
+
+    def symbols(self, params):
+        response = self.client.get('/api/stocks/', params)
+        self.assertEqual(response.status_code, 200)
+        return [stock['symbol'] for stock in response.json()['results']]
+
+    def test_combined_filters(self):
+        """Test facet and range filters combine"""
+        self.assertEqual(
+            self.symbols({'sector': 'Technology', 'country': 'United States', 'market_cap_min': 2600}),
+            ['AAPL', 'MSFT']
+        )
+        self.assertEqual(self.symbols({'industry': 'Semiconductors', 'ipo_year_max': 1998}), ['TSM'])
+
+    def test_repeated_facet_values(self):
+        """Test a repeated facet parameter matches any of its values"""
+        self.assertEqual(self.symbols({'country': ['Taiwan', 'United States'], 'sector': 'Finance'}), ['JPM'])
+
+    def test_ordering_by_market_cap(self):
+        """Test market cap ordering pages by cursor and skips unknown caps"""
+        first = self.client.get('/api/stocks/', {'ordering': '-market_cap', 'page_size': 3}).json()
+        self.assertEqual([s['symbol'] for s in first['results']], ['AAPL', 'MSFT', 'NVDA'])
+
+        second = self.client.get(first['next']).json()
+        self.assertEqual([s['symbol'] for s in second['results']], ['TSM', 'JPM'])
+
+    def test_results_include_metadata(self):
+        """Test list results carry the screener fields"""
+        stock = self.client.get('/api/stocks/', {'sector': 'Finance'}).json()['results'][0]
+
+        self.assertEqual(stock['industry'], 'Major Banks')
+        self.assertEqual(stock['market_cap'], 500)
+        self.assertIsNone(stock['ipo_year'])
+
+    def test_invalid_parameters(self):
+        """Test malformed ranges and unknown orderings are rejected"""
+        self.assertEqual(self.client.get('/api/stocks/', {'market_cap_min': 'big'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/stocks/', {'ordering': 'name'}).status_code, 400)
+
+    def test_facet_counts(self):
+        """Test each facet is counted under every filter but its own"""
+        response = self.client.get('/api/stocks/facets/', {'sector': 'Technology'})
+        facets = response.json()
+
+        self.assertEqual(facets['sector'], [
+            {'value': 'Technology', 'count': 4},
+            {'value': 'Finance', 'count': 1}
+        ])
+        self.assertEqual(facets['industry'][0], {'value': 'Semiconductors', 'count': 2})
+        self.assertEqual(facets['country'], [
+            {'value': 'United States', 'count': 3},
+            {'value': 'Taiwan', 'count': 1}
+        ])
+
+    def test_facet_queries(self):
+        """Test facets are one grouped query each"""
+        with self.assertNumQueries(3):
+            self.client.get('/api/stocks/facets/', {'country': 'United States'})
+
+
+class StockExportTests(TestCase):
+    """Test cases for the streaming stock universe export"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        Stock.objects.create(symbol='MSFT', name='Microsoft Corporation', sector='Technology', market_cap=2800)
+        Stock.objects.create(symbol='AAPL', name='Apple Inc.', sector='Technology', ipo_year=1980)
+        Stock.objects.create(symbol='JPM', name='JPMorgan Chase & Co.', sector='Finance')
+
+    async def export(self, **params):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/api/stocks/export/', params)
+        body = b''.join([chunk async for chunk in response.streaming_content]) if response.streaming else response.content
+        return response, body.decode('utf-8')
+
+    async def test_csv_export(self):
+        """Test the universe streams as CSV ordered by symbol"""
+        response, body = await self.export()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('filename="stocks.csv"', response['Content-Disposition'])
+        self.assertEqual(body.splitlines(), [
+            'symbol,name,sector,industry,country,market_cap,ipo_year',
+            'AAPL,Apple Inc.,Technology,,,,1980',
+            'JPM,JPMorgan Chase & Co.,Finance,,,,',
+            'MSFT,Microsoft Corporation,Technology,,,2800,',
+        ])
+
+    async def test_jsonl_export_with_filters(self):
+        """Test screener filters apply to the JSONL export"""
+        response, body = await self.export(format='jsonl', sector='Technology', market_cap_min=1000)
+
+        self.assertEqual([json.loads(line) for line in body.splitlines()], [{
+            'symbol': 'MSFT', 'name': 'Microsoft Corporation', 'sector': 'Technology',
+            'industry': '', 'country': '', 'market_cap': 2800, 'ipo_year': None
+        }])
+
+    async def test_invalid_parameters(self):
+        """Test unknown formats and malformed filters are rejected"""
+        response, body = await self.export(format='xlsx')
+        self.assertEqual(response.status_code, 400)
+
+        response, body = await self.export(ipo_year_min='recent')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_rows_streamed_in_chunks(self):
+        """Test rows are read and sent one chunk at a time"""
+        response = stream_export(
+            Stock.objects.order_by('symbol'), {'symbol': 'symbol'}, 'csv', 'stocks', chunk_size=2
+        )
+        chunks = [chunk async for chunk in response.streaming_content]
+
+        self.assertEqual(chunks, [b'symbol\r\n', b'AAPL\r\nJPM\r\n', b'MSFT\r\n'])
+
+
+class LoadStocksCommandTests(TestCase):
+    """Test cases for the load_stocks management command"""
+
+    def setUp(self):
+        """Set up test data"""
+        with self.captureOnCommitCallbacks(execute=True):
+            Stock.objects.create(symbol='AAPL', name='Apple Inc.')
+            Stock.objects.create(symbol='MSFT', name='Microsoft Corp')
+
+        handle, self.csv_path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            file.write('Symbol,Name,Last Sale\n')
+            file.write('AAPL,Apple Inc.,$1\n')
+            file.write('MSFT,Microsoft Corporation,$1\n')
+            file.write('nvda,NVIDIA Corporation,$1\n')
+            file.write(',Missing Symbol,$1\n')
+            file.write('TSLA,Tesla Inc.,$1\n')
+
+    def tearDown(self):
+        os.remove(self.csv_path)
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('load_stocks', '--csv-file', self.csv_path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_upserts_new_and_changed_stocks(self):
+        """Test new stocks are created and changed names updated"""
+        output = self.run_command('--chunk-size', '2')
+
+        self.assertIn('Stocks created: 2', output)
+        self.assertIn('Stocks updated: 1', output)
+        self.assertEqual(Stock.objects.get(symbol='MSFT').name, 'Microsoft Corporation')
+        self.assertTrue(Stock.objects.filter(symbol='NVDA').exists())
+        self.assertEqual(Stock.objects.count(), 4)
+
+    def test_query_count_independent_of_rows(self):
+        """Test each chunk costs a fixed number of queries"""
+        # Lookup, savepoint, upsert, release, final count, universe version bump on commit
+        with self.assertNumQueries(6), self.captureOnCommitCallbacks(execute=True):
+            self.run_command('--chunk-size', '100', '--verbosity', '0')
+
+    def test_clear_bumps_version_once(self):
+        """Test --clear skips the per-row bumps and bumps once for the whole load"""
+        Stock.objects.bulk_create([Stock(symbol=f'OLD{i}', name='Old') for i in range(20)])
+
+        with mock.patch('stocks.signals.bump_universe_version') as per_row, \
+                self.captureOnCommitCallbacks() as callbacks:
+            self.run_command('--clear', '--verbosity', '0')
+
+        per_row.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+
+    def test_dry_run_writes_nothing(self):
+        """Test dry run reports the diff without changing the table"""
+        output = self.run_command('--dry-run')
+
+        self.assertIn('+ NVDA - NVIDIA Corporation', output)
+        self.assertIn('~ MSFT - Microsoft Corp -> Microsoft Corporation', output)
+        self.assertIn('Stocks to create: 2', output)
+        self.assertEqual(Stock.objects.count(), 2)
+        self.assertEqual(Stock.objects.get(symbol='MSFT').name, 'Microsoft Corp')
+
+    def test_loads_screener_metadata(self):
+        """Test sector, industry, country, market cap and IPO year are loaded"""
+        with open(self.csv_path, 'w', encoding='utf-8') as file:
+            file.write('Symbol,Name,Last Sale,Market Cap,Country,IPO Year,Volume,Sector,Industry\n')
+            file.write('AAPL,Apple Inc.,$1,3012345678901.00,United States,1980,1,Technology,Computer Manufacturing\n')
+            file.write('NEWCO,New Co,$1,0.00,,,1,,\n')
+
+        output = self.run_command('--dry-run')
+        self.assertIn('~ AAPL - sector: - -> Technology', output)
+
+        self.run_command()
+        apple = Stock.objects.get(symbol='AAPL')
+        self.assertEqual(apple.sector, 'Technology')
+        self.assertEqual(apple.industry, 'Computer Manufacturing')
+        self.assertEqual(apple.country, 'United States')
+        self.assertEqual(apple.market_cap, 3012345678901)
+        self.assertEqual(apple.ipo_year, 1980)
+
+        newco = Stock.objects.get(symbol='NEWCO')
+        self.assertEqual(newco.sector, '')
+        self.assertIsNone(newco.market_cap)
+        self.assertIsNone(newco.ipo_year)
+
+    def test_rerun_is_idempotent(self):
+        """Test loading the same file twice changes nothing the second time"""
+        self.run_command()
+        output = self.run_command()
+
+        self.assertIn('Stocks created: 0', output)
+        self.assertIn('Stocks updated: 0', output)
+
+
+class LatestQuotesTests(TestCase):
+    """Test cases for the shared latest-quote cache"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.quote = {'price': 10.0, 'change': 0.5, 'change_percent': 5.0, 'as_of': '2024-01-02'}
+
+    @mock.patch('stocks.quotes.fetch_quotes')
+    def test_only_cache_misses_are_fetched(self, fetch):
+        """Test quotes are shared from cache and misses fetched in one call"""
+        fetch.return_value = {'AAPL': self.quote}
+        get_latest_quotes(['AAPL'])
+
+        fetch.return_value = {'MSFT': self.quote}
+        quotes, degraded = get_latest_quotes(['aapl', 'MSFT'])
+
+        self.assertEqual(set(quotes), {'AAPL', 'MSFT'})
+        self.assertFalse(degraded)
+        fetch.assert_called_with(['MSFT'])
+        self.assertEqual(fetch.call_count, 2)
+
+    @mock.patch('stocks.quotes.fetch_quotes')
+    def test_unpriced_symbols_are_not_refetched(self, fetch):
+        """Test symbols the service cannot price are cached as missing"""
+        fetch.return_value = {}
+        get_latest_quotes(['ZZZZ'])
+        quotes, _ = get_latest_quotes(['ZZZZ'])
+
+        self.assertEqual(quotes, {})
+        self.assertEqual(fetch.call_count, 1)
+
+    @mock.patch('stocks.quotes.fetch_quotes')
+    def test_invalid_symbols_are_never_sent(self, fetch):
+        """Test symbols the AI service would reject are skipped"""
+        get_latest_quotes(['BRK/A', 'AB^C'])
+        fetch.assert_not_called()
+
+    @mock.patch('stocks.quotes.fetch_quotes', side_effect=QuoteServiceError('down'))
+    def test_upstream_failure_is_degraded(self, fetch):
+        """Test an unreachable service returns cached quotes and a degraded flag"""
+        cache.set('quote:AAPL', self.quote)
+
+        quotes, degraded = get_latest_quotes(['AAPL', 'MSFT'])
+
+        self.assertEqual(quotes, {'AAPL': self.quote})
+        self.assertTrue(degraded)
+
+    @mock.patch('stocks.quotes.QUOTE_BATCH_SIZE', 2)
+    @mock.patch('stocks.quotes.urlopen')
+    def test_fetch_is_batched(self, urlopen):
+        """Test one upstream request is made per batch of symbols"""
+        urlopen.side_effect = lambda url, timeout: BytesIO(b'{"quotes": {}}')
+
+        get_latest_quotes(['AAA', 'BBB', 'CCC'])
+
+        self.assertEqual(urlopen.call_count, 2)
+        self.assertIn('tickers=AAA%2CBBB', urlopen.call_args_list[0].args[0])
+
+
+class LatestNewsTests(TestCase):
+    """Test cases for the shared per-symbol news cache"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.headline = {'headline': 'Apple ships', 'url': 'https://example.com/a'}
+
+    @mock.patch('stocks.news.fetch_news')
+    def test_only_cache_misses_are_fetched(self, fetch):
+        """Test headlines are shared from cache and misses fetched in one call"""
+        fetch.return_value = ({'AAPL': [self.headline]}, [])
+        get_latest_news([('AAPL', 'Apple Inc.')])
+
+        fetch.return_value = ({}, [])
+        news, degraded = get_latest_news([('aapl', 'Apple Inc.'), ('MSFT', 'Microsoft')])
+
+        self.assertEqual(news, {'AAPL': [self.headline], 'MSFT': []})
+        self.assertFalse(degraded)
+        fetch.assert_called_with([('MSFT', 'Microsoft')])
+
+    @mock.patch('stocks.news.fetch_news')
+    def test_failed_symbols_are_not_cached(self, fetch):
+        """Test symbols the service failed to search are retried next time"""
+        fetch.return_value = ({}, ['MSFT'])
+        news, degraded = get_latest_news([('MSFT', 'Microsoft')])
+        self.assertTrue(degraded)
+
+        get_latest_news([('MSFT', 'Microsoft')])
+        self.assertEqual(fetch.call_count, 2)
+
+    @mock.patch('stocks.news.fetch_news', side_effect=NewsServiceError('down'))
+    def test_upstream_failure_is_degraded(self, fetch):
+        """Test an unreachable service returns cached news and a degraded flag"""
+        cache.set('news:AAPL', [self.headline])
+
+        news, degraded = get_latest_news([('AAPL', 'Apple Inc.'), ('MSFT', 'Microsoft')])
+
+        self.assertEqual(news, {'AAPL': [self.headline]})
+        self.assertTrue(degraded)
+
+    @mock.patch('stocks.news.urlopen')
+    def test_company_names_are_sent(self, urlopen):
+        """Test the service receives each symbol's company name"""
+        urlopen.side_effect = lambda url, timeout: BytesIO(b'{"news": {}, "failed": []}')
+
+        get_latest_news([('ON', 'ON Semiconductor')])
+
+        url = urlopen.call_args.args[0]
+        self.assertIn('tickers=ON', url)
+        self.assertIn('name=ON%3AON+Semiconductor', url)
+
+
+class RefreshQuotesCommandTests(TestCase):
+    """Test cases for the refresh_quotes management command"""
+
+    def setUp(self):
+        """Set up test data"""
+        from watchlists.models import Watchlist, WatchlistStock
+
+        cache.clear()
+        user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        watchlist = Watchlist.objects.create(user=user)
+        self.stocks = [
+            Stock.objects.create(symbol=symbol, name=symbol)
+            for symbol in ['AAPL', 'MSFT', 'NVDA']
+        ]
+        for stock in self.stocks[:2]:
+            WatchlistStock.objects.create(watchlist=watchlist, stock=stock)
+        Stock.objects.create(symbol='UNWATCHED', name='Not watched')
+
+    def quote(self, price):
+        return {'price': price, 'change': 1.0, 'change_percent': 0.5, 'volume': 100, 'as_of': '2024-01-02T00:00:00-05:00'}
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('refresh_quotes', *args, stdout=out)
+        return out.getvalue()
+
+    @mock.patch('stocks.management.commands.refresh_quotes.fetch_quotes')
+    def test_refreshes_watched_stocks(self, fetch):
+        """Test snapshots are created then updated for watched stocks only"""
+        fetch.return_value = {'AAPL': self.quote(190.0), 'MSFT': self.quote(400.0)}
+        output = self.run_command()
+
+        self.assertIn('Snapshots created: 2', output)
+        self.assertEqual(sorted(fetch.call_args.args[0]), ['AAPL', 'MSFT'])
+
+        fetch.return_value = {'AAPL': self.quote(191.0)}
+        output = self.run_command()
+
+        self.assertIn('Snapshots updated: 1', output)
+        self.assertIn('Symbols without a quote: 1', output)
+        snapshot = QuoteSnapshot.objects.get(stock=self.stocks[0])
+        self.assertEqual(snapshot.last_price, 191.0)
+        self.assertEqual(snapshot.as_of.date().isoformat(), '2024-01-02')
+        self.assertEqual(QuoteSnapshot.objects.get(stock=self.stocks[1]).last_price, 400.0)
+
+    @mock.patch('stocks.management.commands.refresh_quotes.fetch_quotes')
+    def test_batches_use_constant_queries(self, fetch):
+        """Test each batch is one fetch and a fixed number of writes"""
+        fetch.side_effect = lambda symbols: {symbol: self.quote(1.0) for symbol in symbols}
+        QuoteSnapshot.objects.create(stock=self.stocks[0], last_price=1.0)
+
+        # Symbol list, then per batch: lookup, savepoint, update, insert, release
+        with self.assertNumQueries(6):
+            self.run_command('--all', '--verbosity', '0')
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(QuoteSnapshot.objects.count(), 4)
+
+    @mock.patch('stocks.management.commands.refresh_quotes.fetch_quotes')
+    def test_refresh_warms_shared_quote_cache(self, fetch):
+        """Test refreshed quotes are served by get_latest_quotes without a fetch"""
+        fetch.return_value = {'AAPL': self.quote(190.0)}
+        self.run_command()
+
+        with mock.patch('stocks.quotes.fetch_quotes') as request_fetch:
+            quotes, _ = get_latest_quotes(['AAPL', 'MSFT'])
+        request_fetch.assert_not_called()
+        self.assertEqual(quotes['AAPL']['price'], 190.0)
+
+
+class WatcherCountTests(TestCase):
+    """Test cases for the denormalized per-stock watcher count"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.users = [
+            User.objects.create_user(
+                username=f'user{i}@example.com',
+                email=f'user{i}@example.com',
+                firebase_uid=f'uid_{i}'
+            )
+            for i in range(3)
+        ]
+        self.aapl = Stock.objects.create(symbol='AAPL', name='Apple Inc.')
+        self.msft = Stock.objects.create(symbol='MSFT', name='Microsoft Corporation')
+        self.nvda = Stock.objects.create(symbol='NVDA', name='NVIDIA Corporation')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def count(self, stock):
+        stock.refresh_from_db()
+        return stock.watcher_count
+
+    def test_single_add_and_remove(self):
+        """Test adds count once per watchlist and removes decrement"""
+        for user in self.users[:2]:
+            self.client_for(user).post('/api/watchlists/stocks/', {'symbol': 'AAPL'}, format='json')
+        self.client_for(self.users[0]).post('/api/watchlists/stocks/', {'symbol': 'AAPL'}, format='json')
+        self.assertEqual(self.count(self.aapl), 2)
+
+        self.client_for(self.users[0]).delete(f'/api/watchlists/stocks/{self.aapl.id}/')
+        self.assertEqual(self.count(self.aapl), 1)
+
+    def test_concurrent_remove_decrements_once(self):
+        """Test a remove whose entry was already deleted leaves the count alone"""
+        from watchlists.models import WatchlistStock
+
+        for user in self.users[:2]:
+            self.client_for(user).post('/api/watchlists/stocks/', {'symbol': 'AAPL'}, format='json')
+        original_delete = WatchlistStock.delete
+
+        def delete_after_other_request(entry, *args, **kwargs):
+            # Another request removes the same entry first
+            WatchlistStock.objects.filter(pk=entry.pk).delete()
+            Stock.objects.filter(pk=entry.stock_id).adjust_watcher_count(-1)
+            return original_delete(entry, *args, **kwargs)
+
+        with mock.patch.object(WatchlistStock, 'delete', delete_after_other_request):
+            response = self.client_for(self.users[0]).delete(f'/api/watchlists/stocks/{self.aapl.id}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.count(self.aapl), 1)
+
+    def test_bulk_add_and_remove(self):
+        """Test bulk paths adjust only the stocks actually added or removed"""
+        client = self.client_for(self.users[0])
+        client.post('/api/watchlists/stocks/bulk/', {'symbols': ['AAPL', 'MSFT']}, format='json')
+        client.post('/api/watchlists/stocks/bulk/', {'symbols': ['AAPL', 'NVDA']}, format='json')
+        self.assertEqual([self.count(s) for s in (self.aapl, self.msft, self.nvda)], [1, 1, 1])
+
+        client.delete('/api/watchlists/stocks/bulk/', {'symbols': ['AAPL', 'NOPE']}, format='json')
+        self.assertEqual([self.count(s) for s in (self.aapl, self.msft, self.nvda)], [0, 1, 1])
+
+    def test_concurrent_bulk_add_increments_once(self):
+        """Test a bulk add counts only the entries it inserted itself"""
+        from watchlists.models import Watchlist, WatchlistStock
+
+        watchlist = Watchlist.objects.create(user=self.users[0])
+        original_bulk_create = WatchlistStock.objects.bulk_create
+
+        def bulk_create_after_other_request(entries, **kwargs):
+            # Another request adds AAPL to the same watchlist first
+            WatchlistStock.objects.create(watchlist=watchlist, stock=self.aapl)
+            Stock.objects.filter(pk=self.aapl.pk).adjust_watcher_count(1)
+            return original_bulk_create(entries, **kwargs)
+
+        with mock.patch.object(WatchlistStock.objects, 'bulk_create', bulk_create_after_other_request):
+            response = self.client_for(self.users[0]).post(
+                '/api/watchlists/stocks/bulk/', {'symbols': ['AAPL', 'MSFT']}, format='json'
+            )
+
+        statuses = {result['item']: result['status'] for result in response.json()['results']}
+        self.assertEqual(statuses, {'AAPL': 'already_exists', 'MSFT': 'added'})
+        self.assertEqual([self.count(s) for s in (self.aapl, self.msft)], [1, 1])
+
+    def test_reconcile_repairs_drift(self):
+        """Test the reconcile command recomputes drifted counts"""
+        from watchlists.models import Watchlist, WatchlistStock
+
+        for user in self.users:
+            watchlist = Watchlist.objects.create(user=user)
+            WatchlistStock.objects.create(watchlist=watchlist, stock=self.msft)
+        Stock.objects.filter(pk=self.aapl.pk).update(watcher_count=5)
+
+        out = StringIO()
+        call_command('reconcile_watcher_counts', '--dry-run', stdout=out)
+        self.assertIn('Stocks with a wrong watcher count: 2', out.getvalue())
+        self.assertEqual(self.count(self.aapl), 5)
+
+        out = StringIO()
+        call_command('reconcile_watcher_counts', '--chunk-size', '1', stdout=out)
+        self.assertIn('Stocks corrected: 2', out.getvalue())
+        self.assertEqual([self.count(s) for s in (self.aapl, self.msft, self.nvda)], [0, 3, 0])
+
+    def test_popular_endpoint(self):
+        """Test popular stocks are ordered by watcher count in one query"""
+        Stock.objects.filter(pk=self.msft.pk).update(watcher_count=3)
+        Stock.objects.filter(pk=self.aapl.pk).update(watcher_count=3)
+        Stock.objects.filter(pk=self.nvda.pk).update(watcher_count=1)
+        client = self.client_for(self.users[0])
+
+        with self.assertNumQueries(1):
+            response = client.get('/api/stocks/popular/', {'limit': 2})
+
+        self.assertEqual(
+            [(s['symbol'], s['watcher_count']) for s in response.json()],
+            [('AAPL', 3), ('MSFT', 3)]
+        )
+
+    def test_counter_never_negative(self):
+        """Test a decrement on a drifted zero count stays at zero"""
+        Stock.objects.filter(pk=self.aapl.pk).adjust_watcher_count(-1)
+        self.assertEqual(self.count(self.aapl), 0)
+
+
+class UniverseSnapshotViewTests(TestCase):
+    """Test cases for the compressed stock universe snapshot"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.msft = Stock.objects.create(symbol='MSFT', name='Microsoft Corporation')
+            self.aapl = Stock.objects.create(symbol='AAPL', name='Apple Inc.')
+
+    def get(self, **extra):
+        return self.client.get('/api/stocks/snapshot/', HTTP_ACCEPT_ENCODING='gzip', **extra)
+
+    def test_gzipped_compact_payload(self):
+        """Test the snapshot is gzip-compressed [id, symbol, name] rows by symbol"""
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        payload = json.loads(gzip.decompress(response.content))
+        self.assertEqual(payload['fields'], ['id', 'symbol', 'name'])
+        self.assertEqual(payload['stocks'], [
+            [self.aapl.id, 'AAPL', 'Apple Inc.'],
+            [self.msft.id, 'MSFT', 'Microsoft Corporation'],
+        ])
+        self.assertEqual(response['ETag'], f'"{payload["version"]}"')
+
+    def test_uncompressed_without_accept_encoding(self):
+        """Test clients that do not accept gzip get plain JSON"""
+        response = self.client.get('/api/stocks/snapshot/')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(response.json()['stocks']), 2)
+
+    def test_matching_etag_returns_not_modified(self):
+        """Test revalidation with the current ETag is a 304 without queries"""
+        etag = self.get()['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_cache_headers(self):
+        """Test versioned URLs are immutable and the bare URL revalidates"""
+        response = self.get()
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        version = response['X-Universe-Version']
+        response = self.client.get('/api/stocks/snapshot/', {'v': version})
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_regenerated_when_stocks_change(self):
+        """Test the snapshot is rebuilt only after the stock table changes"""
+        first = get_universe_snapshot()
+        self.assertIs(get_universe_snapshot(), first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Stock.objects.create(symbol='NVDA', name='NVIDIA Corporation')
+        response = self.get(HTTP_IF_NONE_MATCH=first.etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first.etag)
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['stocks']), 3)
@@ -0,0 +1,116 @@
+import threading
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+UNIVERSE_VERSION_KEY = 'stocks:universe_version'
+UNIVERSE_VERSION_PK = 1
+
+
+def _new_token():
+    return uuid.uuid4().hex
+
+
+def _read_token():
+    from .models import UniverseVersion
+
+    row, created = UniverseVersion.objects.get_or_create(
+        pk=UNIVERSE_VERSION_PK,
+        defaults={'token': _new_token()}
+    )
+    return row.token
+
+
+async def _aread_token():
+    from .models import UniverseVersion
+
+    row, created = await UniverseVersion.objects.aget_or_create(
+        pk=UNIVERSE_VERSION_PK,
+        defaults={'token': _new_token()}
+    )
+    return row.token
+
+
+def get_universe_version():
+    """
+    Return a token that changes whenever Stock rows change.
+
+    Process-local structures built from the stock table (search index,
+    symbol cache, snapshots) compare it with the version they were built
+    at. The token lives in the database, so bumps from any process count;
+    each process re-reads it at most every UNIVERSE_VERSION_TTL seconds
+    (immediately with a shared cache backend, which bump also writes).
+    """
+    version = cache.get(UNIVERSE_VERSION_KEY)
+    if version is None:
+        version = _read_token()
+        cache.set(UNIVERSE_VERSION_KEY, version, timeout=settings.UNIVERSE_VERSION_TTL)
+    return version
+
+
+async def aget_universe_version():
+    """Async variant of get_universe_version for async views."""
+    version = await cache.aget(UNIVERSE_VERSION_KEY)
+    if version is None:
+        version = await _aread_token()
+        await cache.aset(UNIVERSE_VERSION_KEY, version, timeout=settings.UNIVERSE_VERSION_TTL)
+    return version
+
+
+def _write_new_token():
+    from .models import UniverseVersion
+
+    token = _new_token()
+    if not UniverseVersion.objects.filter(pk=UNIVERSE_VERSION_PK).update(token=token):
+        UniverseVersion.objects.update_or_create(pk=UNIVERSE_VERSION_PK, defaults={'token': token})
+    cache.set(UNIVERSE_VERSION_KEY, token, timeout=settings.UNIVERSE_VERSION_TTL)
+
+
+# Per thread, like database connections: the bump waiting for the
+# current transaction to commit, and the suppress_universe_bumps() depth
+_local = threading.local()
+
+
+def bump_universe_version():
+    """
+    Mark every structure built from the stock table as stale, in every process.
+
+    Inside a transaction the bump is deferred until it commits, and runs
+    once however many times it was requested: a structure rebuilt before
+    the commit would otherwise be stored under the new token from rows
+    that are about to change, and never be invalidated.
+    """
+    connection = transaction.get_connection()
+    pending = getattr(_local, 'pending', None)
+    # A bump discarded by a rollback is no longer in run_on_commit
+    if pending is not None and any(func is pending for _, func, _ in connection.run_on_commit):
+        return
+
+    def bump():
+        _local.pending = None
+        _write_new_token()
+
+    _local.pending = bump
+    transaction.on_commit(bump)
+
+
+def universe_bumps_suppressed():
+    return getattr(_local, 'suppressed', 0) > 0
+
+
+@contextmanager
+def suppress_universe_bumps():
+    """
+    Skip the per-row bumps of the Stock signals in this thread.
+
+    For bulk writes that call bump_universe_version() once themselves.
+    """
+    _local.suppressed = getattr(_local, 'suppressed', 0) + 1
+    try:
+        yield
+    finally:
+        _local.suppressed -= 1
@@ -1,6 +1,20 @@
 from django.urls import path
-from .views import StockListCreateView
+from .views import (
+    StockListCreateView,
+    PopularStockListView,
+    StockLookupView,
+    StockFacetsView,
+    stock_search,
+    stock_export,
+    stock_universe_snapshot
+)
 
 urlpatterns = [
     path('', StockListCreateView.as_view(), name='stock-list-create'),
+    path('search/', stock_search, name='stock-search'),
+    path('facets/', StockFacetsView.as_view(), name='stock-facets'),
+    path('lookup/', StockLookupView.as_view(), name='stock-lookup'),
+    path('popular/', PopularStockListView.as_view(), name='stock-popular'),
+    path('export/', stock_export, name='stock-export'),
+    path('snapshot/', stock_universe_snapshot, name='stock-universe-snapshot'),
 ]
@@ -1,27 +1,236 @@
-from rest_framework.generics import ListCreateAPIView, RetrieveAPIView
-from rest_framework import permissions
-from django.db.models import Q
+from rest_framework.generics import ListAPIView, ListCreateAPIView, RetrieveAPIView
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import permissions, status
+from rest_framework.exceptions import ValidationError
+from asgiref.sync import sync_to_async
+from django.db.models import Count
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
+from backend.exports import get_export_format, stream_export
+from users.authentication import async_login_required
 from .models import Stock
-from .serializers import StockSerializer
+from .serializers import StockSerializer, PopularStockSerializer, ScreenerStockSerializer
+from .filters import FACET_FIELDS, StockFilterBackend, parse_stock_filters
+from .search import search_stocks, asearch_stocks, DEFAULT_SEARCH_LIMIT
+from .pagination import StockCursorPagination
+from .resolver import stock_resolver
+from .snapshot import current_snapshot, get_universe_snapshot
+from .universe import aget_universe_version
 
 
 class StockListCreateView(ListCreateAPIView):
     """
-    GET: List all stocks (with search functionality)
+    GET: List stocks a page at a time (cursor pagination by symbol),
+         the full list with ?all=true, or ranked search results with ?search=
+         Filter with ?sector=, ?industry=, ?country= (repeatable),
+         ?market_cap_min/max= and ?ipo_year_min/max=; order with
+         ?ordering=symbol|market_cap|-market_cap|ipo_year|-ipo_year
     POST: Create a new stock
     """
-    serializer_class = StockSerializer
+    serializer_class = ScreenerStockSerializer
     permission_classes = [permissions.IsAuthenticated]
-    
+    pagination_class = StockCursorPagination
+    filter_backends = [StockFilterBackend]
+
     def get_queryset(self):
-        queryset = Stock.objects.all()
-        search = self.request.query_params.get('search', None)
-        
-        if search:
-            queryset = queryset.filter(
-                Q(symbol__icontains=search) | Q(name__icontains=search)
+        return Stock.objects.all().order_by('symbol')
+
+    def paginate_queryset(self, queryset):
+        # Unpaginated listing is opt-in only
+        if self.request.query_params.get('all', '').lower() == 'true':
+            return None
+        return super().paginate_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        search = request.query_params.get('search', None)
+        if not search:
+            return super().list(request, *args, **kwargs)
+
+        # Served from the in-memory index: exact symbol, symbol prefix,
+        # name-word prefix, then substring matches. The index only holds
+        # id, symbol and name, so screener filters do not apply here
+        serializer = StockSerializer(search_stocks(search, get_search_limit(request)), many=True)
+        return Response(serializer.data)
+
+
+class StockFacetsView(APIView):
+    """
+    GET: Stock counts per sector, industry and country
+
+    Takes the same filters as the stock list. Each facet is counted under
+    every filter except its own, so the other values of a selected facet
+    keep their counts. Counts group on the leading columns of the
+    screener indexes.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        facets = {}
+        for field in FACET_FIELDS:
+            counts = (
+                Stock.objects
+                .filter(**parse_stock_filters(request.query_params, exclude=field))
+                .exclude(**{field: ''})
+                .order_by()
+                .values_list(field)
+                .annotate(count=Count('*'))
+                .order_by('-count', field)
             )
-        
-        return queryset.order_by('symbol')
+            facets[field] = [{'value': value, 'count': count} for value, count in counts]
+        return Response(facets)
+
+
+DEFAULT_POPULAR_LIMIT = 20
+MAX_POPULAR_LIMIT = 100
+
+
+class PopularStockListView(ListAPIView):
+    """
+    GET: Most-watched stocks with their watcher counts (?limit=, default 20)
+
+    Reads the denormalized Stock.watcher_count through its index, so the
+    cost does not depend on the number of watchlist entries.
+    """
+    serializer_class = PopularStockSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        try:
+            limit = int(self.request.query_params.get('limit', DEFAULT_POPULAR_LIMIT))
+        except ValueError:
+            limit = DEFAULT_POPULAR_LIMIT
+        limit = max(1, min(limit, MAX_POPULAR_LIMIT))
+        return Stock.objects.popular()[:limit]
+
+
+MAX_LOOKUP_SYMBOLS = 500
+
+
+class StockLookupView(APIView):
+    """
+    GET: Resolve a comma-separated list of symbols (?symbols=AAPL,MSFT)
+
+    Returns {"stocks": [...], "unknown": [...]} in request order. Served
+    by the process-local stock resolver, so known symbols cost no queries
+    once warm and all misses are fetched in one symbol__in query.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        symbols = []
+        for value in request.query_params.getlist('symbols'):
+            for symbol in value.split(','):
+                symbol = symbol.strip().upper()
+                if symbol and symbol not in symbols:
+                    symbols.append(symbol)
+
+        if not symbols:
+            return Response(
+                {"detail": "'symbols' is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(symbols) > MAX_LOOKUP_SYMBOLS:
+            return Response(
+                {"detail": f"At most {MAX_LOOKUP_SYMBOLS} symbols can be looked up at once"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = stock_resolver.get_by_symbols(symbols)
+        return Response({
+            'stocks': [rows[symbol] for symbol in symbols if symbol in rows],
+            'unknown': [symbol for symbol in symbols if symbol not in rows]
+        })
+
+
+def get_search_limit(request):
+    try:
+        return int(request.GET.get('limit', DEFAULT_SEARCH_LIMIT))
+    except ValueError:
+        return DEFAULT_SEARCH_LIMIT
+
+
+@require_GET
+@async_login_required
+async def stock_search(request):
+    """
+    GET: Ranked stock search (?q=, optional ?limit=)
+
+    Async view over the in-memory index, so under ASGI a search never
+    occupies a worker thread unless the index has to be rebuilt.
+    """
+    query = request.GET.get('q', '')
+    if not query.strip():
+        return JsonResponse([], safe=False)
+
+    stocks = await asearch_stocks(query, get_search_limit(request))
+    return JsonResponse(StockSerializer(stocks, many=True).data, safe=False)
+
+
+# Versioned snapshot URLs never change content; the bare URL must revalidate
+SNAPSHOT_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+@require_GET
+@async_login_required
+async def stock_universe_snapshot(request):
+    """
+    GET: The whole stock universe as {"version", "fields", "stocks": [[id, symbol, name], ...]}
+
+    Built once per universe version and served gzip-compressed with an
+    ETag, so clients can search locally and revalidate with a 304.
+    Requesting ?v=<version> of the current snapshot is cacheable forever.
+    """
+    snapshot = current_snapshot(await aget_universe_version())
+    if snapshot is None:
+        snapshot = await sync_to_async(get_universe_snapshot)()
+
+    if request.GET.get('v') == snapshot.version:
+        cache_control = f'private, max-age={SNAPSHOT_IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        cache_control = 'private, no-cache'
+
+    if snapshot.etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponse(status=304)
+    elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = HttpResponse(snapshot.gzipped, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(snapshot.body, content_type='application/json')
+
+    response['ETag'] = snapshot.etag
+    response['Cache-Control'] = cache_control
+    response['X-Universe-Version'] = snapshot.version
+    patch_vary_headers(response, ['Accept-Encoding', 'Authorization'])
+    return response
+
+
+STOCK_EXPORT_COLUMNS = {
+    field: field
+    for field in ['symbol', 'name', 'sector', 'industry', 'country', 'market_cap', 'ipo_year']
+}
+
+
+@require_GET
+@async_login_required
+async def stock_export(request):
+    """
+    GET: Stream the stock universe as CSV (default) or JSONL (?format=jsonl)
+
+    Accepts the stock list's screener filters. Rows are read and written
+    a chunk at a time, so memory stays flat however many are exported.
+    """
+    export_format = get_export_format(request)
+    if export_format is None:
+        return JsonResponse({'detail': "format must be 'csv' or 'jsonl'"}, status=400)
 
+    try:
+        filters = parse_stock_filters(request.GET)
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
 
+    stocks = Stock.objects.filter(**filters).order_by('symbol')
+    return stream_export(stocks, STOCK_EXPORT_COLUMNS, export_format, 'stocks')
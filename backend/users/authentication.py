@@ -1,46 +1,189 @@
 from rest_framework.authentication import BaseAuthentication
-from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
 from firebase_admin import auth
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from collections import OrderedDict
+import copy
+from functools import wraps
+import hashlib
 import os
-import firebase_utils  
+import threading
+import time
+import firebase_utils
+from backend.profiling import timed
 
 User = get_user_model()
 
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU map from ID token digests to the verified claims and the
+    id of the user they resolved to.
+
+    Entries expire at the token's own `exp` or after `ttl` seconds,
+    whichever comes first, so revoked tokens stop working within `ttl`.
+    Each hit returns its own copy of the user, so a request that changes
+    request.user never affects concurrent requests with the same token.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(id_token):
+        return hashlib.sha256(id_token.encode('utf-8')).hexdigest()
+
+    def get(self, id_token):
+        key = self.digest(id_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, claims, user_id, user = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+        return copy.copy(user)
+
+    def set(self, id_token, decoded, user):
+        expires_at = min(decoded.get('exp', 0), time.time() + self.ttl)
+        if expires_at <= time.time():
+            return
+
+        key = self.digest(id_token)
+        # Kept apart from the instance the caller goes on to use
+        entry = (expires_at, decoded, user.pk, copy.copy(user))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = VerifiedTokenCache(
+    max_size=settings.FIREBASE_TOKEN_CACHE_SIZE,
+    ttl=settings.FIREBASE_TOKEN_CACHE_TTL
+)
+
+
+def is_test_environment():
+    return (
+        os.getenv('DJANGO_SETTINGS_MODULE', '').endswith('test') or
+        'test' in os.getenv('DATABASE_URL', '') or
+        os.getenv('TESTING', '').lower() == 'true'
+    )
+
+
+def get_bearer_token(request):
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    return auth_header.split(" ")[1]
+
+
+def verify_token(id_token):
+    try:
+        # Initializes Firebase on the first verification in this process
+        if not firebase_utils.initialize_firebase():
+            raise AuthenticationFailed("Firebase not configured")
+
+        return auth.verify_id_token(id_token)
+    except Exception as e:
+        raise AuthenticationFailed(f"Invalid Firebase token: {str(e)}")
+
+
 class FirebaseAuthentication(BaseAuthentication):
     def authenticate(self, request):
+        with timed('auth'):
+            return self._authenticate(request)
+
+    def _authenticate(self, request):
         # Skip Firebase authentication in test environments
-        is_testing = (
-            os.getenv('DJANGO_SETTINGS_MODULE', '').endswith('test') or
-            'test' in os.getenv('DATABASE_URL', '') or
-            os.getenv('TESTING', '').lower() == 'true'
-        )
-        
-        if is_testing:
+        if is_test_environment():
             # In test environment, skip authentication or use a test user
             return None
-            
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
+
+        id_token = get_bearer_token(request)
+        if id_token is None:
             return None
 
-        id_token = auth_header.split(" ")[1]
-        try:
-            # Check if Firebase is properly initialized
-            if firebase_utils.firebase_config is None:
-                raise AuthenticationFailed("Firebase not configured")
-                
-            decoded = auth.verify_id_token(id_token)
-        except Exception as e:
-            raise AuthenticationFailed(f"Invalid Firebase token: {str(e)}")
+        # Recently verified token: skip the signature check and user query
+        user = token_cache.get(id_token)
+        if user is not None:
+            return (user, None)
+
+        decoded = verify_token(id_token)
 
         uid = decoded["uid"]
         try:
             user = User.objects.get(firebase_uid=uid)
         except User.DoesNotExist:
             raise AuthenticationFailed("No such user")
-        
+
+        token_cache.set(id_token, decoded, user)
         return (user, None)
 
 
+async def aauthenticate(request):
+    """
+    Async counterpart of FirebaseAuthentication for plain Django async views.
+
+    Returns the user or raises NotAuthenticated / AuthenticationFailed.
+    Signature checks run in a worker thread that is not the shared
+    sync thread, so a slow certificate fetch never blocks the event loop.
+    """
+    with timed('auth'):
+        return await _aauthenticate(request)
 
+
+async def _aauthenticate(request):
+    if is_test_environment():
+        # Honour APIClient.force_authenticate and Client.force_login in tests
+        user = getattr(request, '_force_auth_user', None) or await request.auser()
+        if user is None or not user.is_authenticated:
+            raise NotAuthenticated()
+        return user
+
+    id_token = get_bearer_token(request)
+    if id_token is None:
+        raise NotAuthenticated()
+
+    user = token_cache.get(id_token)
+    if user is not None:
+        return user
+
+    decoded = await sync_to_async(verify_token, thread_sensitive=False)(id_token)
+
+    try:
+        user = await User.objects.aget(firebase_uid=decoded["uid"])
+    except User.DoesNotExist:
+        raise AuthenticationFailed("No such user")
+
+    token_cache.set(id_token, decoded, user)
+    return user
+
+
+def async_login_required(view):
+    """Authenticate an async view with Firebase and set request.user"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            request.user = await aauthenticate(request)
+        except (NotAuthenticated, AuthenticationFailed) as e:
+            # Same status DRF returns for these views without an auth header scheme
+            return JsonResponse({"detail": str(e.detail)}, status=403)
+        return await view(request, *args, **kwargs)
+    return wrapper
@@ -1,6 +1,16 @@
-from django.test import TestCase
+import os
+import threading
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase, RequestFactory
 from django.contrib.auth import get_user_model
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
 from .models import User
+from . import authentication
+from .authentication import FirebaseAuthentication, VerifiedTokenCache
+import firebase_utils
 
 User = get_user_model()
 
@@ -144,3 +154,185 @@ class UserQueryTests(TestCase):
         
         self.assertTrue(exists)
         self.assertFalse(not_exists)
+
+
+class VerifiedTokenCacheTests(TestCase):
+    """Test cases for the verified Firebase token cache"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.cache = VerifiedTokenCache(max_size=2, ttl=60)
+        self.user = User.objects.create_user(
+            username='user1@example.com',
+            email='user1@example.com',
+            firebase_uid='uid_1'
+        )
+
+    def test_hit_returns_user(self):
+        """Test a cached token resolves to its user"""
+        self.cache.set('token-a', {'exp': time.time() + 3600}, self.user)
+        self.assertEqual(self.cache.get('token-a'), self.user)
+        self.assertIsNone(self.cache.get('token-b'))
+
+    def test_hits_return_independent_copies(self):
+        """Test changes to one request's user never reach other requests"""
+        self.cache.set('token-a', {'exp': time.time() + 3600}, self.user)
+        first = self.cache.get('token-a')
+        first.first_name = 'Changed'
+
+        second = self.cache.get('token-a')
+        self.assertIsNot(first, second)
+        self.assertEqual(second.pk, self.user.pk)
+        self.assertEqual(second.first_name, '')
+
+        self.user.first_name = 'Also changed'
+        self.assertEqual(self.cache.get('token-a').first_name, '')
+
+    def test_entry_expires_at_token_exp(self):
+        """Test entries never outlive the token's exp claim"""
+        self.cache.set('expired', {'exp': time.time() - 1}, self.user)
+        self.assertIsNone(self.cache.get('expired'))
+
+    def test_entry_expires_after_ttl(self):
+        """Test entries expire after the configured TTL for revocation"""
+        self.cache.set('token-a', {'exp': time.time() + 3600}, self.user)
+
+        with mock.patch('users.authentication.time.time', return_value=time.time() + 61):
+            self.assertIsNone(self.cache.get('token-a'))
+
+    def test_cache_is_bounded(self):
+        """Test least recently used entries are evicted"""
+        exp = {'exp': time.time() + 3600}
+        self.cache.set('token-a', exp, self.user)
+        self.cache.set('token-b', exp, self.user)
+        self.cache.get('token-a')
+        self.cache.set('token-c', exp, self.user)
+
+        self.assertIsNotNone(self.cache.get('token-a'))
+        self.assertIsNone(self.cache.get('token-b'))
+
+
+@mock.patch.dict(os.environ, {'TESTING': 'false', 'DATABASE_URL': '', 'DJANGO_SETTINGS_MODULE': 'backend.settings'})
+@mock.patch('firebase_utils.firebase_config', {'project_id': 'test'})
+class FirebaseAuthenticationCacheTests(TestCase):
+    """Test cases for token caching in FirebaseAuthentication"""
+
+    def setUp(self):
+        """Set up test data"""
+        authentication.token_cache.clear()
+        self.user = User.objects.create_user(
+            username='user1@example.com',
+            email='user1@example.com',
+            firebase_uid='uid_1'
+        )
+        self.request = RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer token-123')
+
+    def tearDown(self):
+        authentication.token_cache.clear()
+
+    @mock.patch('users.authentication.auth.verify_id_token')
+    def test_second_request_skips_verification_and_query(self, verify):
+        """Test a repeated token is neither re-verified nor re-queried"""
+        verify.return_value = {'uid': 'uid_1', 'exp': time.time() + 3600}
+
+        user, _ = FirebaseAuthentication().authenticate(self.request)
+        self.assertEqual(user, self.user)
+
+        with self.assertNumQueries(0):
+            user, _ = FirebaseAuthentication().authenticate(self.request)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(verify.call_count, 1)
+
+    @mock.patch('users.authentication.auth.verify_id_token')
+    def test_failed_verification_not_cached(self, verify):
+        """Test invalid tokens are verified again on every request"""
+        verify.side_effect = ValueError('bad token')
+
+        for _ in range(2):
+            with self.assertRaises(AuthenticationFailed):
+                FirebaseAuthentication().authenticate(self.request)
+
+        self.assertEqual(verify.call_count, 2)
+
+
+    @mock.patch('users.authentication.auth.verify_id_token')
+    def test_async_authentication_shares_cache(self, verify):
+        """Test the async authenticator verifies once and reuses the sync cache"""
+        verify.return_value = {'uid': 'uid_1', 'exp': time.time() + 3600}
+
+        user = async_to_sync(authentication.aauthenticate)(self.request)
+        self.assertEqual(user, self.user)
+
+        user, _ = FirebaseAuthentication().authenticate(self.request)
+        self.assertEqual(user, self.user)
+        self.assertEqual(verify.call_count, 1)
+
+    def test_async_authentication_requires_token(self):
+        """Test the async authenticator rejects requests without a bearer token"""
+        request = RequestFactory().get('/')
+        with self.assertRaises(NotAuthenticated):
+            async_to_sync(authentication.aauthenticate)(request)
+
+
+FIREBASE_ENV = {
+    'TESTING': 'false',
+    'DATABASE_URL': '',
+    'DJANGO_SETTINGS_MODULE': 'backend.settings',
+    **{var: 'x' for var in firebase_utils.required_env_vars},
+    'FIREBASE_PROJECT_ID': 'test-project',
+}
+
+
+@mock.patch.multiple(firebase_utils, firebase_config=None, _init_attempted=False, _init_error=None)
+class FirebaseInitializationTests(TestCase):
+    """Test cases for lazy Firebase initialization"""
+
+    @mock.patch.dict(os.environ, FIREBASE_ENV)
+    @mock.patch('firebase_utils.credentials.Certificate')
+    @mock.patch('firebase_utils.firebase_admin.initialize_app')
+    @mock.patch('firebase_utils.firebase_admin._apps', {})
+    def test_initializes_once_across_threads(self, initialize_app, certificate):
+        """Test concurrent first verifications initialize the app exactly once"""
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(firebase_utils.initialize_firebase()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [True] * 8)
+        self.assertEqual(initialize_app.call_count, 1)
+        self.assertEqual(firebase_utils.firebase_config['project_id'], 'test-project')
+
+    @mock.patch.dict(os.environ, {'TESTING': 'false', 'DATABASE_URL': '', 'FIREBASE_PROJECT_ID': ''})
+    def test_missing_configuration_fails_verification(self):
+        """Test a misconfigured worker fails verification instead of startup"""
+        for _ in range(2):
+            with self.assertRaises(Exception) as context:
+                firebase_utils.initialize_firebase()
+            self.assertIn('Missing required Firebase environment variables', str(context.exception))
+
+    def test_test_environment_without_configuration(self):
+        """Test initialization reports Firebase as unconfigured in tests"""
+        self.assertFalse(firebase_utils.initialize_firebase())
+
+    @mock.patch.dict(os.environ, {'FIREBASE_WARMUP': 'false'})
+    def test_warm_up_can_be_disabled(self):
+        """Test the warm-up hook does nothing when disabled"""
+        self.assertIsNone(firebase_utils.warm_up())
+
+    @mock.patch.dict(os.environ, {'FIREBASE_WARMUP': 'true'})
+    @mock.patch('firebase_utils.prefetch_signing_certs')
+    @mock.patch('firebase_utils.initialize_firebase', return_value=True)
+    def test_warm_up_prefetches_certs_in_background(self, initialize, prefetch):
+        """Test the warm-up thread initializes Firebase and prefetches certs"""
+        thread = firebase_utils.warm_up()
+        thread.join(timeout=5)
+
+        self.assertTrue(thread.daemon)
+        initialize.assert_called_once()
+        prefetch.assert_called_once()
@@ -22,6 +22,8 @@ class LoginView(APIView):
             return Response({"detail": "idToken required"}, status=400)
 
         try:
+            # First login in this process initializes Firebase
+            firebase_utils.initialize_firebase()
             decoded = auth.verify_id_token(id_token)
         except Exception as e:
             return Response({"detail": "Invalid token", "error": str(e)}, status=401)
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _version_key(user_id):
+    return f'watchlist:{user_id}:version'
+
+
+def _data_key(user_id, version):
+    return f'watchlist:{user_id}:v{version}'
+
+
+def get_watchlist_version(user_id):
+    return cache.get_or_set(_version_key(user_id), 1, timeout=None)
+
+
+def get_cached_watchlist(user_id, version=None):
+    """Return the user's serialized watchlist, or None on a miss"""
+    if version is None:
+        version = get_watchlist_version(user_id)
+    return cache.get(_data_key(user_id, version))
+
+
+def set_cached_watchlist(user_id, data, version=None):
+    """
+    Store a serialized watchlist under the version it was read at.
+
+    Passing the version captured before the database read means a write
+    that lands in between leaves this entry under a stale key.
+    """
+    if version is None:
+        version = get_watchlist_version(user_id)
+    cache.set(_data_key(user_id, version), data, timeout=settings.WATCHLIST_CACHE_TTL)
+
+
+# Async variants for the async views; the cache backend decides whether
+# these run natively or in a thread.
+
+async def aget_watchlist_version(user_id):
+    return await cache.aget_or_set(_version_key(user_id), 1, timeout=None)
+
+
+async def aget_cached_watchlist(user_id, version):
+    return await cache.aget(_data_key(user_id, version))
+
+
+async def aset_cached_watchlist(user_id, data, version):
+    await cache.aset(_data_key(user_id, version), data, timeout=settings.WATCHLIST_CACHE_TTL)
+
+
+def invalidate_watchlist(user_id):
+    """Bump the user's version so the cached watchlist is no longer read"""
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), 2, timeout=None)
+
+
+def _id_key(user_id):
+    return f'watchlist:{user_id}:id'
+
+
+def get_cached_watchlist_id(user_id):
+    return cache.get(_id_key(user_id))
+
+
+def set_cached_watchlist_id(user_id, watchlist_id):
+    # The id only changes if the watchlist is deleted, but that can happen
+    # in another process whose forget_watchlist_id this cache never sees,
+    # so the entry expires like the watchlist data does
+    cache.set(_id_key(user_id), watchlist_id, timeout=settings.WATCHLIST_CACHE_TTL)
+
+
+def forget_watchlist_id(user_id):
+    cache.delete(_id_key(user_id))
+
+
+async def aset_cached_watchlist_id(user_id, watchlist_id):
+    await cache.aset(_id_key(user_id), watchlist_id, timeout=settings.WATCHLIST_CACHE_TTL)
@@ -0,0 +1,144 @@
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, Max, Min, OuterRef
+from django.utils import timezone
+from stocks.models import Stock
+from watchlists.cache import invalidate_watchlist
+from watchlists.models import Watchlist, WatchlistStock
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete watchlist entries for stocks that no longer exist, watchlists '
+        'whose user no longer exists, and old empty watchlists, in small '
+        'primary-key ranges with one short transaction per chunk'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Width of each primary-key range scanned and deleted per transaction'
+        )
+        parser.add_argument(
+            '--throttle',
+            type=float,
+            default=0.0,
+            help='Seconds to sleep between chunks to limit load on the database'
+        )
+        parser.add_argument(
+            '--empty-min-age-days',
+            type=int,
+            default=7,
+            help='Only delete empty watchlists created at least this many days ago'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count what would be deleted without deleting anything'
+        )
+
+    def pk_ranges(self, model, chunk_size):
+        """Yield (low, high) half-open primary-key ranges covering the table"""
+        bounds = model.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            return
+        for low in range(bounds['low'], bounds['high'] + 1, chunk_size):
+            yield low, low + chunk_size
+
+    def released_watchers(self, chunk):
+        """Return {stock_id: entries} for the entries deleting chunk removes"""
+        if chunk.model is WatchlistStock:
+            entries = chunk
+        else:
+            # Entries go with their watchlist by cascade
+            entries = WatchlistStock.objects.filter(watchlist__in=chunk)
+        return Counter(entries.values_list('stock_id', flat=True))
+
+    def clean(self, label, queryset, watchlist_field, options):
+        """Delete queryset rows range by range; return the number of rows deleted"""
+        total = 0
+        for low, high in self.pk_ranges(queryset.model, options['chunk_size']):
+            rows = list(
+                queryset.filter(pk__gte=low, pk__lt=high).values_list('pk', watchlist_field)
+            )
+            if not rows:
+                continue
+
+            if options['dry_run']:
+                total += len(rows)
+            else:
+                watchlist_ids = {watchlist_id for _, watchlist_id in rows}
+                user_ids = set(
+                    Watchlist.objects.filter(pk__in=watchlist_ids).values_list('user_id', flat=True)
+                )
+                with transaction.atomic():
+                    # Filtering the original queryset re-checks its conditions, so a
+                    # row that became valid since it was selected is kept
+                    chunk = queryset.filter(pk__in=[pk for pk, _ in rows])
+                    released = self.released_watchers(chunk)
+                    _, per_model = chunk.delete()
+                    total += per_model.get(queryset.model._meta.label, 0)
+
+                    by_count = {}
+                    for stock_id, count in released.items():
+                        by_count.setdefault(count, []).append(stock_id)
+                    for count, stock_ids in by_count.items():
+                        Stock.objects.filter(pk__in=stock_ids).adjust_watcher_count(-count)
+                # Cached watchlists of the affected users are now stale
+                for user_id in user_ids:
+                    invalidate_watchlist(user_id)
+
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'{label}: {total} rows up to id {high - 1}')
+
+            if options['throttle'] > 0:
+                time.sleep(options['throttle'])
+
+        return total
+
+    def handle(self, *args, **options):
+        options['chunk_size'] = max(1, options['chunk_size'])
+        dry_run = options['dry_run']
+
+        # Entries left behind by stocks or watchlists removed outside the ORM
+        dangling_entries = WatchlistStock.objects.filter(
+            ~Exists(Stock.objects.filter(pk=OuterRef('stock_id'))) |
+            ~Exists(Watchlist.objects.filter(pk=OuterRef('watchlist_id')))
+        )
+        entry_count = self.clean('Dangling entries', dangling_entries, 'watchlist_id', options)
+
+        orphaned = Watchlist.objects.filter(
+            ~Exists(User.objects.filter(pk=OuterRef('user_id')))
+        )
+        orphaned_count = self.clean('Orphaned watchlists', orphaned, 'pk', options)
+
+        # Recent empty watchlists are skipped: one is created on a user's
+        # first read and may be about to get its first stock
+        cutoff = timezone.now() - timedelta(days=options['empty_min_age_days'])
+        empty = Watchlist.objects.filter(
+            ~Exists(WatchlistStock.objects.filter(watchlist_id=OuterRef('pk'))),
+            created_at__lt=cutoff
+        )
+        empty_count = self.clean('Empty watchlists', empty, 'pk', options)
+
+        # Summary
+        self.stdout.write('\n' + '='*50)
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS('Dry run, nothing deleted'))
+            verb = 'to delete'
+        else:
+            self.stdout.write(self.style.SUCCESS('Watchlist cleanup complete'))
+            verb = 'deleted'
+        self.stdout.write(f'Dangling watchlist entries {verb}: {entry_count}')
+        self.stdout.write(f'Orphaned watchlists {verb}: {orphaned_count}')
+        self.stdout.write(f'Empty watchlists {verb}: {empty_count}')
+        self.stdout.write('='*50)
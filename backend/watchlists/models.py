@@ -1,6 +1,21 @@
 from django.db import models
+from django.db.models import Count, Prefetch
 from users.models import User
 
+
+class WatchlistQuerySet(models.QuerySet):
+    def with_stocks(self):
+        """Load entries with their stocks and the entry count in two queries total"""
+        return self.annotate(
+            stock_count=Count('watchliststock')
+        ).prefetch_related(
+            Prefetch(
+                'watchliststock_set',
+                queryset=WatchlistStock.objects.select_related('stock')
+            )
+        )
+
+
 # Create your models here.
 class Watchlist(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='watchlist')
@@ -8,6 +23,8 @@ class Watchlist(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = WatchlistQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         # Always set name to 'My Watchlist'
         self.name = 'My Watchlist'
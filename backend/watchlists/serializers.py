@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from backend.profiling import ProfiledSerializerMixin
 from .models import Watchlist, WatchlistStock
 from stocks.models import Stock
 from stocks.serializers import StockSerializer
 
 
-class WatchlistStockSerializer(serializers.ModelSerializer):
+class WatchlistStockSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     stock = StockSerializer(read_only=True)
     stock_id = serializers.IntegerField(write_only=True)
     
@@ -14,7 +15,7 @@ class WatchlistStockSerializer(serializers.ModelSerializer):
         read_only_fields = ['added_at']
 
 
-class WatchlistSerializer(serializers.ModelSerializer):
+class WatchlistSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     stocks = WatchlistStockSerializer(source='watchliststock_set', many=True, read_only=True)
     stock_count = serializers.SerializerMethodField()
     
@@ -24,4 +25,7 @@ class WatchlistSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at', 'name']  # name is read-only
     
     def get_stock_count(self, obj):
+        # Annotated by Watchlist.objects.with_stocks()
+        if hasattr(obj, 'stock_count'):
+            return obj.stock_count
         return obj.watchliststock_set.count()
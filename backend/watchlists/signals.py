@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .cache import forget_watchlist_id, invalidate_watchlist
+from .models import Watchlist
+
+
+@receiver(post_delete, sender=Watchlist)
+def watchlist_deleted(sender, instance, **kwargs):
+    """Drop the cached id and data so the next request recreates the watchlist"""
+    forget_watchlist_id(instance.user_id)
+    invalidate_watchlist(instance.user_id)
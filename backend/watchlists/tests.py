@@ -1,10 +1,19 @@
+import json
+from io import StringIO
+from datetime import timedelta
 from django.test import TestCase
+from django.core.management import call_command
 from django.contrib.auth import get_user_model
 from django.db import IntegrityError
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.core.cache import cache
+from unittest import mock
+from rest_framework.test import APIClient
+from .management.commands.clean_watchlists import Command as CleanWatchlistsCommand
 from .models import Watchlist, WatchlistStock
-from stocks.models import Stock
+from stocks.models import Stock, QuoteSnapshot
+from stocks.resolver import stock_resolver
 
 User = get_user_model()
 
@@ -354,3 +363,631 @@ class WatchlistBusinessLogicTests(TestCase):
         
         self.watchlist.refresh_from_db()
         self.assertGreater(self.watchlist.updated_at, original_updated_at)
+
+
+class WatchlistViewQueryTests(TestCase):
+    """Test cases for the number of queries used to read a watchlist"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        self.watchlist = Watchlist.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def add_stocks(self, count):
+        stocks = Stock.objects.bulk_create([
+            Stock(symbol=f'S{i:04d}', name=f'Stock {i}') for i in range(count)
+        ])
+        WatchlistStock.objects.bulk_create([
+            WatchlistStock(watchlist=self.watchlist, stock=stock) for stock in stocks
+        ])
+
+    def test_small_watchlist_query_count(self):
+        """Test reading a watchlist with one stock takes two queries"""
+        self.add_stocks(1)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/watchlists/')
+
+        self.assertEqual(response.json()['stock_count'], 1)
+
+    def test_large_watchlist_query_count(self):
+        """Test query count does not grow with watchlist size"""
+        self.add_stocks(50)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/watchlists/')
+
+        data = response.json()
+        self.assertEqual(data['stock_count'], 50)
+        self.assertEqual(len(data['stocks']), 50)
+        self.assertEqual(data['stocks'][0]['stock']['symbol'], 'S0000')
+
+    def test_watchlist_created_on_first_read(self):
+        """Test a watchlist is created for users without one"""
+        self.watchlist.delete()
+
+        response = self.client.get('/api/watchlists/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['stock_count'], 0)
+        self.assertTrue(Watchlist.objects.filter(user=self.user).exists())
+
+
+class WatchlistCacheTests(TestCase):
+    """Test cases for the per-user watchlist read cache"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        self.watchlist = Watchlist.objects.create(user=self.user)
+        self.stock = Stock.objects.create(symbol='AAPL', name='Apple Inc.')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_repeat_read_served_from_cache(self):
+        """Test a second read does not touch the database"""
+        self.client.get('/api/watchlists/')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/watchlists/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['stock_count'], 0)
+
+    def test_add_stock_invalidates_cache(self):
+        """Test adding a stock is visible on the next read"""
+        self.client.get('/api/watchlists/')
+        self.client.post('/api/watchlists/stocks/', {'stock_id': self.stock.id}, format='json')
+
+        response = self.client.get('/api/watchlists/')
+        self.assertEqual(response.json()['stock_count'], 1)
+
+    def test_remove_stock_invalidates_cache(self):
+        """Test removing a stock is visible on the next read"""
+        WatchlistStock.objects.create(watchlist=self.watchlist, stock=self.stock)
+        self.assertEqual(self.client.get('/api/watchlists/').json()['stock_count'], 1)
+
+        self.client.delete(f'/api/watchlists/stocks/{self.stock.id}/')
+
+        response = self.client.get('/api/watchlists/')
+        self.assertEqual(response.json()['stock_count'], 0)
+
+    def test_cache_is_per_user(self):
+        """Test users never see each other's cached watchlist"""
+        other = User.objects.create_user(
+            username='other@example.com',
+            email='other@example.com',
+            firebase_uid='other_firebase_uid'
+        )
+        WatchlistStock.objects.create(watchlist=self.watchlist, stock=self.stock)
+        self.client.get('/api/watchlists/')
+
+        self.client.force_authenticate(user=other)
+        response = self.client.get('/api/watchlists/')
+        self.assertEqual(response.json()['stock_count'], 0)
+
+
+class WatchlistBulkStockViewTests(TestCase):
+    """Test cases for bulk adding and removing watchlist stocks"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        self.watchlist = Watchlist.objects.create(user=self.user)
+        self.stocks = Stock.objects.bulk_create([
+            Stock(symbol=f'S{i:04d}', name=f'Stock {i}') for i in range(40)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def statuses(self, response):
+        return {str(r['item']): r['status'] for r in response.json()['results']}
+
+    def test_bulk_add_reports_per_item_outcome(self):
+        """Test bulk add reports added, existing and unknown items"""
+        WatchlistStock.objects.create(watchlist=self.watchlist, stock=self.stocks[0])
+
+        response = self.client.post('/api/watchlists/stocks/bulk/', {
+            'symbols': ['s0000', 'S0001', 'NOPE'],
+            'stock_ids': [self.stocks[2].id]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.statuses(response), {
+            'S0000': 'already_exists',
+            'S0001': 'added',
+            'NOPE': 'not_found',
+            str(self.stocks[2].id): 'added',
+        })
+        self.assertEqual(WatchlistStock.objects.filter(watchlist=self.watchlist).count(), 3)
+
+    def test_bulk_add_query_count_is_constant(self):
+        """Test bulk add uses the same number of queries for any list size"""
+        # Resolve, watchlist, existing check, savepoint, insert, read back,
+        # counter update, release
+        with self.assertNumQueries(8):
+            self.client.post('/api/watchlists/stocks/bulk/', {
+                'symbols': [stock.symbol for stock in self.stocks]
+            }, format='json')
+
+        self.assertEqual(WatchlistStock.objects.filter(watchlist=self.watchlist).count(), 40)
+
+    def test_bulk_remove(self):
+        """Test bulk remove deletes present entries with one delete"""
+        WatchlistStock.objects.bulk_create([
+            WatchlistStock(watchlist=self.watchlist, stock=stock) for stock in self.stocks[:10]
+        ])
+
+        # Resolve, savepoint, locked present check, delete, counter update, release
+        with self.assertNumQueries(6):
+            response = self.client.delete('/api/watchlists/stocks/bulk/', {
+                'symbols': [stock.symbol for stock in self.stocks[:5]] + ['S0039', 'NOPE']
+            }, format='json')
+
+        statuses = self.statuses(response)
+        self.assertEqual(statuses['S0000'], 'removed')
+        self.assertEqual(statuses['S0039'], 'not_in_watchlist')
+        self.assertEqual(statuses['NOPE'], 'not_found')
+        self.assertEqual(WatchlistStock.objects.filter(watchlist=self.watchlist).count(), 5)
+
+    def test_bulk_requires_items(self):
+        """Test bulk endpoints validate their input"""
+        response = self.client.post('/api/watchlists/stocks/bulk/', {}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/watchlists/stocks/bulk/', {'stock_ids': ['x']}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_add_invalidates_cached_watchlist(self):
+        """Test bulk add is visible on the next watchlist read"""
+        self.client.get('/api/watchlists/')
+        self.client.post('/api/watchlists/stocks/bulk/', {'symbols': ['S0001']}, format='json')
+
+        response = self.client.get('/api/watchlists/')
+        self.assertEqual(response.json()['stock_count'], 1)
+
+
+
+class WatchlistStockAddTests(TestCase):
+    """Test cases for adding a single stock to a watchlist"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        self.stock = Stock.objects.create(symbol='AAPL', name='Apple Inc.')
+        self.other_stock = Stock.objects.create(symbol='MSFT', name='Microsoft Corporation')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_add_stock_by_symbol(self):
+        """Test adding a stock by symbol creates the watchlist and entry"""
+        response = self.client.post('/api/watchlists/stocks/', {'symbol': 'aapl'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['stock']['symbol'], 'AAPL')
+        self.assertEqual(WatchlistStock.objects.filter(watchlist__user=self.user).count(), 1)
+
+    def test_add_stock_by_id(self):
+        """Test adding a stock by id"""
+        response = self.client.post('/api/watchlists/stocks/', {'stock_id': self.stock.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post('/api/watchlists/stocks/', {'stock_id': 999999}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_duplicate_add_is_rejected(self):
+        """Test adding the same stock twice leaves a single entry"""
+        self.client.post('/api/watchlists/stocks/', {'symbol': 'AAPL'}, format='json')
+        response = self.client.post('/api/watchlists/stocks/', {'symbol': 'AAPL'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['detail'], 'Stock already exists in your watchlist')
+        self.assertEqual(WatchlistStock.objects.filter(watchlist__user=self.user).count(), 1)
+
+    def test_warm_add_query_count(self):
+        """Test a warm add is one insert, one read and the counter update"""
+        self.client.post('/api/watchlists/stocks/', {'symbol': 'AAPL'}, format='json')
+        stock_resolver.get_by_symbols(['MSFT'])
+
+        # Plus the savepoint and release around them
+        with self.assertNumQueries(5):
+            response = self.client.post('/api/watchlists/stocks/', {'symbol': 'MSFT'}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_unknown_symbol_creates_stock(self):
+        """Test adding an unknown symbol creates the stock"""
+        response = self.client.post('/api/watchlists/stocks/', {'symbol': 'NEWCO', 'name': 'New Co'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Stock.objects.filter(symbol='NEWCO', name='New Co').exists())
+
+    def test_stale_watchlist_id_is_recovered(self):
+        """Test deleting a watchlist drops its cached id"""
+        self.client.post('/api/watchlists/stocks/', {'symbol': 'AAPL'}, format='json')
+        Watchlist.objects.filter(user=self.user).delete()
+
+        response = self.client.post('/api/watchlists/stocks/', {'symbol': 'MSFT'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(WatchlistStock.objects.filter(watchlist__user=self.user).count(), 1)
+
+    def test_watchlist_deleted_by_another_process_is_recreated(self):
+        """Test a cached id whose watchlist is gone is dropped and the add retried"""
+        self.client.post('/api/watchlists/stocks/', {'symbol': 'AAPL'}, format='json')
+        stale_id = Watchlist.objects.get(user=self.user).id
+
+        # The other process's signal cannot reach this process's cache
+        Watchlist.objects.filter(user=self.user).delete()
+        cache.set(f'watchlist:{self.user.id}:id', stale_id)
+
+        response = self.client.post('/api/watchlists/stocks/', {'symbol': 'MSFT'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        watchlist = Watchlist.objects.get(user=self.user)
+        self.assertNotEqual(watchlist.id, stale_id)
+        self.assertEqual(list(WatchlistStock.objects.filter(watchlist=watchlist).values_list('stock__symbol', flat=True)), ['MSFT'])
+        self.assertFalse(WatchlistStock.objects.filter(watchlist_id=stale_id).exists())
+        self.assertEqual(cache.get(f'watchlist:{self.user.id}:id'), watchlist.id)
+
+
+class WatchlistAsyncViewTests(TestCase):
+    """Test cases for the async watchlist view"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        watchlist = Watchlist.objects.create(user=self.user)
+        stock = Stock.objects.create(symbol='AAPL', name='Apple Inc.')
+        WatchlistStock.objects.create(watchlist=watchlist, stock=stock)
+
+    async def test_get_watchlist_async(self):
+        """Test the watchlist is served from the async client"""
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get('/api/watchlists/')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['stock_count'], 1)
+        self.assertEqual(data['stocks'][0]['stock']['symbol'], 'AAPL')
+
+    async def test_unauthenticated_request_rejected(self):
+        """Test requests without credentials are rejected"""
+        response = await self.async_client.get('/api/watchlists/')
+        self.assertEqual(response.status_code, 403)
+
+    async def test_only_get_allowed(self):
+        """Test the read endpoint rejects other methods"""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.put('/api/watchlists/')
+        self.assertEqual(response.status_code, 405)
+
+
+class WatchlistNewsViewTests(TestCase):
+    """Test cases for the watchlist news endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        watchlist = Watchlist.objects.create(user=self.user)
+        for symbol, name in [('AAPL', 'Apple Inc.'), ('ON', 'ON Semiconductor')]:
+            stock = Stock.objects.create(symbol=symbol, name=name)
+            WatchlistStock.objects.create(watchlist=watchlist, stock=stock)
+
+    @mock.patch('stocks.news.fetch_news')
+    async def test_news_fetched_in_one_call(self, fetch):
+        """Test every watched stock is searched in a single batched fetch"""
+        headline = {'headline': 'Apple ships', 'url': 'https://example.com/a'}
+        fetch.return_value = ({'AAPL': [headline]}, [])
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get('/api/watchlists/news/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'news': {'AAPL': [headline], 'ON': []},
+            'degraded': False
+        })
+        fetch.assert_called_once()
+        self.assertEqual(
+            sorted(fetch.call_args.args[0]),
+            [('AAPL', 'Apple Inc.'), ('ON', 'ON Semiconductor')]
+        )
+
+    async def test_requires_login(self):
+        """Test anonymous users cannot read watchlist news"""
+        response = await self.async_client.get('/api/watchlists/news/')
+        self.assertEqual(response.status_code, 403)
+
+
+class WatchlistExportTests(TestCase):
+    """Test cases for the streaming watchlist export"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        watchlist = Watchlist.objects.create(user=self.user)
+        for symbol, name in [('MSFT', 'Microsoft, Corp.'), ('AAPL', 'Apple Inc.')]:
+            stock = Stock.objects.create(symbol=symbol, name=name, sector='Technology')
+            WatchlistStock.objects.create(watchlist=watchlist, stock=stock)
+
+        other = User.objects.create_user(
+            username='other@example.com',
+            email='other@example.com',
+            firebase_uid='other_firebase_uid'
+        )
+        WatchlistStock.objects.create(
+            watchlist=Watchlist.objects.create(user=other),
+            stock=Stock.objects.create(symbol='NVDA', name='NVIDIA Corporation')
+        )
+
+    async def export(self, **params):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get('/api/watchlists/export/', params)
+        body = b''.join([chunk async for chunk in response.streaming_content]) if response.streaming else response.content
+        return response, body.decode('utf-8')
+
+    async def test_csv_export(self):
+        """Test the watchlist streams as CSV in the order stocks were added"""
+        response, body = await self.export()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('filename="watchlist.csv"', response['Content-Disposition'])
+        lines = body.splitlines()
+        self.assertEqual(lines[0], 'symbol,name,sector,industry,market_cap,added_at')
+        self.assertTrue(lines[1].startswith('MSFT,"Microsoft, Corp.",Technology,,,'))
+        self.assertTrue(lines[2].startswith('AAPL,'))
+        self.assertEqual(len(lines), 3)
+
+    async def test_jsonl_export(self):
+        """Test the watchlist streams as one JSON object per line"""
+        response, body = await self.export(format='jsonl')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['symbol'] for row in rows], ['MSFT', 'AAPL'])
+        self.assertIsNone(rows[0]['market_cap'])
+        self.assertIn('added_at', rows[0])
+
+    async def test_unknown_format_rejected(self):
+        """Test only CSV and JSONL are offered"""
+        response, body = await self.export(format='xml')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_requires_authentication(self):
+        """Test anonymous exports are rejected"""
+        response = await self.async_client.get('/api/watchlists/export/')
+        self.assertEqual(response.status_code, 403)
+
+
+class WatchlistQuotesViewTests(TestCase):
+    """Test cases for the watchlist joined with latest quotes"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser@example.com',
+            email='testuser@example.com',
+            firebase_uid='test_firebase_uid'
+        )
+        watchlist = Watchlist.objects.create(user=self.user)
+        for symbol in ['AAPL', 'MSFT']:
+            stock = Stock.objects.create(symbol=symbol, name=symbol)
+            WatchlistStock.objects.create(watchlist=watchlist, stock=stock)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @mock.patch('stocks.quotes.fetch_quotes')
+    def test_quotes_joined_in_one_fetch(self, fetch):
+        """Test every stock gets its quote from a single batched fetch"""
+        fetch.return_value = {'AAPL': {'price': 190.0, 'change': 1.5, 'as_of': '2024-01-02'}}
+
+        response = self.client.get('/api/watchlists/quotes/')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        quotes = {item['stock']['symbol']: item['quote'] for item in data['stocks']}
+        self.assertEqual(quotes['AAPL']['price'], 190.0)
+        self.assertIsNone(quotes['MSFT'])
+        self.assertFalse(data['quotes_degraded'])
+        fetch.assert_called_once()
+        self.assertEqual(sorted(fetch.call_args.args[0]), ['AAPL', 'MSFT'])
+
+    @mock.patch('stocks.quotes.fetch_quotes')
+    def test_repeat_request_served_from_cache(self, fetch):
+        """Test repeat requests neither fetch quotes nor query the database"""
+        fetch.return_value = {}
+        self.client.get('/api/watchlists/quotes/')
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/watchlists/quotes/')
+        self.assertEqual(fetch.call_count, 1)
+
+    @mock.patch('stocks.quotes.fetch_quotes')
+    def test_fresh_snapshots_are_served_without_a_fetch(self, fetch):
+        """Test only stocks without a fresh snapshot are fetched upstream"""
+        fetch.return_value = {'MSFT': {'price': 410.0, 'as_of': '2024-01-02'}}
+        QuoteSnapshot.objects.create(
+            stock=Stock.objects.get(symbol='AAPL'), last_price=190.0, change=1.5
+        )
+        self.client.get('/api/watchlists/')
+
+        # The watchlist is cached; one query loads every entry's snapshot
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/watchlists/quotes/')
+
+        quotes = {item['stock']['symbol']: item['quote'] for item in response.json()['stocks']}
+        self.assertEqual(quotes['AAPL']['price'], 190.0)
+        self.assertEqual(quotes['MSFT']['price'], 410.0)
+        fetch.assert_called_once_with(['MSFT'])
+
+    @mock.patch('stocks.quotes.fetch_quotes')
+    def test_stale_snapshots_are_refetched(self, fetch):
+        """Test a snapshot older than QUOTE_SNAPSHOT_MAX_AGE is not served"""
+        fetch.return_value = {}
+        QuoteSnapshot.objects.create(
+            stock=Stock.objects.get(symbol='AAPL'),
+            last_price=190.0,
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        with self.settings(QUOTE_SNAPSHOT_MAX_AGE=60):
+            response = self.client.get('/api/watchlists/quotes/')
+
+        quotes = {item['stock']['symbol']: item['quote'] for item in response.json()['stocks']}
+        self.assertIsNone(quotes['AAPL'])
+        self.assertEqual(sorted(fetch.call_args.args[0]), ['AAPL', 'MSFT'])
+
+    def test_plain_watchlist_has_no_quotes(self):
+        """Test the plain watchlist endpoint never fetches quotes"""
+        with mock.patch('stocks.quotes.fetch_quotes') as fetch:
+            self.client.get('/api/watchlists/')
+        fetch.assert_not_called()
+
+
+class CleanWatchlistsCommandTests(TestCase):
+    """Test cases for the clean_watchlists management command"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.stock = Stock.objects.create(symbol='AAPL', name='Apple Inc.')
+        self.users = [
+            User.objects.create_user(
+                username=f'user{i}@example.com',
+                email=f'user{i}@example.com',
+                firebase_uid=f'uid_{i}'
+            )
+            for i in range(3)
+        ]
+
+        # Kept: has a valid entry
+        self.kept = Watchlist.objects.create(user=self.users[0])
+        WatchlistStock.objects.create(watchlist=self.kept, stock=self.stock)
+        # Dangling entry for a stock removed outside the ORM
+        self.dangling = WatchlistStock.objects.create(watchlist=self.kept, stock_id=999999)
+
+        # Old and new empty watchlists
+        self.old_empty = Watchlist.objects.create(user=self.users[1])
+        Watchlist.objects.filter(pk=self.old_empty.pk).update(
+            created_at=timezone.now() - timedelta(days=30)
+        )
+        self.new_empty = Watchlist.objects.create(user=self.users[2])
+
+        # Watchlist whose user no longer exists
+        self.orphaned = Watchlist.objects.create(user_id=999999)
+        WatchlistStock.objects.create(watchlist=self.orphaned, stock=self.stock)
+
+    def tearDown(self):
+        # TestCase checks deferred foreign keys after each test
+        WatchlistStock.objects.filter(pk=self.dangling.pk).delete()
+        Watchlist.objects.filter(pk=self.orphaned.pk).delete()
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('clean_watchlists', *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_dangling_orphaned_and_old_empty(self):
+        """Test each kind of stale row is removed and valid rows are kept"""
+        output = self.run_command('--chunk-size', '1')
+
+        self.assertIn('Dangling watchlist entries deleted: 1', output)
+        self.assertIn('Orphaned watchlists deleted: 1', output)
+        self.assertIn('Empty watchlists deleted: 1', output)
+        self.assertEqual(
+            set(Watchlist.objects.values_list('pk', flat=True)),
+            {self.kept.pk, self.new_empty.pk}
+        )
+        self.assertEqual(list(WatchlistStock.objects.values_list('stock_id', flat=True)), [self.stock.id])
+
+    def test_dry_run_deletes_nothing(self):
+        """Test dry run only reports counts"""
+        output = self.run_command('--dry-run')
+
+        self.assertIn('Dangling watchlist entries to delete: 1', output)
+        self.assertIn('Orphaned watchlists to delete: 1', output)
+        self.assertEqual(Watchlist.objects.count(), 4)
+        self.assertEqual(WatchlistStock.objects.count(), 3)
+
+    def test_cleanup_invalidates_cached_watchlist(self):
+        """Test users whose entries were removed see the change on the next read"""
+        client = APIClient()
+        client.force_authenticate(user=self.users[0])
+        self.assertEqual(client.get('/api/watchlists/').json()['stock_count'], 2)
+
+        self.run_command()
+
+        self.assertEqual(client.get('/api/watchlists/').json()['stock_count'], 1)
+
+    def test_cascaded_entries_release_their_watchers(self):
+        """Test entries deleted with an orphaned watchlist decrement watcher counts"""
+        Stock.objects.filter(pk=self.stock.pk).update(watcher_count=2)
+
+        self.run_command()
+
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.watcher_count, 1)
+
+    def test_rows_that_became_valid_are_kept(self):
+        """Test the delete re-checks the cleanup conditions inside its transaction"""
+        original = CleanWatchlistsCommand.released_watchers
+
+        def add_entry_first(command, chunk):
+            # A stock is added to the empty watchlist after it was selected
+            if chunk.model is Watchlist and chunk.filter(pk=self.old_empty.pk).exists():
+                WatchlistStock.objects.create(watchlist=self.old_empty, stock=self.stock)
+            return original(command, chunk)
+
+        with mock.patch.object(CleanWatchlistsCommand, 'released_watchers', add_entry_first):
+            output = self.run_command()
+
+        self.assertIn('Empty watchlists deleted: 0', output)
+        self.assertTrue(Watchlist.objects.filter(pk=self.old_empty.pk).exists())
+
+    @mock.patch('watchlists.management.commands.clean_watchlists.time.sleep')
+    def test_throttle_sleeps_between_chunks(self, sleep):
+        """Test the throttle pauses after each chunk that matched rows"""
+        self.run_command('--chunk-size', '1', '--throttle', '0.5')
+
+        self.assertEqual(sleep.call_count, 3)
+        sleep.assert_called_with(0.5)
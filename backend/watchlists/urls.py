@@ -1,14 +1,22 @@
 from django.urls import path
 from .views import (
-    WatchlistView,
-    WatchlistStockView
+    watchlist_detail,
+    watchlist_quotes,
+    watchlist_news,
+    watchlist_export,
+    WatchlistStockView,
+    WatchlistBulkStockView
 )
 
 urlpatterns = [
     # Single watchlist per user
-    path('', WatchlistView.as_view(), name='user-watchlist'),
+    path('', watchlist_detail, name='user-watchlist'),
+    path('quotes/', watchlist_quotes, name='user-watchlist-quotes'),
+    path('news/', watchlist_news, name='user-watchlist-news'),
+    path('export/', watchlist_export, name='user-watchlist-export'),
     
     # Stock operations within the user's watchlist
     path('stocks/', WatchlistStockView.as_view(), name='watchlist-add-stock'),
     path('stocks/<int:stock_id>/', WatchlistStockView.as_view(), name='watchlist-remove-stock'),
+    path('stocks/bulk/', WatchlistBulkStockView.as_view(), name='watchlist-bulk-stocks'),
 ]
@@ -1,30 +1,164 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from asgiref.sync import sync_to_async
 from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
 
 from .models import Watchlist, WatchlistStock
 from stocks.models import Stock
+from stocks.news import get_latest_news
+from stocks.quotes import get_cached_quotes, load_missing_quotes, snapshot_quotes
+from stocks.resolver import stock_resolver
+from backend.exports import get_export_format, stream_export
+from users.authentication import async_login_required
 from .serializers import (
     WatchlistSerializer, 
     WatchlistStockSerializer
 )
+from .cache import (
+    aget_watchlist_version,
+    aget_cached_watchlist,
+    aset_cached_watchlist,
+    invalidate_watchlist,
+    get_cached_watchlist_id,
+    set_cached_watchlist_id,
+    aset_cached_watchlist_id,
+    forget_watchlist_id
+)
+
+
+def get_watchlist_id(user):
+    """Return the id of the user's watchlist, creating it if needed"""
+    watchlist_id = get_cached_watchlist_id(user.id)
+    if watchlist_id is None:
+        watchlist, created = Watchlist.objects.get_or_create(
+            user=user,
+            defaults={'name': 'My Watchlist'}
+        )
+        watchlist_id = watchlist.id
+        set_cached_watchlist_id(user.id, watchlist_id)
+    return watchlist_id
+
 
+async def aload_watchlist(user):
+    """Return the user's serialized watchlist, creating it if needed"""
+    version = await aget_watchlist_version(user.id)
+    cached = await aget_cached_watchlist(user.id, version)
+    if cached is not None:
+        return cached
 
-class WatchlistView(APIView):
+    # Constant number of queries regardless of watchlist size
+    watchlist = await Watchlist.objects.with_stocks().filter(user=user).afirst()
+
+    if watchlist is None:
+        watchlist, created = await Watchlist.objects.aget_or_create(
+            user=user,
+            defaults={'name': 'My Watchlist'}
+        )
+        watchlist = await Watchlist.objects.with_stocks().aget(pk=watchlist.pk)
+
+    await aset_cached_watchlist_id(user.id, watchlist.id)
+    data = WatchlistSerializer(watchlist).data
+    await aset_cached_watchlist(user.id, data, version)
+    return data
+
+
+@require_GET
+@async_login_required
+async def watchlist_detail(request):
     """
     GET: Get the user's single watchlist (create if doesn't exist)
+
+    Async view: under ASGI the cache and database round trips are awaited
+    on the event loop instead of holding a worker thread per request.
     """
-    permission_classes = [permissions.IsAuthenticated]
-    
-    def get(self, request):
-        """Get or create user's watchlist"""
-        watchlist, created = Watchlist.objects.get_or_create(
-            user=request.user,
-            defaults={'name': 'My Watchlist'}
+    return JsonResponse(await aload_watchlist(request.user))
+
+
+@require_GET
+@async_login_required
+async def watchlist_quotes(request):
+    """
+    GET: The user's watchlist with the latest quote for every stock
+
+    Quotes are cached per symbol across users (see stocks.quotes). On a
+    miss the stock's QuoteSnapshot is used if refresh_quotes wrote it
+    recently; only missing or stale ones are fetched, in one batched
+    AI-service call. No analysis is triggered.
+    """
+    data = await aload_watchlist(request.user)
+    symbols = [item['stock']['symbol'] for item in data['stocks']]
+    quotes, missing = await sync_to_async(get_cached_quotes, thread_sensitive=False)(symbols)
+
+    degraded = False
+    if missing:
+        entries = WatchlistStock.objects.filter(
+            watchlist__user=request.user,
+            stock__symbol__in=missing
+        ).select_related('stock__quote')
+        snapshots = snapshot_quotes([entry.stock async for entry in entries])
+        loaded, degraded = await sync_to_async(load_missing_quotes, thread_sensitive=False)(
+            missing, snapshots
         )
-        serializer = WatchlistSerializer(watchlist)
-        return Response(serializer.data)
+        quotes.update(loaded)
+
+    stocks = [
+        {**item, 'quote': quotes.get(item['stock']['symbol'])}
+        for item in data['stocks']
+    ]
+    return JsonResponse({**data, 'stocks': stocks, 'quotes_degraded': degraded})
+
+
+@require_GET
+@async_login_required
+async def watchlist_news(request):
+    """
+    GET: Recent headlines for every stock on the user's watchlist
+
+    Fetched through the AI service's combined NewsAPI queries and cached
+    per symbol across users (see stocks.news).
+    """
+    data = await aload_watchlist(request.user)
+    stocks = [(item['stock']['symbol'], item['stock']['name']) for item in data['stocks']]
+    news, degraded = await sync_to_async(get_latest_news, thread_sensitive=False)(stocks)
+
+    return JsonResponse({
+        'news': {symbol: news.get(symbol.upper(), []) for symbol, _ in stocks},
+        'degraded': degraded
+    })
+
+
+WATCHLIST_EXPORT_COLUMNS = {
+    'symbol': 'stock__symbol',
+    'name': 'stock__name',
+    'sector': 'stock__sector',
+    'industry': 'stock__industry',
+    'market_cap': 'stock__market_cap',
+    'added_at': 'added_at',
+}
+
+
+@require_GET
+@async_login_required
+async def watchlist_export(request):
+    """
+    GET: Stream the user's watchlist as CSV (default) or JSONL (?format=jsonl)
+
+    One query streamed a chunk at a time; a user without a watchlist gets
+    just the CSV header.
+    """
+    export_format = get_export_format(request)
+    if export_format is None:
+        return JsonResponse({'detail': "format must be 'csv' or 'jsonl'"}, status=400)
+
+    entries = WatchlistStock.objects.filter(
+        watchlist__user_id=request.user.id
+    ).order_by('added_at', 'id')
+    return stream_export(entries, WATCHLIST_EXPORT_COLUMNS, export_format, 'watchlist')
 
 
 class WatchlistStockView(APIView):
@@ -36,11 +170,6 @@ class WatchlistStockView(APIView):
     
     def post(self, request):
         """Add stock to user's watchlist"""
-        watchlist, created = Watchlist.objects.get_or_create(
-            user=request.user,
-            defaults={'name': 'My Watchlist'}
-        )
-        
         stock_symbol = request.data.get('symbol')
         stock_id = request.data.get('stock_id')
         
@@ -51,27 +180,40 @@ class WatchlistStockView(APIView):
             )
         
         try:
+            # Resolved from the process-local stock cache, no query when warm
             if stock_id:
-                stock = get_object_or_404(Stock, id=stock_id)
+                stock_id = int(stock_id)
+                if stock_id not in stock_resolver.get_by_ids([stock_id]):
+                    return Response(
+                        {"detail": "Error adding stock: No Stock matches the given query."},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
             else:
-                # Try to find stock by symbol, create if doesn't exist
-                stock, created = Stock.objects.get_or_create(
-                    symbol=stock_symbol.upper(),
-                    defaults={'name': request.data.get('name', stock_symbol.upper())}
-                )
-            
-            # Check if stock is already in watchlist
-            if WatchlistStock.objects.filter(watchlist=watchlist, stock=stock).exists():
+                stock_id = stock_resolver.resolve_symbol(stock_symbol)
+                if stock_id is None:
+                    # Unknown symbol, create the stock
+                    stock, created = Stock.objects.get_or_create(
+                        symbol=stock_symbol.upper(),
+                        defaults={'name': request.data.get('name', stock_symbol.upper())}
+                    )
+                    stock_id = stock.id
+
+            watchlist_id = get_watchlist_id(request.user)
+            try:
+                watchlist_stock, added = self.add_entry(watchlist_id, stock_id)
+            except (IntegrityError, WatchlistStock.DoesNotExist):
+                # The cached watchlist was deleted elsewhere; look it up
+                # (or recreate it) and try once more
+                forget_watchlist_id(request.user.id)
+                watchlist_id = get_watchlist_id(request.user)
+                watchlist_stock, added = self.add_entry(watchlist_id, stock_id)
+
+            if not added:
                 return Response(
                     {"detail": "Stock already exists in your watchlist"}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            
-            # Add stock to watchlist
-            watchlist_stock = WatchlistStock.objects.create(
-                watchlist=watchlist,
-                stock=stock
-            )
+            invalidate_watchlist(request.user.id)
             
             serializer = WatchlistStockSerializer(watchlist_stock)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -81,6 +223,33 @@ class WatchlistStockView(APIView):
                 {"detail": f"Error adding stock: {str(e)}"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+    @staticmethod
+    def add_entry(watchlist_id, stock_id):
+        """
+        Insert a watchlist entry, tolerating duplicates.
+
+        The unique (watchlist, stock) constraint settles concurrent adds of
+        the same stock: ON CONFLICT DO NOTHING lets one insert win, and
+        only the winner reads back the added_at it wrote and counts the
+        new watcher.
+
+        Raises WatchlistStock.DoesNotExist if the watchlist no longer
+        exists: the foreign key is only checked at commit, so the read-back
+        joins the watchlist and the insert is rolled back when it is gone.
+        """
+        entry = WatchlistStock(watchlist_id=watchlist_id, stock_id=stock_id)
+        with transaction.atomic():
+            WatchlistStock.objects.bulk_create([entry], ignore_conflicts=True)
+
+            watchlist_stock = WatchlistStock.objects.select_related('stock', 'watchlist').get(
+                watchlist_id=watchlist_id,
+                stock_id=stock_id
+            )
+            added = watchlist_stock.added_at == entry.added_at
+            if added:
+                Stock.objects.filter(pk=stock_id).adjust_watcher_count(1)
+        return watchlist_stock, added
     
     def delete(self, request, stock_id):
         """Remove stock from user's watchlist"""
@@ -94,7 +263,13 @@ class WatchlistStockView(APIView):
                 watchlist=watchlist, 
                 stock_id=stock_id
             )
-            watchlist_stock.delete()
+            with transaction.atomic():
+                # A concurrent removal may have deleted the entry already;
+                # only the request whose delete hit the row counts it
+                deleted, _ = watchlist_stock.delete()
+                if deleted:
+                    Stock.objects.filter(pk=stock_id).adjust_watcher_count(-1)
+            invalidate_watchlist(request.user.id)
             
             return Response(
                 {"detail": "Stock removed from watchlist"}, 
@@ -110,4 +285,178 @@ class WatchlistStockView(APIView):
             return Response(
                 {"detail": "Watchlist not found"}, 
                 status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+            )
+
+
+MAX_BULK_ITEMS = 500
+
+
+def resolve_stocks(symbols, stock_ids):
+    """
+    Resolve symbols and stock ids with a single query.
+
+    Returns a list of (key, stock_id) pairs in request order, where key is
+    the symbol or id as given and stock_id is None if it does not exist.
+    """
+    symbols = [str(symbol).strip().upper() for symbol in symbols if str(symbol).strip()]
+    stock_ids = [int(stock_id) for stock_id in stock_ids]
+
+    rows = []
+    if symbols or stock_ids:
+        rows = Stock.objects.filter(
+            Q(symbol__in=symbols) | Q(id__in=stock_ids)
+        ).values_list('id', 'symbol')
+
+    by_symbol = {}
+    known_ids = set()
+    for stock_id, symbol in rows:
+        by_symbol[symbol] = stock_id
+        known_ids.add(stock_id)
+
+    resolved = [(symbol, by_symbol.get(symbol)) for symbol in dict.fromkeys(symbols)]
+    resolved += [
+        (stock_id, stock_id if stock_id in known_ids else None)
+        for stock_id in dict.fromkeys(stock_ids)
+    ]
+    return resolved
+
+
+class WatchlistBulkStockView(APIView):
+    """
+    POST: Add many stocks to the user's watchlist
+    DELETE: Remove many stocks from the user's watchlist
+
+    Both accept {"symbols": [...], "stock_ids": [...]} and report an
+    outcome per item. The number of queries does not depend on how many
+    items are sent.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def parse_items(self, request):
+        symbols = request.data.get('symbols') or []
+        stock_ids = request.data.get('stock_ids') or []
+
+        if not isinstance(symbols, list) or not isinstance(stock_ids, list):
+            return None, Response(
+                {"detail": "'symbols' and 'stock_ids' must be lists"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not symbols and not stock_ids:
+            return None, Response(
+                {"detail": "Either 'symbols' or 'stock_ids' is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(symbols) + len(stock_ids) > MAX_BULK_ITEMS:
+            return None, Response(
+                {"detail": f"At most {MAX_BULK_ITEMS} stocks per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            return resolve_stocks(symbols, stock_ids), None
+        except (TypeError, ValueError):
+            return None, Response(
+                {"detail": "'stock_ids' must contain integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    @staticmethod
+    def summarize(results):
+        summary = {}
+        for result in results:
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+        return {"results": results, "summary": summary}
+
+    def post(self, request):
+        """Add stocks to user's watchlist"""
+        resolved, error = self.parse_items(request)
+        if error:
+            return error
+
+        watchlist, created = Watchlist.objects.get_or_create(
+            user=request.user,
+            defaults={'name': 'My Watchlist'}
+        )
+
+        found_ids = {stock_id for _, stock_id in resolved if stock_id is not None}
+        existing_ids = set(
+            WatchlistStock.objects.filter(
+                watchlist=watchlist, stock_id__in=found_ids
+            ).values_list('stock_id', flat=True)
+        ) if found_ids and not created else set()
+
+        new_ids = found_ids - existing_ids
+        added_ids = set()
+        if new_ids:
+            entries = [WatchlistStock(watchlist=watchlist, stock_id=stock_id) for stock_id in new_ids]
+            with transaction.atomic():
+                # ignore_conflicts skips rows added concurrently since the check
+                # above; as in add_entry, only rows that read back with the
+                # added_at written here were inserted by this request
+                WatchlistStock.objects.bulk_create(entries, ignore_conflicts=True)
+                written = {entry.stock_id: entry.added_at for entry in entries}
+                added_ids = {
+                    stock_id
+                    for stock_id, added_at in WatchlistStock.objects.filter(
+                        watchlist=watchlist, stock_id__in=new_ids
+                    ).values_list('stock_id', 'added_at')
+                    if written[stock_id] == added_at
+                }
+                if added_ids:
+                    Stock.objects.filter(pk__in=added_ids).adjust_watcher_count(1)
+            if added_ids:
+                invalidate_watchlist(request.user.id)
+
+        results = []
+        for key, stock_id in resolved:
+            if stock_id is None:
+                outcome = "not_found"
+            elif stock_id in added_ids:
+                outcome = "added"
+            else:
+                outcome = "already_exists"
+            results.append({"item": key, "stock_id": stock_id, "status": outcome})
+
+        return Response(self.summarize(results), status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        """Remove stocks from user's watchlist"""
+        resolved, error = self.parse_items(request)
+        if error:
+            return error
+
+        found_ids = {stock_id for _, stock_id in resolved if stock_id is not None}
+        present_ids = set()
+
+        if found_ids:
+            with transaction.atomic():
+                # Locking the entries makes a concurrent removal of the same
+                # stocks wait and then skip them, so each removed entry is
+                # decremented by exactly one request
+                present_ids = set(
+                    WatchlistStock.objects.select_for_update(of=('self',)).filter(
+                        watchlist__user=request.user, stock_id__in=found_ids
+                    ).values_list('stock_id', flat=True)
+                )
+                if present_ids:
+                    WatchlistStock.objects.filter(
+                        watchlist__user=request.user, stock_id__in=present_ids
+                    ).delete()
+                    Stock.objects.filter(pk__in=present_ids).adjust_watcher_count(-1)
+            if present_ids:
+                invalidate_watchlist(request.user.id)
+
+        results = []
+        for key, stock_id in resolved:
+            if stock_id is None:
+                outcome = "not_found"
+            elif stock_id in present_ids:
+                outcome = "removed"
+            else:
+                outcome = "not_in_watchlist"
+            results.append({"item": key, "stock_id": stock_id, "status": outcome})
+
+        return Response(self.summarize(results), status=status.HTTP_200_OK)
+
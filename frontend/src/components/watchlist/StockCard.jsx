@@ -1,7 +1,6 @@
-import React, { useState, useEffect } from 'react';
+import React from 'react';
 import Button from '../ui/Button';
-import { X, TrendingUp, TrendingDown, RefreshCw } from 'lucide-react';
-import { stockAPI } from '../../services/api/stockAPI';
+import { X, TrendingUp, TrendingDown } from 'lucide-react';
 
 const StockCard = ({ 
   stockItem, 
@@ -9,67 +8,16 @@ const StockCard = ({
   onRemove, 
   actionLoading 
 }) => {
-  const [priceData, setPriceData] = useState(null);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
-
-  useEffect(() => {
-    fetchPriceData();
-    
-    const interval = setInterval(() => {
-      fetchPriceData();
-    }, 300000); // 5 minutes = 300,000 milliseconds
-    
-    return () => clearInterval(interval);
-  }, [stockItem.stock.symbol]);
-
-  const fetchPriceData = async () => {
-    try {
-      setLoading(true);
-      setError(null);
-      const data = await stockAPI.getPriceData(stockItem.stock.symbol);
-      
-      // Check for API errors
-      if (data['Error Message']) {
-        throw new Error(data['Error Message']);
-      }
-      
-      if (data['Note']) {
-        throw new Error('API call frequency limit reached. Please try again later.');
-      }
-      
-      if (data && data['Time Series (1min)']) {
-        const timeSeries = data['Time Series (1min)'];
-        const timestamps = Object.keys(timeSeries).sort((a, b) => new Date(b) - new Date(a));
-        
-        if (timestamps.length >= 2) {
-          const currentPrice = parseFloat(timeSeries[timestamps[0]]['4. close']);
-          const previousPrice = parseFloat(timeSeries[timestamps[1]]['4. close']);
-          const change = currentPrice - previousPrice;
-          const changePercent = ((change / previousPrice) * 100);
-          
-          setPriceData({
-            currentPrice,
-            previousPrice,
-            change,
-            changePercent,
-            isUp: change >= 0,
-            timestamp: timestamps[0],
-            volume: parseInt(timeSeries[timestamps[0]]['5. volume'])
-          });
-        } else {
-          throw new Error('Insufficient price data available');
-        }
-      } else {
-        throw new Error('No price data available for this symbol');
-      }
-    } catch (err) {
-      console.error('Error fetching price data for', stockItem.stock.symbol, err);
-      setError(err.message || 'Failed to load price data');
-    } finally {
-      setLoading(false);
-    }
-  };
+  // Quotes arrive with the watchlist (GET /watchlists/quotes/)
+  const quote = stockItem.quote;
+  const priceData = quote ? {
+    currentPrice: quote.price,
+    change: quote.change ?? 0,
+    changePercent: quote.change_percent ?? 0,
+    isUp: (quote.change ?? 0) >= 0,
+    timestamp: quote.as_of,
+    volume: quote.volume
+  } : null;
 
   const handleRemove = () => {
     if (confirm(`Remove ${stockItem.stock.symbol} from the watchlist?`)) {
@@ -91,15 +39,11 @@ const StockCard = ({
               
               {/* Price Data */}
               <div className="text-right">
-                {loading ? (
+                {quote === undefined ? (
                   <div className="flex items-center gap-2">
                     <span className="loading loading-spinner loading-sm"></span>
                     <span className="text-white/50 text-sm">Loading...</span>
                   </div>
-                ) : error ? (
-                  <div className="text-red-400 text-sm">
-                    <span>Price unavailable</span>
-                  </div>
                 ) : priceData ? (
                   <div className="flex flex-col items-end">
                     {/* Current Price */}
@@ -124,7 +68,9 @@ const StockCard = ({
                     
                   </div>
                 ) : (
-                  <div className="text-white/50 text-sm">No data</div>
+                  <div className="text-red-400 text-sm">
+                    <span>Price unavailable</span>
+                  </div>
                 )}
               </div>
             </div>
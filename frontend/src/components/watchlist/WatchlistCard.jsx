@@ -2,6 +2,7 @@ import React, { useState } from 'react';
 import { useToast } from '../ui/ToastProvider';
 import { watchlistAPI } from '../../services/api/watchlistAPI';
 import { stockAPI } from '../../services/api/stockAPI';
+import { searchStocksLocally } from '../../services/stockUniverse';
 import WatchlistHeader from './WatchlistHeader';
 import EmptyWatchlist from './EmptyWatchlist';
 import StockCard from './StockCard';
@@ -30,11 +31,16 @@ const WatchlistCard = ({
     }
 
     try {
-      const results = await stockAPI.getStocks(query);
+      const results = await searchStocksLocally(query);
       setSearchResults(results);
     } catch (err) {
-      console.error('Failed to search stocks:', err);
-      setSearchResults([]);
+      // Snapshot unavailable: fall back to server-side search
+      try {
+        setSearchResults(await stockAPI.getStocks(query));
+      } catch (searchErr) {
+        console.error('Failed to search stocks:', searchErr);
+        setSearchResults([]);
+      }
     }
   };
 
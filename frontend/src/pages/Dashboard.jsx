@@ -21,12 +21,19 @@ const Dashboard = () => {
 
   useEffect(() => {
     fetchWatchlist();
+
+    // Refresh quotes every 5 minutes with one request for the whole watchlist
+    const interval = setInterval(() => {
+      fetchWatchlist(false);
+    }, 300000);
+
+    return () => clearInterval(interval);
   }, []);
 
-  const fetchWatchlist = async () => {
+  const fetchWatchlist = async (showLoading = true) => {
     try {
-      setLoading(true);
-      const data = await watchlistAPI.getWatchlist();
+      if (showLoading) setLoading(true);
+      const data = await watchlistAPI.getWatchlistWithQuotes();
       console.log('Fetched watchlist data:', data);
       setWatchlist(data);
     } catch (err) {
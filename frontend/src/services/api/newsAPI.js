@@ -1,4 +1,5 @@
 import axios from 'axios';
+import apiClient from './client.js';
 import { watchlistAPI } from './watchlistAPI.js';
 
 const BASE_URL = import.meta.env.VITE_NEWS_API_URL;
@@ -56,11 +57,14 @@ const getNewsForSymbols = async (symbols, limit = 5) => {
 };
 
 // Main function to get news for user's watchlist
+// Headlines come from the backend, which batches every symbol into a few
+// NewsAPI queries and caches them per symbol across users
 const getWatchlistNews = async (limit = 5) => {
   try {
-    // Step 1: Get user's watchlist symbols
-    const symbols = await getUserWatchlistSymbols();
-    
+    const response = await apiClient.get('/watchlists/news/');
+    const news = response.data.news || {};
+    const symbols = Object.keys(news);
+
     if (symbols.length === 0) {
       return {
         success: true,
@@ -70,15 +74,31 @@ const getWatchlistNews = async (limit = 5) => {
       };
     }
 
-    console.log('Fetching news for symbols:', symbols);
-
-    // Step 2: Fetch news for those symbols
-    const articles = await getNewsForSymbols(symbols, limit);
+    // The same article can be matched by several symbols
+    const seen = new Set();
+    const articles = [];
+    symbols.forEach(symbol => {
+      news[symbol].slice(0, limit).forEach(item => {
+        if (seen.has(item.url)) return;
+        seen.add(item.url);
+        articles.push({
+          title: item.headline,
+          url: item.url,
+          description: item.description,
+          source: item.source,
+          published_at: item.published_at,
+          image_url: item.image_url,
+          symbol: symbol
+        });
+      });
+    });
+    articles.sort((a, b) => (b.published_at || '').localeCompare(a.published_at || ''));
 
     return {
       success: true,
       articles: articles,
       symbols: symbols,
+      degraded: response.data.degraded,
       totalSymbols: symbols.length,
       totalArticles: articles.length
     };
@@ -86,7 +106,7 @@ const getWatchlistNews = async (limit = 5) => {
     console.error('Error in getWatchlistNews:', error);
     return {
       success: false,
-      error: error.message,
+      error: error.response?.data?.detail || error.message,
       articles: [],
       symbols: []
     };
@@ -9,14 +9,27 @@ export const stockAPI = {
   // Get all stocks with optional search
   getStocks: async (search = '') => {
     try {
-      const url = search ? `/stocks/?search=${encodeURIComponent(search)}` : '/stocks/';
+      const url = search ? `/stocks/search/?q=${encodeURIComponent(search)}` : '/stocks/';
       const response = await apiClient.get(url);
-      return response.data;
+      // The unfiltered list is cursor-paginated; search returns a plain array
+      return response.data.results ?? response.data;
     } catch (error) {
       throw new Error(error.response?.data?.detail || 'Failed to get stocks');
     }
   },
 
+  // Resolve many symbols in one request; returns { stocks, unknown }
+  lookupStocks: async (symbols) => {
+    try {
+      const response = await apiClient.get('/stocks/lookup/', {
+        params: { symbols: symbols.join(',') }
+      });
+      return response.data;
+    } catch (error) {
+      throw new Error(error.response?.data?.detail || 'Failed to look up stocks');
+    }
+  },
+
   // Get stock by ID
   getStock: async (stockId) => {
     try {
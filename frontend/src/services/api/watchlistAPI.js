@@ -12,6 +12,16 @@ export const watchlistAPI = {
     }
   },
 
+  // Watchlist with the latest quote for every stock, batched server-side
+  getWatchlistWithQuotes: async () => {
+    try {
+      const response = await apiClient.get('/watchlists/quotes/');
+      return response.data;
+    } catch (error) {
+      throw new Error(error.response?.data?.detail || 'Failed to get watchlist');
+    }
+  },
+
   // Create a new watchlist
   createWatchlist: async (watchlistData) => {
     try {
@@ -62,6 +72,26 @@ export const watchlistAPI = {
     }
   },
 
+  // Add many stocks at once; payload is { symbols: [...], stock_ids: [...] }
+  bulkAddStocks: async (items) => {
+    try {
+      const response = await apiClient.post('/watchlists/stocks/bulk/', items);
+      return response.data;
+    } catch (error) {
+      throw new Error(error.response?.data?.detail || 'Failed to add stocks to watchlist');
+    }
+  },
+
+  // Remove many stocks at once; payload is { symbols: [...], stock_ids: [...] }
+  bulkRemoveStocks: async (items) => {
+    try {
+      const response = await apiClient.delete('/watchlists/stocks/bulk/', { data: items });
+      return response.data;
+    } catch (error) {
+      throw new Error(error.response?.data?.detail || 'Failed to remove stocks from watchlist');
+    }
+  },
+
   // Get watchlist stocks
   getWatchlistStocks: async (watchlistId) => {
     try {
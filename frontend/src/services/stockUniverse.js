@@ -0,0 +1,62 @@
+import apiClient from './api/client.js';
+
+// The stock universe, downloaded once (gzip, revalidated by ETag) and
+// searched in the browser so typing never waits on the server
+let universePromise = null;
+
+const loadUniverse = async () => {
+  const response = await apiClient.get('/stocks/snapshot/');
+  const { fields, stocks } = response.data;
+  const index = Object.fromEntries(fields.map((field, position) => [field, position]));
+
+  return stocks.map(row => {
+    const symbol = row[index.symbol];
+    const name = row[index.name];
+    return {
+      id: row[index.id],
+      symbol,
+      name,
+      symbolKey: symbol.toLowerCase(),
+      nameKey: name.toLowerCase(),
+      nameWords: name.toLowerCase().match(/[a-z0-9]+/g) || [],
+    };
+  });
+};
+
+export const getStockUniverse = () => {
+  if (!universePromise) {
+    universePromise = loadUniverse().catch(error => {
+      universePromise = null;
+      throw error;
+    });
+  }
+  return universePromise;
+};
+
+// Same ranking as the server: exact symbol, symbol prefix, name-word
+// prefix, then substring; shorter symbols first within a rank
+export const searchStocksLocally = async (query, limit = 20) => {
+  const needle = query.trim().toLowerCase();
+  if (!needle) return [];
+
+  const universe = await getStockUniverse();
+  const ranked = [];
+
+  for (const stock of universe) {
+    let rank;
+    if (stock.symbolKey === needle) rank = 0;
+    else if (stock.symbolKey.startsWith(needle)) rank = 1;
+    else if (stock.nameWords.some(word => word.startsWith(needle))) rank = 2;
+    else if (stock.symbolKey.includes(needle) || stock.nameKey.includes(needle)) rank = 3;
+    else continue;
+    ranked.push([rank, stock]);
+  }
+
+  ranked.sort(([rankA, a], [rankB, b]) =>
+    rankA - rankB ||
+    a.symbol.length - b.symbol.length ||
+    a.symbol.localeCompare(b.symbol)
+  );
+
+  return ranked.slice(0, limit).map(([, { id, symbol, name }]) => ({ id, symbol, name }));
+};
@@ -1,5 +1,6 @@
 import os
 import sys
+import hashlib
 from typing import List, Dict
 
 # Add the parent directories to Python path to find core module
@@ -8,7 +9,8 @@ ai_dir = os.path.dirname(current_dir)
 stocksense_dir = os.path.dirname(ai_dir)
 sys.path.append(stocksense_dir)
 
-from core.config import get_chat_llm, ConfigurationError
+from core.config import get_chat_llm, ConfigurationError, SENTIMENT_CACHE_TTL
+from core.cache import get_cache
 from data.collectors.data_collectors import get_news
 
 
@@ -18,14 +20,18 @@ def analyze_sentiment_of_headlines(news: List[Dict]) -> str:
         if not news:
             return "No headlines provided for analysis."
 
+        headlines = "\n".join([f"{i+1}. {item['headline']}" for i, item in enumerate(news) if 'headline' in item])
+
+        cache_key = hashlib.sha256(headlines.encode('utf-8')).hexdigest()
+        cached = get_cache().get("sentiment", cache_key)
+        if cached is not None:
+            return cached
+
         llm = get_chat_llm(
             model="gemini-2.5-flash",
             temperature=0.3,
             max_output_tokens=2048
         )
-        
-        headlines = "\n".join([f"{i+1}. {item['headline']}" for i, item in enumerate(news) if 'headline' in item])
-        
 
         prompt = f"""
 You are a financial sentiment analysis expert. Please analyze the sentiment of the following news headlines and provide insights for stock market research.
@@ -46,6 +52,7 @@ Format your response clearly with numbered items corresponding to the headlines,
 """
 
         response = llm.invoke(prompt)
+        get_cache().set("sentiment", cache_key, response, SENTIMENT_CACHE_TTL)
         return response
 
     except ConfigurationError as e:
@@ -1,6 +1,8 @@
 import os
 import sys
+import time
 
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Dict, List, Optional, TypedDict, Literal, Any
 from datetime import datetime
 
@@ -14,7 +16,8 @@ ai_dir = os.path.dirname(current_dir)
 stocksense_dir = os.path.dirname(ai_dir)
 sys.path.append(stocksense_dir)
 
-from core.config import get_chat_llm
+from core.config import get_chat_llm, ANALYSIS_CACHE_TTL, TOOL_CALL_TIMEOUT
+from core.cache import get_cache
 from data.collectors.data_collectors import get_news, get_price_history
 from ai.analyzer import analyze_sentiment_of_headlines
 
@@ -34,6 +37,16 @@ class AgentState(TypedDict):
     max_iterations: int
     final_decision: str
     error: Optional[str]
+    degraded_sources: List[str]
+
+
+# Upstream provider each tool depends on; a tool result carrying
+# "degraded": True means this analysis ran without that provider's data
+TOOL_SOURCES = {
+    "fetch_news_headlines": "newsapi",
+    "analyze_sentiment": "newsapi",
+    "fetch_price_data": "yahoo_finance",
+}
 
 
 @tool
@@ -50,7 +63,7 @@ def fetch_news_headlines(ticker: str, days: int = 7) -> Dict:
         Dict with news data including headlines list and metadata
     """
     try:
-        news_data = get_news(ticker, days=days)
+        news_data = get_news(ticker, days=days, raise_errors=True)
         
         return {
             "success": True,
@@ -62,7 +75,8 @@ def fetch_news_headlines(ticker: str, days: int = 7) -> Dict:
     except Exception as e:
         return {
             "success": False,
-            "error": str(e),
+            "degraded": True,
+            "error": f"News provider is unavailable ({str(e)}); continue the analysis without news",
             "headlines": [],
             "count": 0
         }
@@ -82,9 +96,11 @@ def fetch_price_data(ticker: str, period: str = "1mo") -> Dict:
         Dict with price data including OHLCV values and metadata
     """
     try:
-        df = get_price_history(ticker, period=period)
+        df = get_price_history(ticker, period=period, raise_errors=True)
         
         if df is None or df.empty:
+            # Yahoo answered but has no rows for this ticker; upstream
+            # failures raise and are reported as degraded below
             return {
                 "success": False,
                 "error": "No price data available",
@@ -117,6 +133,7 @@ def fetch_price_data(ticker: str, period: str = "1mo") -> Dict:
     except Exception as e:
         return {
             "success": False,
+            "degraded": True,
             "error": str(e),
             "price_data": []
         }
@@ -126,7 +143,8 @@ def fetch_price_data(ticker: str, period: str = "1mo") -> Dict:
 def analyze_sentiment(ticker: str) -> Dict:
     """
     Analyze sentiment of recent news headlines for a stock ticker.
-    This is STEP 3 of the mandatory analysis workflow - must be called AFTER steps 1 and 2.
+    This is STEP 3 of the mandatory analysis workflow. It fetches its own headlines,
+    so it can be called in the same turn as steps 1 and 2.
     
     Args:
         ticker: Stock ticker symbol (e.g., AAPL, MSFT)
@@ -135,9 +153,17 @@ def analyze_sentiment(ticker: str) -> Dict:
         Dict with sentiment analysis report and success status
     """
     try:
-        # Fetch fresh headlines for sentiment analysis
-        news_data = get_news(ticker, days=7)
-        headlines = news_data if news_data else []
+        # Shares the in-flight or cached request of fetch_news_headlines
+        try:
+            headlines = get_news(ticker, days=7, raise_errors=True)
+        except Exception as e:
+            return {
+                "success": False,
+                "degraded": True,
+                "error": f"News provider is unavailable ({str(e)}); no sentiment to analyze",
+                "sentiment_report": "",
+                "headlines_analyzed": 0
+            }
         
         if not headlines:
             return {
@@ -171,6 +197,11 @@ tools = [
     analyze_sentiment
 ]
 
+tools_by_name = {tool_item.name: tool_item for tool_item in tools}
+
+# Shared pool for tool calls issued in the same LLM turn
+tool_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="stocksense-tool")
+
 
 def create_react_agent() -> StateGraph:
 
@@ -226,10 +257,13 @@ Please retry for complete analysis.
 You are a ReAct (Reasoning + Action) agent for stock analysis. You must analyze {ticker} following this EXACT sequence:
 
 MANDATORY WORKFLOW:
-1. FIRST: Call fetch_news_headlines("{ticker}") to get recent news
-2. SECOND: Call fetch_price_data("{ticker}") to get price history  
-3. THIRD: Call analyze_sentiment("{ticker}") to analyze news sentiment
-4. FOURTH: Provide final analysis combining ALL data
+1. Call fetch_news_headlines("{ticker}") to get recent news
+2. Call fetch_price_data("{ticker}") to get price history
+3. Call analyze_sentiment("{ticker}") to analyze news sentiment
+4. Provide final analysis combining ALL data
+
+Steps 1-3 are independent of each other and are executed in parallel, so request
+all three tool calls together in a single response.
 
 IMPORTANT RULES:
 - You MUST use ALL THREE tools before providing final analysis
@@ -243,7 +277,7 @@ IMPORTANT RULES:
 
 Be explicit: Always end with 'Final Recommendation: KEEP' or 'Final Recommendation: SELL'.
 
-Start by calling the first tool: fetch_news_headlines("{ticker}")
+Start by calling all three tools at once.
 """
 
         messages.append(HumanMessage(content=reasoning_prompt))
@@ -305,6 +339,9 @@ Analysis completed using {len(set(tools_used))} tools across {iterations + 1} re
     def custom_tool_node(state: AgentState) -> AgentState:
         """
         Tool execution node with state tracking.
+
+        All tool calls from one LLM turn run concurrently; results are
+        collected in the order the calls were issued.
         """
         messages = state["messages"]
         last_message = messages[-1]
@@ -312,21 +349,34 @@ Analysis completed using {len(set(tools_used))} tools across {iterations + 1} re
         tool_results = []
         tools_used = state.get("tools_used", [])
         reasoning_steps = state.get("reasoning_steps", [])
+        degraded_sources = list(state.get("degraded_sources", []))
 
+        # Calls start together, so a single deadline bounds each one by TOOL_CALL_TIMEOUT
+        deadline = time.monotonic() + TOOL_CALL_TIMEOUT
+        futures = []
         for tool_call in last_message.tool_calls:
-            tool_name = tool_call["name"]
-            tool_args = tool_call["args"]
-
-            tool_function = None
-            for tool_item in tools:
-                if tool_item.name == tool_name:
-                    tool_function = tool_item
-                    break
-
+            tool_function = tools_by_name.get(tool_call["name"])
             if tool_function:
-                result = tool_function.invoke(tool_args)
+                futures.append(tool_executor.submit(tool_function.invoke, tool_call["args"]))
             else:
+                futures.append(None)
+
+        for tool_call, future in zip(last_message.tool_calls, futures):
+            tool_name = tool_call["name"]
+
+            if future is None:
                 result = {"error": f"Tool {tool_name} not found"}
+            else:
+                try:
+                    result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FutureTimeoutError:
+                    result = {
+                        "success": False,
+                        "degraded": True,
+                        "error": f"Tool {tool_name} timed out after {TOOL_CALL_TIMEOUT} seconds"
+                    }
+                except Exception as e:
+                    result = {"success": False, "error": str(e)}
 
             tool_message = ToolMessage(
                 content=str(result),
@@ -336,6 +386,15 @@ Analysis completed using {len(set(tools_used))} tools across {iterations + 1} re
             tool_results.append(tool_message)
             tools_used.append(tool_name)
 
+            # What this analysis actually got, not the shared breaker state:
+            # a later successful call for the same source clears it
+            source = TOOL_SOURCES.get(tool_name)
+            if source and result.get("degraded"):
+                if source not in degraded_sources:
+                    degraded_sources.append(source)
+            elif source and result.get("success") and source in degraded_sources:
+                degraded_sources.remove(source)
+
             if tool_name == "fetch_news_headlines" and result.get("success"):
                 state["headlines"] = result.get("news", [])
                 reasoning_steps.append(f"Fetched {len(state['headlines'])} headlines")
@@ -353,7 +412,8 @@ Analysis completed using {len(set(tools_used))} tools across {iterations + 1} re
             **state,
             "messages": messages + tool_results,
             "tools_used": tools_used,
-            "reasoning_steps": reasoning_steps
+            "reasoning_steps": reasoning_steps,
+            "degraded_sources": degraded_sources
         }
 
     def should_continue(state: AgentState) -> Literal["tools", "end"]:
@@ -389,6 +449,10 @@ react_app = react_workflow.compile()
 
 
 def run_react_analysis(ticker: str) -> Dict:
+    cached = get_cache().get("analysis", ticker.upper())
+    if cached is not None:
+        return cached
+
     initial_state = {
         "messages": [],
         "ticker": ticker.upper(),
@@ -401,13 +465,14 @@ def run_react_analysis(ticker: str) -> Dict:
         "iterations": 0,
         "max_iterations": 8,
         "final_decision": "",
-        "error": None
+        "error": None,
+        "degraded_sources": []
     }
 
     try:
         final_state = react_app.invoke(initial_state)
 
-        return {
+        result = {
             "ticker": final_state["ticker"],
             "summary": final_state.get("summary", "Analysis completed"),
             "sentiment_report": final_state.get("sentiment_report", ""),
@@ -418,9 +483,16 @@ def run_react_analysis(ticker: str) -> Dict:
             "iterations": final_state.get("iterations", 0),
             "final_decision": final_state.get("final_decision", "UNSPECIFIED"), 
             "error": final_state.get("error"),
+            "degraded_sources": final_state.get("degraded_sources", []),
             "timestamp": datetime.now().isoformat()
         }
 
+        # Only complete analyses are shared; failures and degraded results are retried on the next request
+        if not result["error"] and not result["degraded_sources"]:
+            get_cache().set("analysis", result["ticker"], result, ANALYSIS_CACHE_TTL)
+
+        return result
+
     except Exception as e:
         error_msg = str(e)
 
@@ -435,6 +507,7 @@ def run_react_analysis(ticker: str) -> Dict:
             "iterations": 0,
             "final_decision": "UNSPECIFIED",
             "error": error_msg,
+            "degraded_sources": [],
             "timestamp": datetime.now().isoformat()
         }
 
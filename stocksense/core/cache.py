@@ -0,0 +1,277 @@
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class CacheBackend(ABC):
+    """Namespaced key/value cache with per-entry TTL and LRU eviction."""
+
+    @abstractmethod
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self, namespace: Optional[str] = None) -> None:
+        ...
+
+
+class InMemoryCache(CacheBackend):
+    """Process-local cache, only shared between threads of one worker."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[(namespace, key)]
+                return default
+
+            self._entries.move_to_end((namespace, key))
+            return value
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[(namespace, key)] = (time.time() + ttl, value)
+            self._entries.move_to_end((namespace, key))
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for entry_key in [k for k in self._entries if k[0] == namespace]:
+                    del self._entries[entry_key]
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Host-wide cache stored in a SQLite file in WAL mode.
+
+    Every uvicorn worker on the instance opens the same file, so a price
+    download or LLM call made by one worker is reused by all the others.
+
+    SQLite allows one writer at a time, so reads avoid writing: a hit only
+    refreshes last_access once it is access_interval seconds old, making
+    eviction approximately LRU. Expired rows are purged and the oldest
+    evicted only when a write takes the table over max_entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 2048, access_interval: float = 60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.access_interval = access_interval
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_entries_last_access "
+                "ON cache_entries (last_access)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        try:
+            conn = self._connect()
+            now = time.time()
+            row = conn.execute(
+                "SELECT value, expires_at, last_access FROM cache_entries "
+                "WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+
+            if row is None:
+                return default
+
+            value, expires_at, last_access = row
+            if expires_at <= now:
+                with conn:
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                        (namespace, key, now)
+                    )
+                return default
+
+            if now - last_access >= self.access_interval:
+                with conn:
+                    conn.execute(
+                        "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                        (now, namespace, key)
+                    )
+
+            return pickle.loads(value)
+
+        except (sqlite3.Error, pickle.UnpicklingError) as e:
+            print(f"Cache read error for {namespace}:{key}: {str(e)}")
+            return default
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        try:
+            conn = self._connect()
+            now = time.time()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries "
+                    "(namespace, key, value, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, pickle.dumps(value), now + ttl, now)
+                )
+
+            (count,) = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+            if count > self.max_entries:
+                self._evict(conn, now)
+
+        except (sqlite3.Error, pickle.PicklingError) as e:
+            print(f"Cache write error for {namespace}:{key}: {str(e)}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Purge expired rows, then the least recently used beyond max_entries"""
+        with conn:
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM cache_entries WHERE rowid IN ("
+                "SELECT rowid FROM cache_entries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def delete(self, namespace: str, key: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            )
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        conn = self._connect()
+        with conn:
+            if namespace is None:
+                conn.execute("DELETE FROM cache_entries")
+            else:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one.
+
+    The first caller for a key runs the function; callers arriving while
+    it is in flight wait and receive its result or exception. Nothing is
+    kept once the call returns, so pair it with a cache lookup.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Any, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Any, func: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func(*args, **kwargs)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+_cache: Optional[CacheBackend] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> CacheBackend:
+    """
+    Get the process-wide cache, creating it on first use.
+
+    STOCKSENSE_CACHE_BACKEND selects 'sqlite' (default, shared by all workers
+    on the host) or 'memory' (per process).
+    """
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = os.getenv('STOCKSENSE_CACHE_BACKEND', 'sqlite').lower()
+                max_entries = int(os.getenv('STOCKSENSE_CACHE_MAX_ENTRIES', '2048'))
+                access_interval = float(os.getenv('STOCKSENSE_CACHE_ACCESS_INTERVAL', '60'))
+
+                if backend == 'memory':
+                    _cache = InMemoryCache(max_entries=max_entries)
+                else:
+                    path = os.getenv(
+                        'STOCKSENSE_CACHE_PATH',
+                        os.path.join(tempfile.gettempdir(), 'stocksense_cache.sqlite3')
+                    )
+                    _cache = SQLiteCache(path, max_entries=max_entries, access_interval=access_interval)
+
+    return _cache
@@ -85,4 +85,26 @@ DEFAULT_MODEL = "gemini-2.5-flash"
 DEFAULT_TEMPERATURE = 0.3
 DEFAULT_MAX_TOKENS = 2048
 DEFAULT_CHAT_TEMPERATURE = 0.1
-DEFAULT_CHAT_MAX_TOKENS = 1024
\ No newline at end of file
+DEFAULT_CHAT_MAX_TOKENS = 1024
+
+# Cache lifetimes in seconds, shared by every worker through core.cache
+PRICE_CACHE_TTL = int(os.getenv('PRICE_CACHE_TTL', '300'))
+NEWS_CACHE_TTL = int(os.getenv('NEWS_CACHE_TTL', '900'))
+SENTIMENT_CACHE_TTL = int(os.getenv('SENTIMENT_CACHE_TTL', '3600'))
+ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', '900'))
+
+# Upper bound in seconds on a single agent tool call
+TOOL_CALL_TIMEOUT = float(os.getenv('TOOL_CALL_TIMEOUT', '45'))
+
+# Deadlines in seconds and circuit breaker settings for external data providers
+YAHOO_TIMEOUT = float(os.getenv('YAHOO_TIMEOUT', '10'))
+NEWSAPI_TIMEOUT = float(os.getenv('NEWSAPI_TIMEOUT', '8'))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '60'))
+
+# Batched Yahoo downloads: tickers per request and deadline in seconds per batch
+YAHOO_BULK_CHUNK_SIZE = int(os.getenv('YAHOO_BULK_CHUNK_SIZE', '50'))
+YAHOO_BULK_TIMEOUT = float(os.getenv('YAHOO_BULK_TIMEOUT', '30'))
+
+# Result pages (100 articles each) fetched per combined multi-ticker news query
+NEWS_BULK_MAX_PAGES = int(os.getenv('NEWS_BULK_MAX_PAGES', '2'))
@@ -0,0 +1,127 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+    pass
+
+
+class DeadlineExceeded(Exception):
+    """Raised when an upstream call does not finish within its deadline."""
+    pass
+
+
+# Upstream calls run here so the caller can stop waiting on a hung socket
+_upstream_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="stocksense-upstream")
+
+
+def call_with_deadline(func: Callable, timeout: float, *args, **kwargs) -> Any:
+    """Run func(*args, **kwargs), giving up after timeout seconds."""
+    future = _upstream_executor.submit(func, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise DeadlineExceeded(f"{getattr(func, '__name__', 'call')} exceeded {timeout}s deadline")
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream provider.
+
+    After failure_threshold failures in a row the breaker opens and calls
+    fail immediately with CircuitOpenError. Once reset_timeout seconds have
+    passed a single trial call is let through (half-open); its outcome
+    closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5,
+                 reset_timeout: float = 60.0, call_timeout: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def is_available(self) -> bool:
+        return self.state != self.OPEN
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+                self._state = self.HALF_OPEN
+
+            if self._trial_in_flight:
+                raise CircuitOpenError(f"{self.name} circuit is half-open, trial call in progress")
+            self._trial_in_flight = True
+
+    def _record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"Circuit breaker for {self.name} opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Call func through the breaker, applying call_timeout if set."""
+        return self.call_with_deadline(func, self.call_timeout, *args, **kwargs)
+
+    def call_with_deadline(self, func: Callable, timeout: Optional[float], *args, **kwargs) -> Any:
+        """Call func through the breaker with an explicit deadline (None for no deadline)."""
+        self._before_call()
+        try:
+            if timeout:
+                result = call_with_deadline(func, timeout, *args, **kwargs)
+            else:
+                result = func(*args, **kwargs)
+        except Exception:
+            self._record_failure()
+            raise
+
+        self._record_success()
+        return result
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Get the process-wide breaker for an upstream, creating it on first use."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **kwargs)
+        return _breakers[name]
@@ -1,8 +1,12 @@
 import os
+import re
 import sys
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime, timedelta
 import yfinance as yf
+from yfinance.exceptions import (
+    YFInvalidPeriodError, YFPricesMissingError, YFTickerMissingError, YFTzMissingError
+)
 from newsapi import NewsApiClient
 
 # Add the parent directories to Python path to find core module
@@ -11,78 +15,401 @@ collectors_dir = os.path.dirname(current_dir)
 stocksense_dir = os.path.dirname(collectors_dir)
 sys.path.append(stocksense_dir)
 
-from core.config import get_newsapi_key, ConfigurationError
+from core.config import (
+    get_newsapi_key, ConfigurationError, NEWS_CACHE_TTL, PRICE_CACHE_TTL,
+    YAHOO_TIMEOUT, NEWSAPI_TIMEOUT, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT,
+    YAHOO_BULK_CHUNK_SIZE, YAHOO_BULK_TIMEOUT, NEWS_BULK_MAX_PAGES
+)
+from core.cache import SingleFlight, get_cache
+from core.resilience import get_breaker
 
+yahoo_breaker = get_breaker(
+    "yahoo_finance",
+    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=BREAKER_RESET_TIMEOUT,
+    call_timeout=YAHOO_TIMEOUT
+)
+newsapi_breaker = get_breaker(
+    "newsapi",
+    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=BREAKER_RESET_TIMEOUT,
+    call_timeout=NEWSAPI_TIMEOUT
+)
 
+# Yahoo answered, but has nothing for this ticker or period; these must not
+# count towards opening the breaker
+YAHOO_NO_DATA_ERRORS = (
+    YFPricesMissingError, YFTickerMissingError, YFTzMissingError, YFInvalidPeriodError
+)
 
-def get_news(ticker: str, days: int = 7) -> List[Dict[str, str]]:
+
+# The news and sentiment tools of one analysis ask for the same headlines
+# at the same time; only one of them goes to NewsAPI
+_news_flight = SingleFlight()
+
+
+def _fetch_news(ticker: str, days: int, cache_key: str) -> List[Dict[str, str]]:
+    """Request headlines from NewsAPI and cache them; upstream errors propagate."""
+    newsapi = NewsApiClient(api_key=get_newsapi_key())
+
+    to_date = datetime.now()
+    from_date = to_date - timedelta(days=days)
+
+    results = newsapi_breaker.call(
+        newsapi.get_everything,
+        q=ticker,
+        language='en',
+        sort_by='publishedAt',
+        from_param=from_date.strftime('%Y-%m-%d'),
+        to=to_date.strftime('%Y-%m-%d'),
+        page_size=5
+    )
+
+    if not results or results.get('status') != 'ok':
+        raise RuntimeError(f"NewsAPI returned status {(results or {}).get('status')!r}")
+
+    news_data = []
+    for article in results.get('articles', []):
+        if article.get('title') and article.get('url'):
+            news_data.append({
+                'headline': article['title'],
+                'url': article['url'],
+            })
+
+    get_cache().set("news", cache_key, news_data, NEWS_CACHE_TTL)
+    return news_data
+
+
+def get_news(ticker: str, days: int = 7, raise_errors: bool = False) -> List[Dict[str, str]]:
     """Fetch recent news headlines and URLs related to a stock ticker.
     
+    Concurrent calls for the same ticker and window share one request.
+    Upstream failures (including CircuitOpenError and DeadlineExceeded)
+    return an empty list, or propagate when raise_errors is set.
+
     Returns:
         List of dictionaries with 'headline' and 'url'
     """
+    cache_key = f"{ticker.upper()}:{days}"
+    cached = get_cache().get("news", cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        api_key = get_newsapi_key()
-        newsapi = NewsApiClient(api_key=api_key)
+        return _news_flight.do(cache_key, _fetch_news, ticker, days, cache_key)
+    except ConfigurationError as e:
+        print(f"Configuration error: {str(e)}")
+        if raise_errors:
+            raise
+        return []
+    except Exception as e:
+        print(f"Error fetching news for {ticker}: {str(e)}")
+        if raise_errors:
+            raise
+        return []
 
-        to_date = datetime.now()
-        from_date = to_date - timedelta(days=days)
 
-        from_date_str = from_date.strftime('%Y-%m-%d')
-        to_date_str = to_date.strftime('%Y-%m-%d')
+# NewsAPI rejects q parameters longer than this
+NEWSAPI_MAX_QUERY_LENGTH = 500
 
-        try:
-            results = newsapi.get_everything(
-                q=ticker ,
-                language='en',
-                sort_by='publishedAt',
-                from_param=from_date_str,
-                to=to_date_str,
-                page_size=5
+COMPANY_NAME_SUFFIXES = re.compile(
+    r"\s+(common stock|ordinary shares|american depositary shares|class [a-z]|"
+    r"inc\.?|incorporated|corporation|corp\.?|co\.?|ltd\.?|limited|plc|holdings?|group|n\.v\.|s\.a\.)\b.*$",
+    re.IGNORECASE
+)
 
-            )
-            
-            news_data = []
-            if results and results.get('status') == 'ok':
-                articles = results.get('articles', [])
-                
-                for article in articles:
-                    if article.get('title') and article.get('url'):
-                        news_data.append({
+
+def _company_search_term(name: str) -> str:
+    """Reduce a screener name like 'Apple Inc. Common Stock' to 'Apple'."""
+    term = COMPANY_NAME_SUFFIXES.sub('', name.strip()).strip(' ,.')
+    return term if len(term) >= 3 else ''
+
+
+# Symbols this short ("A", "IT", "ON") are ordinary words: searched for
+# they flood a shared query, and matched as words they hit any title
+SHORT_TICKER_LENGTH = 2
+
+
+def _build_news_queries(terms: Dict[str, List[str]], isolated=()) -> List[List[str]]:
+    """Group tickers so each group's OR-query fits in one NewsAPI request.
+
+    Tickers in `isolated` get a query of their own, so their results
+    cannot crowd out the other tickers' articles.
+    """
+    groups = [[symbol] for symbol in terms if symbol in isolated]
+    current, length = [], 0
+
+    for symbol, symbol_terms in terms.items():
+        if symbol in isolated:
+            continue
+        clause = ' OR '.join(f'"{term}"' for term in symbol_terms)
+        added = len(clause) + (4 if current else 0)
+
+        if current and length + added > NEWSAPI_MAX_QUERY_LENGTH:
+            groups.append(current)
+            current, length = [], 0
+            added = len(clause)
+
+        current.append(symbol)
+        length += added
+
+    if current:
+        groups.append(current)
+
+    return groups
+
+
+def collect_bulk_news(tickers: List[str], days: int = 7,
+                      company_names: Optional[Dict[str, str]] = None,
+                      per_ticker: int = 5) -> Tuple[Dict[str, List[Dict[str, str]]], List[str]]:
+    """Fetch recent news for many tickers with combined NewsAPI OR-queries.
+
+    Articles are assigned back to tickers by matching the symbol (as a whole
+    word) or the company name in the title and description. Tickers of
+    SHORT_TICKER_LENGTH letters or fewer are searched by company name only,
+    in their own query, and match only on their cashtag ("$A") or company
+    name; without a company name they are skipped. Cached tickers are not
+    requested again.
+
+    Returns:
+        (news, failed): a dict mapping each ticker to a list of dictionaries
+        with 'headline' and 'url', and the tickers whose query failed in
+        this call (their lists are empty and not cached)
+    """
+    company_names = {k.upper(): v for k, v in (company_names or {}).items()}
+    symbols = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+    news = {}
+
+    terms = {}
+    short_symbols = set()
+    for symbol in symbols:
+        cached = get_cache().get("news", f"{symbol}:{days}")
+        if cached is not None:
+            news[symbol] = cached
+            continue
+
+        company_term = _company_search_term(company_names.get(symbol, ''))
+        if len(symbol) <= SHORT_TICKER_LENGTH:
+            if company_term:
+                short_symbols.add(symbol)
+                terms[symbol] = [company_term]
+            else:
+                news[symbol] = []
+            continue
+
+        symbol_terms = [symbol]
+        if company_term and company_term.upper() != symbol:
+            symbol_terms.append(company_term)
+        terms[symbol] = symbol_terms
+
+    if not terms:
+        return news, []
+
+    try:
+        newsapi = NewsApiClient(api_key=get_newsapi_key())
+    except ConfigurationError as e:
+        print(f"Configuration error: {str(e)}")
+        return {symbol: news.get(symbol, []) for symbol in symbols}, list(terms)
+
+    to_date = datetime.now()
+    from_date = to_date - timedelta(days=days)
+
+    matchers = {}
+    for symbol, symbol_terms in terms.items():
+        symbol_pattern = rf"\${re.escape(symbol)}\b" if symbol in short_symbols else rf"\b{re.escape(symbol)}\b"
+        company_terms = symbol_terms if symbol in short_symbols else symbol_terms[1:]
+        matchers[symbol] = [
+            re.compile(symbol_pattern),
+            *(re.compile(rf"\b{re.escape(term)}\b", re.IGNORECASE) for term in company_terms)
+        ]
+
+    failed_symbols = []
+    for group in _build_news_queries(terms, isolated=short_symbols):
+        query = ' OR '.join(f'"{term}"' for symbol in group for term in terms[symbol])
+        found = {symbol: [] for symbol in group}
+        failed = False
+
+        for page in range(1, NEWS_BULK_MAX_PAGES + 1):
+            try:
+                results = newsapi_breaker.call(
+                    newsapi.get_everything,
+                    q=query,
+                    language='en',
+                    sort_by='publishedAt',
+                    from_param=from_date.strftime('%Y-%m-%d'),
+                    to=to_date.strftime('%Y-%m-%d'),
+                    page_size=100,
+                    page=page
+                )
+            except Exception as e:
+                print(f"Error fetching news for {', '.join(group)}: {str(e)}")
+                failed = page == 1
+                break
+
+            if not results or results.get('status') != 'ok':
+                failed = page == 1
+                break
+
+            articles = results.get('articles', [])
+            for article in articles:
+                if not article.get('title') or not article.get('url'):
+                    continue
+
+                text = f"{article['title']} {article.get('description') or ''}"
+                for symbol in group:
+                    if len(found[symbol]) < per_ticker and any(m.search(text) for m in matchers[symbol]):
+                        found[symbol].append({
                             'headline': article['title'],
                             'url': article['url'],
+                            'description': article.get('description'),
+                            'source': (article.get('source') or {}).get('name'),
+                            'published_at': article.get('publishedAt'),
+                            'image_url': article.get('urlToImage'),
                         })
-            
-            return news_data
-            
-        except Exception as e:
-            print(f"Error fetching news for {ticker}: {str(e)}")
-            return []
-        
-    except ConfigurationError as e:
-        print(f"Configuration error: {str(e)}")
-        return []
-    except Exception as e:
-        print(f"Unexpected error in get_news: {str(e)}")
-        return []
-            
-            
-            
-        
 
+            satisfied = all(len(items) >= per_ticker for items in found.values())
+            if satisfied or len(articles) < 100 or page * 100 >= results.get('totalResults', 0):
+                break
+
+        if failed:
+            failed_symbols.extend(group)
+
+        for symbol, items in found.items():
+            news[symbol] = items
+            if not failed:
+                get_cache().set("news", f"{symbol}:{days}", items, NEWS_CACHE_TTL)
+
+    return {symbol: news.get(symbol, []) for symbol in symbols}, failed_symbols
+
+
+def _fetch_history(stock, period: str):
+    """Call history() so upstream failures raise instead of returning an empty frame.
+
+    yfinance only logs errors by default, which would hide a Yahoo outage
+    from the breaker. Returns None when the ticker simply has no data.
+    """
+    try:
+        return stock.history(period=period, raise_errors=True)
+    except YAHOO_NO_DATA_ERRORS:
+        return None
+
+
+def get_price_history(ticker: str, period: str = "1mo", raise_errors: bool = False) -> Optional[object]:
+    """Fetch historical price data for a stock ticker.
+
+    Returns None when Yahoo has no rows or the call fails; with
+    raise_errors set, failures propagate instead.
+    """
+    cache_key = f"{ticker.upper()}:{period}"
+    cached = get_cache().get("prices", cache_key)
+    if cached is not None:
+        return cached
 
-def get_price_history(ticker: str, period: str = "1mo") -> Optional[object]:
-    """Fetch historical price data for a stock ticker."""
     try:
         stock = yf.Ticker(ticker)
-        history = stock.history(period=period)
+        history = yahoo_breaker.call(_fetch_history, stock, period)
 
-        if history.empty:
+        if history is None or history.empty:
             return None
 
+        get_cache().set("prices", cache_key, history, PRICE_CACHE_TTL)
         return history
 
     except Exception as e:
+        if raise_errors:
+            raise
         return None
 
 
+def get_bulk_price_history(tickers: List[str], period: str = "1mo") -> Tuple[Dict[str, object], List[str]]:
+    """Fetch historical price data for many tickers with batched Yahoo downloads.
+
+    Cached tickers are served from the shared cache; the rest are downloaded
+    YAHOO_BULK_CHUNK_SIZE at a time in a single request per chunk. A chunk
+    whose download raised, or came back with no rows at all, counts as
+    failed: yf.download reports an outage as an empty frame.
+
+    Returns:
+        (histories, failed): a dict mapping each ticker to its history
+        DataFrame, leaving out tickers that failed or returned no rows, and
+        the tickers whose chunk failed in this call
+    """
+    symbols = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+    histories = {}
+    missing = []
+    failed = []
+
+    for symbol in symbols:
+        cached = get_cache().get("prices", f"{symbol}:{period}")
+        if cached is not None:
+            histories[symbol] = cached
+        else:
+            missing.append(symbol)
+
+    for start in range(0, len(missing), YAHOO_BULK_CHUNK_SIZE):
+        chunk = missing[start:start + YAHOO_BULK_CHUNK_SIZE]
+
+        try:
+            data = yahoo_breaker.call_with_deadline(
+                yf.download,
+                YAHOO_BULK_TIMEOUT,
+                chunk,
+                period=period,
+                group_by='ticker',
+                auto_adjust=True,
+                threads=True,
+                progress=False
+            )
+        except Exception as e:
+            print(f"Error downloading prices for {', '.join(chunk)}: {str(e)}")
+            failed.extend(chunk)
+            continue
+
+        if data is None or data.empty:
+            failed.extend(chunk)
+            continue
+
+        for symbol in chunk:
+            if symbol not in data.columns.get_level_values(0):
+                continue
+
+            history = data[symbol].dropna(how='all')
+            if history.empty:
+                continue
+
+            histories[symbol] = history
+            get_cache().set("prices", f"{symbol}:{period}", history, PRICE_CACHE_TTL)
+
+    return histories, failed
+
+
+def get_latest_quotes(tickers: List[str]) -> Tuple[Dict[str, Dict], bool]:
+    """Get latest close, daily change and timestamp for many tickers.
+
+    Returns:
+        (quotes, degraded): a dict mapping each ticker with data to a quote
+        dictionary, and whether any download failed in this call
+    """
+    quotes = {}
+    histories, failed = get_bulk_price_history(tickers, period="5d")
+
+    for symbol, history in histories.items():
+        closes = history['Close'].dropna()
+        volumes = history['Volume'].dropna()
+        if closes.empty:
+            continue
+
+        last_close = float(closes.iloc[-1])
+        previous_close = float(closes.iloc[-2]) if len(closes) > 1 else None
+        change = last_close - previous_close if previous_close is not None else None
+
+        quotes[symbol] = {
+            'price': last_close,
+            'previous_close': previous_close,
+            'change': change,
+            'change_percent': (change / previous_close * 100) if previous_close else None,
+            'volume': int(volumes.iloc[-1]) if not volumes.empty else None,
+            'as_of': closes.index[-1].isoformat(),
+        }
+
+    return quotes, bool(failed)
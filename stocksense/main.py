@@ -1,10 +1,11 @@
 import os
 import sys
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 # Add the parent directory to Python path to enable imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,6 +14,14 @@ sys.path.append(parent_dir)
 
 from core.config import validate_configuration, ConfigurationError
 from ai.react_agent import run_react_analysis
+from data.collectors.data_collectors import collect_bulk_news, get_latest_quotes
+
+MAX_QUOTE_TICKERS = 200
+MAX_NEWS_TICKERS = 100
+
+
+def is_valid_ticker(ticker: str) -> bool:
+    return bool(ticker) and ticker.replace('.', '').replace('-', '').isalpha() and len(ticker) <= 10
 
 
 @asynccontextmanager
@@ -77,7 +86,7 @@ async def analyze_stock(ticker: str) -> Dict[str, Any]:
         if not ticker:
             raise HTTPException(status_code=400, detail="Ticker symbol is required")
         
-        if not ticker.replace('.', '').replace('-', '').isalpha() or len(ticker) > 10:
+        if not is_valid_ticker(ticker):
             raise HTTPException(status_code=400, detail="Invalid ticker format")
 
         print(f"Starting analysis for ticker: {ticker}")
@@ -103,6 +112,7 @@ async def analyze_stock(ticker: str) -> Dict[str, Any]:
         reasoning_steps = analysis_result.get("reasoning_steps", [])
         tools_used = analysis_result.get("tools_used", [])
         final_decision = analysis_result.get("final_decision", "UNSPECIFIED")
+        degraded_sources = analysis_result.get("degraded_sources", [])
 
         # Validate we have meaningful results
         if not summary or summary.startswith("Analysis failed"):
@@ -115,6 +125,7 @@ async def analyze_stock(ticker: str) -> Dict[str, Any]:
         return {
             "success": True,
             "ticker": ticker,
+            "degraded": bool(degraded_sources),
             "analysis": {
                 "summary": summary,
                 "sentiment_report": sentiment_report,
@@ -125,7 +136,8 @@ async def analyze_stock(ticker: str) -> Dict[str, Any]:
                 "news_headlines": {
                     "count": len(headlines),
                     "headlines": headlines[:10],
-                    "source": "NewsAPI"
+                    "source": "NewsAPI",
+                    "available": "newsapi" not in degraded_sources
                 },
                 "price_data": {
                     "data_points": len(price_data),
@@ -136,6 +148,7 @@ async def analyze_stock(ticker: str) -> Dict[str, Any]:
                         "low": min([p["Low"] for p in price_data]) if price_data else None
                     },
                     "source": "Yahoo Finance",
+                    "available": "yahoo_finance" not in degraded_sources,
                     "chart_data": price_data 
                 },
                 "ai_analysis": {
@@ -150,7 +163,8 @@ async def analyze_stock(ticker: str) -> Dict[str, Any]:
                 "analysis_type": "ReAct Agent",
                 "timestamp": analysis_result.get("timestamp"),
                 "processing_time": f"{analysis_result.get('iterations', 0)} AI iterations",
-                "data_freshness": "Real-time"
+                "data_freshness": "Real-time",
+                "degraded_sources": degraded_sources
             }
         }
 
@@ -162,3 +176,94 @@ async def analyze_stock(ticker: str) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.get("/quotes")
+async def get_quotes(tickers: str) -> Dict[str, Any]:
+    """
+    Latest quotes for many tickers, fetched with batched Yahoo downloads.
+
+    Args:
+        tickers: Comma-separated ticker symbols (e.g., AAPL,MSFT,GOOGL)
+
+    Returns:
+        Quotes keyed by ticker plus the tickers that could not be priced
+    """
+    symbols: List[str] = list(dict.fromkeys(
+        t.strip().upper() for t in tickers.split(',') if t.strip()
+    ))
+
+    if not symbols:
+        raise HTTPException(status_code=400, detail="At least one ticker is required")
+
+    if len(symbols) > MAX_QUOTE_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_QUOTE_TICKERS} tickers per request")
+
+    invalid = [symbol for symbol in symbols if not is_valid_ticker(symbol)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid ticker format: {', '.join(invalid)}")
+
+    quotes, degraded = await run_in_threadpool(get_latest_quotes, symbols)
+
+    return {
+        "success": True,
+        "quotes": quotes,
+        "missing": [symbol for symbol in symbols if symbol not in quotes],
+        "degraded": degraded,
+        "source": "Yahoo Finance"
+    }
+
+
+@app.get("/news")
+async def get_news_for_tickers(
+    tickers: str,
+    name: Optional[List[str]] = Query(default=None),
+    days: int = 7,
+    per_ticker: int = 5
+) -> Dict[str, Any]:
+    """
+    Recent headlines for many tickers, fetched with combined NewsAPI queries.
+
+    Args:
+        tickers: Comma-separated ticker symbols (e.g., AAPL,MSFT,GOOGL)
+        name: Optional company names as SYMBOL:Name, repeatable; they widen
+            the search and are required for one- and two-letter tickers
+        days: Number of days to look back (1-30)
+        per_ticker: Headlines per ticker (1-20)
+
+    Returns:
+        Headlines keyed by ticker plus the tickers whose query failed
+    """
+    symbols: List[str] = list(dict.fromkeys(
+        t.strip().upper() for t in tickers.split(',') if t.strip()
+    ))
+
+    if not symbols:
+        raise HTTPException(status_code=400, detail="At least one ticker is required")
+
+    if len(symbols) > MAX_NEWS_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_NEWS_TICKERS} tickers per request")
+
+    invalid = [symbol for symbol in symbols if not is_valid_ticker(symbol)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid ticker format: {', '.join(invalid)}")
+
+    company_names = {}
+    for entry in name or []:
+        symbol, _, company = entry.partition(':')
+        if company.strip():
+            company_names[symbol.strip().upper()] = company.strip()
+
+    news, failed = await run_in_threadpool(
+        collect_bulk_news,
+        symbols,
+        days=max(1, min(days, 30)),
+        company_names=company_names,
+        per_ticker=max(1, min(per_ticker, 20))
+    )
+
+    return {
+        "success": True,
+        "news": news,
+        "failed": failed,
+        "degraded": bool(failed),
+        "source": "NewsAPI"
+    }